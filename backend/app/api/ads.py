@@ -1,15 +1,21 @@
 """
 Ads API endpoints - Public feed for all ads (similar to scoops feed)
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
-import json
 import os
+import sys
 import httpx
 
+# Add parent directory to path to import lib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
 # Import auth dependencies
 from app.api.auth import get_current_user
+from lib.record_cache import record_cache
+from lib.json_codec import decode_record_field, loads
+from app.utils.etag import compute_etag, etag_matches, not_modified, record_versions, set_etag
 
 router = APIRouter(prefix="/ads", tags=["ads"])
 
@@ -31,6 +37,8 @@ class AdsResponse(BaseModel):
 
 @router.get("", response_model=AdsResponse)
 async def get_ads(
+    request: Request,
+    response: Response,
     current_user: Dict[str, Any] = Depends(get_current_user),
 ):
     """
@@ -44,73 +52,78 @@ async def get_ads(
     try:
         print(f"[/api/ads] Fetching ads for user: {current_user.get('email', 'unknown')}")
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # Fetch all ads from PocketBase (no auth header needed - ads are public)
-            url = f"{pocketbase_url}/api/collections/ads/records"
-            print(f"[/api/ads] Requesting: {url}")
-            
-            response = await client.get(
-                url,
-                params={
-                    "perPage": 100,  # Get up to 100 ads
-                    # Note: PocketBase sort parameter can cause 400 errors, so we don't use it
-                },
-            )
-            
-            print(f"[/api/ads] Response status: {response.status_code}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                items = data.get("items", [])
-                print(f"[/api/ads] Got {len(items)} items from PocketBase")
+        # Ads are shared and rarely change: serve from the process-wide record cache
+        cache_key = (("perPage", 100),)
+        items = record_cache.get_query("ads", cache_key)
+        if items is None:
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                # Fetch all ads from PocketBase (no auth header needed - ads are public)
+                url = f"{pocketbase_url}/api/collections/ads/records"
+                print(f"[/api/ads] Requesting: {url}")
                 
-                # Map PocketBase records to AdResponse
-                ads = []
-                for item in items:
-                    # Get tags - can be JSON string or list or empty
-                    tags = item.get("tags", [])
-                    if isinstance(tags, str):
-                        try:
-                            tags = json.loads(tags)
-                        except:
-                            tags = []
-                    if not isinstance(tags, list):
-                        tags = []
-                    
-                    # Convert string ID to numeric ID using hash function
-                    string_id = item.get("id", "")
-                    # Use string ID directly - it's unique and avoids precision loss
-                    
-                    # Get company name - use company field, fallback to headline
-                    company = item.get("company", "") or item.get("headline", "") or "Unknown"
-                    
-                    # Get tagline - use headline field if available
-                    tagline = item.get("headline", "")
-                    
-                    # Get description - use body field if available
-                    description = item.get("body", "") or item.get("description", "")
-                    
-                    ads.append(AdResponse(
-                        id=string_id,  # Use string ID directly
-                        company=company,
-                        tagline=tagline,
-                        description=description,
-                        tags=tags,
-                    ))
-                
-                print(f"[/api/ads] Mapped {len(ads)} ads")
-                return AdsResponse(
-                    items=ads,
-                    total=len(ads),
-                )
-            else:
-                error_text = response.text
-                print(f"[/api/ads] Error: {error_text[:300]}")
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Failed to fetch ads: {error_text[:100]}"
+                pb_response = await client.get(
+                    url,
+                    params={
+                        "perPage": 100,  # Get up to 100 ads
+                        # Note: PocketBase sort parameter can cause 400 errors, so we don't use it
+                    },
                 )
                 
+                print(f"[/api/ads] Response status: {pb_response.status_code}")
+                
+                if pb_response.status_code != 200:
+                    error_text = pb_response.text
+                    print(f"[/api/ads] Error: {error_text[:300]}")
+                    raise HTTPException(
+                        status_code=pb_response.status_code,
+                        detail=f"Failed to fetch ads: {error_text[:100]}"
+                    )
+                
+                data = loads(pb_response.content)
+                items = data.get("items", [])
+                print(f"[/api/ads] Got {len(items)} items from PocketBase")
+                record_cache.put_query("ads", cache_key, items)
+        
+        etag = compute_etag("ads", record_versions(items))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+        
+        # Map PocketBase records to AdResponse
+        ads = []
+        for item in items:
+            # Get tags - can be JSON string or list or empty
+            tags = decode_record_field(item, "tags", [])
+            if not isinstance(tags, list):
+                tags = []
+            
+            # Convert string ID to numeric ID using hash function
+            string_id = item.get("id", "")
+            # Use string ID directly - it's unique and avoids precision loss
+            
+            # Get company name - use company field, fallback to headline
+            company = item.get("company", "") or item.get("headline", "") or "Unknown"
+            
+            # Get tagline - use headline field if available
+            tagline = item.get("headline", "")
+            
+            # Get description - use body field if available
+            description = item.get("body", "") or item.get("description", "")
+            
+            ads.append(AdResponse(
+                id=string_id,  # Use string ID directly
+                company=company,
+                tagline=tagline,
+                description=description,
+                tags=tags,
+            ))
+        
+        print(f"[/api/ads] Mapped {len(ads)} ads")
+        return AdsResponse(
+            items=ads,
+            total=len(ads),
+        )
+
     except HTTPException:
         raise
     except Exception as e:
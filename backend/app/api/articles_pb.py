@@ -1,19 +1,22 @@
 """
 Articles API endpoints for PocketBase.
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from datetime import date, datetime
-from typing import List
+from operator import attrgetter
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
 import os
 import sys
-import json
 
 # Add parent directory to path to import lib
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from lib.pocketbase_client import PocketBaseClient
+from lib.records import Article
 from app.utils.date_format import format_datetime_dutch, format_date_dutch
+from app.utils.etag import compute_etag, etag_matches, not_modified, record_versions
+from app.utils.responses import EncodedBody, json_response, response_cache
 
 router = APIRouter(prefix="/articles", tags=["articles"])
 
@@ -69,70 +72,102 @@ class DailyEditionResponse(BaseModel):
     articles: List[ArticleResponse]
 
 
-def parse_json_field(value: str | dict) -> dict:
-    """Parse JSON field from PocketBase (can be string or dict)"""
-    if isinstance(value, dict):
-        return value
-    if isinstance(value, str):
-        try:
-            return json.loads(value)
-        except:
-            return {}
-    return {}
+_SORT_TS = attrgetter("sort_ts")
 
 
-def filter_duplicate_articles(articles: List[dict]) -> List[dict]:
+def filter_duplicate_articles(articles: List[Article]) -> List[Article]:
     """
     Filter duplicate articles by source_url (RSS link), keeping only the latest version per URL.
     We do NOT deduplicate by original_title so different stories (e.g. two "Savannah" articles) both show.
+
+    One pass over the articles with their precomputed sort_ts (published_at, else created,
+    parsed when the Article was built); on equal timestamps the first one wins. The result
+    is ordered newest first (stable, so ties keep their input order).
     """
-    if not articles or len(articles) == 0:
+    if not articles:
         return articles
 
-    def sort_key(art):
-        pub_at = art.get("published_at")
-        if pub_at:
-            try:
-                if isinstance(pub_at, str):
-                    from dateutil import parser as date_parser
-                    return date_parser.parse(pub_at).timestamp()
-                return pub_at.timestamp() if hasattr(pub_at, 'timestamp') else 0
-            except Exception:
-                pass
-        created = art.get("created")
-        if created:
-            try:
-                if isinstance(created, str):
-                    from dateutil import parser as date_parser
-                    return date_parser.parse(created).timestamp()
-                return created.timestamp() if hasattr(created, 'timestamp') else 0
-            except Exception:
-                pass
-        return art.get("id", "")
-
-    # Group by source_url; keep one per URL (latest by published_at/created)
-    by_url: dict = {}
+    newest: Dict[str, Article] = {}
     for article in articles:
-        url = (article.get("source_url") or "").strip()
-        if not url:
-            # No URL: keep by id so we don't drop them
-            by_url[f"__no_url_{article.get('id', '')}"] = [article]
-            continue
-        if url not in by_url:
-            by_url[url] = []
-        by_url[url].append(article)
-
-    unique_articles = []
-    for _url, group in by_url.items():
-        sorted_group = sorted(group, key=sort_key, reverse=True)
-        unique_articles.append(sorted_group[0])
-    # Preserve original order by published_at (newest first)
-    unique_articles.sort(key=sort_key, reverse=True)
+        # No URL: keep by id so we don't drop them
+        key = article.source_url or f"__no_url_{article.id}"
+        kept = newest.get(key)
+        if kept is None or article.sort_ts > kept.sort_ts:
+            newest[key] = article
+    unique_articles = list(newest.values())
+    unique_articles.sort(key=_SORT_TS, reverse=True)
     return unique_articles
 
 
+def _edition_body(edition: dict, articles: List[dict], etag: str, log_tag: str) -> EncodedBody:
+    """Encoded DailyEditionResponse for an edition and its articles, cached by ETag."""
+    # Filter duplicate articles (keep only latest version of each source_url)
+    unique_articles = filter_duplicate_articles([Article(record) for record in articles])
+    
+    if len(unique_articles) < len(articles):
+        print(f"[{log_tag}] Filtered {len(articles) - len(unique_articles)} duplicate articles (kept latest versions)")
+    
+    # Map PocketBase records to the ArticleResponse shape
+    edition_date = edition.get("date", "")
+    article_responses = []
+    for article in unique_articles:
+        article_responses.append({
+            "id": article.id,
+            "original_title": article.original_title,
+            "processed_variants": article.processed_variants,
+            "tags": article.tags,
+            "location_lat": article.location_lat,
+            "location_lon": article.location_lon,
+            "location_city": article.location_city,
+            "date": format_date_dutch(article.date or edition_date),
+            "published_at": format_datetime_dutch(article.published_at),
+        })
+    
+    edition_response = {
+        "id": edition.get("id", ""),
+        "date": format_date_dutch(edition_date),
+        "global_mood": edition.get("global_mood"),
+        "articles": article_responses,
+    }
+    return response_cache.put(("articles/edition", etag), EncodedBody.from_data(edition_response, etag))
+
+
+async def _edition_response(
+    request: Request,
+    pb: PocketBaseClient,
+    edition: dict,
+    article_query: Dict[str, Any],
+    log_tag: str,
+    fallback_query: Optional[Dict[str, Any]] = None,
+):
+    """
+    The edition's response, or 304 Not Modified. The ETag comes from a versions-only
+    query (id, updated) of the articles; full records are fetched only when neither the
+    client nor the response cache has that version. fallback_query is used instead
+    when article_query matches no articles.
+    """
+    versions = await pb.get_list("articles", fields="id,updated", skip_total=True, **article_query)
+    if not versions and fallback_query:
+        print(f"[{log_tag}] No articles for edition {edition.get('id')}, using the most recent articles")
+        article_query = fallback_query
+        versions = await pb.get_list("articles", fields="id,updated", skip_total=True, **article_query)
+
+    # Unchanged edition and articles: let the client reuse its copy
+    etag = compute_etag(record_versions([edition]), record_versions(versions))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    cached = response_cache.get(("articles/edition", etag))
+    if cached is not None:
+        return json_response(request, cached)
+
+    articles = await pb.get_list("articles", **article_query)
+    # Versions of what is served (articles may have changed since the versions query)
+    etag = compute_etag(record_versions([edition]), record_versions(articles))
+    return json_response(request, _edition_body(edition, articles, etag, log_tag))
+
+
 @router.get("/today", response_model=DailyEditionResponse)
-async def get_today_articles():
+async def get_today_articles(request: Request):
     """Get today's daily edition with all articles from PocketBase."""
     today = date.today()
     pb = await get_pb_client()
@@ -150,45 +185,19 @@ async def get_today_articles():
     edition = editions[0]
     edition_id = edition["id"]
     
-    # Get articles for this edition
+    # Articles for this edition
     # PocketBase filter syntax: use single quotes for relation IDs
-    articles = await pb.get_list(
-        "articles",
-        filter=f"daily_edition_id = '{edition_id}'",
-        sort="-published_at",
-    )
-    
-    # Filter duplicate articles (keep only latest version of each original_title)
-    unique_articles = filter_duplicate_articles(articles)
-    
-    if len(unique_articles) < len(articles):
-        print(f"[articles_pb/today] Filtered {len(articles) - len(unique_articles)} duplicate articles (kept latest versions)")
-    
-    # Map PocketBase records to ArticleResponse
-    article_responses = []
-    for article in unique_articles:
-        article_responses.append(ArticleResponse(
-            id=article["id"],
-            original_title=article["original_title"],
-            processed_variants=parse_json_field(article.get("processed_variants", {})),
-            tags=parse_json_field(article.get("tags", {})),
-            location_lat=article.get("location_lat"),
-            location_lon=article.get("location_lon"),
-            location_city=article.get("location_city"),
-            date=format_date_dutch(article.get("date", edition.get("date", ""))),
-            published_at=format_datetime_dutch(article.get("published_at")),
-        ))
-    
-    return DailyEditionResponse(
-        id=edition.get("id", ""),
-        date=format_date_dutch(edition.get("date", "")),
-        global_mood=edition.get("global_mood"),
-        articles=article_responses,
+    return await _edition_response(
+        request,
+        pb,
+        edition,
+        {"filter": f"daily_edition_id = '{edition_id}'", "sort": "-published_at"},
+        "articles_pb/today",
     )
 
 
 @router.get("/latest", response_model=DailyEditionResponse)
-async def get_latest_edition():
+async def get_latest_edition(request: Request):
     """Get the latest daily edition with all articles from PocketBase."""
     try:
         pb = await get_pb_client()
@@ -227,57 +236,16 @@ async def get_latest_edition():
     if not edition_id:
         raise HTTPException(status_code=500, detail="Edition has no ID")
     
-    # Get articles for this edition
+    # Articles for this edition
     # PocketBase filter syntax: use single quotes for relation IDs
-    articles = await pb.get_list(
-        "articles",
-        filter=f"daily_edition_id = '{edition_id}'",
-        sort="-published_at",
-        per_page=500,
-    )
-    
-    print(f"DEBUG: Found {len(articles)} articles for edition {edition_id}")
-    
-    # If no articles found with filter, try getting all recent articles as fallback
-    if len(articles) == 0:
-        print(f"DEBUG: No articles found for edition {edition_id}, trying to get all recent articles")
-        all_articles = await pb.get_list(
-            "articles",
-            sort="-published_at",
-            per_page=500,
-        )
-        print(f"DEBUG: Found {len(all_articles)} total articles in database")
-        if len(all_articles) > 0:
-            # Use the most recent articles even if they're not linked to this edition
-            # This helps guests see content even if edition linking is broken
-            articles = all_articles[:50]  # Limit to 50 most recent
-            print(f"DEBUG: Using {len(articles)} most recent articles as fallback")
-    
-    # Filter duplicate articles (keep only latest version of each original_title)
-    unique_articles = filter_duplicate_articles(articles)
-    
-    if len(unique_articles) < len(articles):
-        print(f"[articles_pb/latest] Filtered {len(articles) - len(unique_articles)} duplicate articles (kept latest versions)")
-    
-    # Map PocketBase records to ArticleResponse
-    article_responses = []
-    for article in unique_articles:
-        article_responses.append(ArticleResponse(
-            id=article["id"],
-            original_title=article["original_title"],
-            processed_variants=parse_json_field(article.get("processed_variants", {})),
-            tags=parse_json_field(article.get("tags", {})),
-            location_lat=article.get("location_lat"),
-            location_lon=article.get("location_lon"),
-            location_city=article.get("location_city"),
-            date=format_date_dutch(article.get("date", edition.get("date", ""))),
-            published_at=format_datetime_dutch(article.get("published_at")),
-        ))
-    
-    return DailyEditionResponse(
-        id=edition.get("id", ""),
-        date=format_date_dutch(edition.get("date", "")),
-        global_mood=edition.get("global_mood"),
-        articles=article_responses,
+    # If none are linked, use the 50 most recent articles: this helps guests see
+    # content even if edition linking is broken
+    return await _edition_response(
+        request,
+        pb,
+        edition,
+        {"filter": f"daily_edition_id = '{edition_id}'", "sort": "-published_at", "per_page": 500},
+        "articles_pb/latest",
+        fallback_query={"sort": "-published_at", "per_page": 50},
     )
 
@@ -7,12 +7,18 @@ from pydantic import BaseModel, EmailStr
 from typing import Optional, Dict, Any
 import os
 import sys
+import httpx
+from datetime import datetime
 
 # Add parent directory to path to import lib
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from lib.auth_service import AuthService
 from lib.pocketbase_client import PocketBaseClient
+from lib.json_codec import decode_field
+from lib.token_cache import decode_claims, token_cache
+from app.services.realtime_service import add_listener
+from app.services.ledger_service import KIND_ADJUSTMENT, KIND_PURCHASE, ledger_service, purchase_description
 from app.utils.date_format import format_datetime_dutch, format_date_dutch
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -109,7 +115,10 @@ async def get_current_user(
 ) -> Dict[str, Any]:
     """
     Verify token and return current user info.
-    Decodes the JWT token to extract user ID and other claims.
+    The JWT claims (user id, expiry) are checked locally on every request; the signature
+    is verified by PocketBase (auth-refresh) the first time a token is seen, after which
+    the identity is served from the token cache (see lib/token_cache.py). Tokens that
+    cannot be verified because PocketBase is down are refused with 503, never trusted.
     """
     if not credentials:
         raise HTTPException(
@@ -127,62 +136,23 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Decode JWT to get user info
     try:
-        import base64
-        import json
-        
-        # JWT format: header.payload.signature
-        parts = token.split(".")
-        if len(parts) < 2:
-            raise ValueError("Invalid JWT format")
-        
-        # Decode payload (add padding if needed)
-        payload = parts[1]
-        payload += "=" * (4 - len(payload) % 4)  # Add padding
-        decoded = base64.urlsafe_b64decode(payload)
-        token_data = json.loads(decoded)
-        
-        # Extract user ID from token
+        token_data = decode_claims(token)
         user_id = token_data.get("id") or token_data.get("userId")
         
-        if not user_id:
-            raise ValueError("User ID not found in token")
-        
-        # Try to get email from token first
-        email = token_data.get("email")
-        
-        # Fetch user record from PocketBase to get email (prefer /api/users/me to avoid 404 on restricted users collection)
-        if not email:
-            try:
-                import httpx
-                pocketbase_url = os.getenv("POCKETBASE_URL", "http://127.0.0.1:8090")
-                async with httpx.AsyncClient(base_url=pocketbase_url, timeout=5.0) as client:
-                    response = await client.get(
-                        "/api/users/me",
-                        headers={"Authorization": f"Bearer {token}"},
-                    )
-                    if response.status_code != 200 and user_id:
-                        response = await client.get(
-                            f"/api/collections/users/records/{user_id}",
-                            headers={"Authorization": f"Bearer {token}"},
-                        )
-                    if response.status_code == 200:
-                        user_record = response.json()
-                        email = user_record.get("email")
-                    else:
-                        print(f"[DEBUG get_current_user] Failed to fetch user: {response.status_code} - {response.text}")
-            except Exception as e:
-                print(f"[DEBUG get_current_user] Warning: Could not fetch user email: {e}")
-        
-        print(f"[DEBUG get_current_user] User ID: {user_id}, Email: {email}")
+        identity = token_cache.get(token)
+        if identity is None or identity["id"] != user_id:
+            identity = await _verify_token(token, user_id, token_data)
         
         return {
             "token": token,
             "id": user_id,
-            "email": email,
+            "email": identity.get("email") or token_data.get("email"),
+            "username": identity.get("username"),
             "token_data": token_data,  # Include full token data for debugging
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=401,
@@ -191,6 +161,53 @@ async def get_current_user(
         )
 
 
+def _verification_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Authentication service unavailable, try again shortly",
+        headers={"Retry-After": "5"},
+    )
+
+
+async def _verify_token(token: str, user_id: str, token_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Have PocketBase verify the token signature (auth-refresh rejects tokens it did not
+    sign for this user) and cache the returned identity. The signing key is per user and
+    only PocketBase knows it, so if PocketBase cannot be reached the token is refused
+    (503) rather than trusted on its unverified claims.
+    """
+    try:
+        _, record = await get_auth_service().refresh_token(token)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code < 500:
+            raise ValueError(f"Token rejected by PocketBase ({e.response.status_code})")
+        print(f"[Auth] Token verification unavailable ({e.response.status_code})")
+        raise _verification_unavailable()
+    except httpx.HTTPError as e:
+        print(f"[Auth] Token verification unavailable ({e})")
+        raise _verification_unavailable()
+    if record.get("id") != user_id:
+        raise ValueError("Token does not match its user record")
+    identity = {
+        "id": user_id,
+        "email": record.get("email") or token_data.get("email"),
+        "username": record.get("username"),
+    }
+    token_cache.put(token, identity, float(token_data.get("exp") or 0))
+    return identity
+
+
+def _on_user_change(action: str, record: Dict[str, Any]) -> None:
+    # Game state writes update users records too: only identity changes drop tokens
+    if action == "delete":
+        token_cache.invalidate_user(record.get("id", ""))
+    else:
+        token_cache.identity_changed(record)
+
+
+add_listener("users", _on_user_change)
+
+
 # Helper to get auth headers from dependency
 def get_auth_headers(current_user: Dict[str, Any] = Depends(get_current_user)) -> Dict[str, str]:
     """Get authentication headers from current user dependency"""
@@ -276,6 +293,13 @@ async def login(request: LoginRequest):
             identity=request.identity,
             password=request.password,
         )
+        # The token was just issued by PocketBase: no need to verify it on first use
+        if user_record.get("id"):
+            token_cache.put(
+                token,
+                {"id": user_record["id"], "email": user_record.get("email"), "username": user_record.get("username")},
+                float(decode_claims(token).get("exp") or 0),
+            )
         return LoginResponse(
             token=token,
             user=user_record,
@@ -286,6 +310,17 @@ async def login(request: LoginRequest):
         raise HTTPException(status_code=500, detail=f"Login failed: {str(e)}")
 
 
+@router.post("/logout")
+async def logout(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)):
+    """
+    Forget the token on the backend (drops it from the token cache).
+    PocketBase tokens are stateless: the client must discard the token as well.
+    """
+    if credentials and credentials.credentials:
+        token_cache.invalidate_token(credentials.credentials)
+    return {"success": True}
+
+
 @router.post("/request-password-reset")
 async def request_password_reset(request: PasswordResetRequest):
     """
@@ -748,6 +783,8 @@ async def update_username(
             
             if response.status_code == 200:
                 user_data = response.json()
+                # Cached identities carry the old username
+                token_cache.invalidate_user(user_id)
                 return UsernameResponse(username=user_data.get("username", new_username))
             else:
                 error_data = response.json() if response.headers.get("content-type", "").startswith("application/json") else {}
@@ -781,7 +818,6 @@ class GameStateUpdateRequest(BaseModel):
 
 def _parse_game_state_from_user(user_data: dict) -> "GameStateResponse":
     """Extract game state fields from a PocketBase user record."""
-    import json
     treasury = user_data.get("treasury", 0.0) or 0.0
     purchased_upgrades = user_data.get("purchased_upgrades", []) or []
     readers = user_data.get("readers", 0) or 0
@@ -789,10 +825,7 @@ def _parse_game_state_from_user(user_data: dict) -> "GameStateResponse":
     publish_streak = int(user_data.get("publish_streak", 0) or 0)
     last_publish_date = user_data.get("last_publish_date") or None
     if isinstance(purchased_upgrades, str):
-        try:
-            purchased_upgrades = json.loads(purchased_upgrades)
-        except Exception:
-            purchased_upgrades = []
+        purchased_upgrades = decode_field(purchased_upgrades, [])
     return GameStateResponse(
         treasury=float(treasury),
         purchased_upgrades=purchased_upgrades if isinstance(purchased_upgrades, list) else [],
@@ -864,6 +897,32 @@ async def get_game_state(
     return GameStateResponse(treasury=0.0, purchased_upgrades=[], readers=0, credibility=0.0, publish_streak=0, last_publish_date=None)
 
 
+async def _record_treasury_change(
+    pb: PocketBaseClient, user_id: str, previous: Dict[str, Any], updated: Dict[str, Any]
+) -> None:
+    """Append a ledger entry for a treasury change made through PUT /auth/game-state."""
+    before = _parse_game_state_from_user(previous)
+    after = _parse_game_state_from_user(updated)
+    delta = after.treasury - before.treasury
+    if not delta:
+        return
+    description = purchase_description(before.purchased_upgrades, after.purchased_upgrades)
+    added = [u for u in after.purchased_upgrades if u not in before.purchased_upgrades]
+    try:
+        if description and delta < 0:
+            await ledger_service.append(
+                pb, user_id, delta, after.treasury, KIND_PURCHASE, description,
+                ref=",".join(added), occurred_at=datetime.now().isoformat(),
+            )
+        else:
+            await ledger_service.append(
+                pb, user_id, delta, after.treasury, KIND_ADJUSTMENT, "Treasury adjustment",
+                occurred_at=datetime.now().isoformat(),
+            )
+    except Exception as e:
+        print(f"[game-state] Failed to write ledger entry: {e}")
+
+
 @router.put("/game-state", response_model=GameStateResponse)
 async def update_game_state(
     request: GameStateUpdateRequest,
@@ -874,8 +933,6 @@ async def update_game_state(
     Update the current user's game state (treasury, purchased_upgrades, readers, credibility).
     Requires authentication. Uses PocketBase admin client to update users collection (user token often has no update permission).
     """
-    import json
-    
     user_id = current_user.get("id")
     if not user_id:
         raise HTTPException(status_code=401, detail="User ID not found in token")
@@ -884,7 +941,7 @@ async def update_game_state(
     if request.treasury is not None:
         update_payload["treasury"] = request.treasury
     if request.purchased_upgrades is not None:
-        update_payload["purchased_upgrades"] = json.dumps(request.purchased_upgrades)
+        update_payload["purchased_upgrades"] = request.purchased_upgrades
     if request.readers is not None:
         update_payload["readers"] = request.readers
     if request.credibility is not None:
@@ -896,8 +953,17 @@ async def update_game_state(
     
     try:
         pb = await _get_pb_admin_client()
+        # Previous state, to record treasury changes (shop purchases) in the ledger
+        previous = None
+        if request.treasury is not None:
+            try:
+                previous = await pb.get_record_by_id("users", user_id)
+            except Exception as e:
+                print(f"[game-state] Could not read previous state for ledger: {e}")
         updated = await pb.update_record("users", user_id, update_payload)
         if updated:
+            if previous is not None:
+                await _record_treasury_change(pb, user_id, previous, updated)
             return _parse_game_state_from_user(updated)
         # update_record returned None (e.g. 404): try to return current state
         user_data = await pb.get_record_by_id("users", user_id)
@@ -2,20 +2,31 @@
 Published Editions API endpoints
 Handles saving and retrieving user-published newspaper editions
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import os
 import sys
-import json
 
 # Add parent directory to path to import lib
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from lib.pocketbase_client import PocketBaseClient, serialize_for_pb
+from lib.json_codec import decode_field, decode_record_field
 from app.api.auth import get_current_user
 from app.utils.date_format import format_datetime_dutch, format_date_dutch
+from app.utils.cursor import DEFAULT_LIMIT, MAX_LIMIT, combine_filters, keyset_filter, page_records, set_next_cursor
+from app.services.leaderboard_service import leaderboard_service
+from app.services.user_stats_service import placed_articles, user_stats_service
+from app.services.ledger_service import KIND_EDITION, edition_description, ledger_service
+from app.services.edition_render_cache import (
+    IMMUTABLE_CACHE_CONTROL,
+    edition_render_cache,
+    is_edition_id,
+    render_public_edition,
+)
+from app.utils.responses import json_response
 
 router = APIRouter(prefix="/published-editions", tags=["published-editions"])
 
@@ -60,6 +71,15 @@ async def get_pb_client() -> PocketBaseClient:
     return _pb_client
 
 
+async def warm_leaderboard():
+    """Build the leaderboard at startup so the first request doesn't pay for it."""
+    try:
+        await leaderboard_service.rebuild(await get_pb_client())
+        print(f"[Leaderboard] Built: {leaderboard_service.status()}")
+    except Exception as e:
+        print(f"[Leaderboard] Startup build failed (will retry on first request): {e}")
+
+
 # Request/Response Models
 class PublishStats(BaseModel):
     cash: float
@@ -84,6 +104,16 @@ class PublishRequest(BaseModel):
     newspaper_name: Optional[str] = None
 
 
+class AudiencePreviewRequest(BaseModel):
+    placedItems: List[GridPlacement]
+
+
+class AudiencePreviewResponse(BaseModel):
+    delta: Dict[str, int]  # Faction scores the draft would add
+    current: Dict[str, int]  # Totals of the published editions so far
+    totals: Dict[str, int]  # current + delta
+
+
 class PublishedEditionResponse(BaseModel):
     id: str
     user: str
@@ -101,6 +131,7 @@ class TransactionResponse(BaseModel):
     description: str
     amount: float
     type: str  # "income" or "expense"
+    balance: Optional[float] = None  # Treasury after the transaction
 
 
 class LeaderboardEntry(BaseModel):
@@ -114,6 +145,15 @@ class LeaderboardEntry(BaseModel):
     date: str
 
 
+class MyRankResponse(BaseModel):
+    date: Optional[str] = None  # Latest publishing day
+    total: int  # Editions published that day
+    rank: Optional[int] = None  # None if the user has not published that day
+    percentile: Optional[float] = None  # Share of the day's other editions the user beats (0-100)
+    edition: Optional[LeaderboardEntry] = None
+    neighbours: List[LeaderboardEntry] = []
+
+
 class PublicPublishedItem(BaseModel):
     type: str  # "article" | "ad"
     headline: str
@@ -172,14 +212,13 @@ async def publish_edition(
             "published_at": now.isoformat(),
         })
         
-        # Convert JSON fields to strings for PocketBase
-        edition_data["grid_layout"] = json.dumps(edition_data["grid_layout"])
-        edition_data["stats"] = json.dumps(edition_data["stats"])
-        
         # Create record in PocketBase
         published_edition = await pb_client.create_record("published_editions", edition_data)
+        if published_edition:
+            leaderboard_service.record_edition(published_edition, current_user.get("email"))
         
         # Update user's game state (readers, credibility, treasury, daily streak) from published edition stats
+        user_record = None
         if published_edition:
             try:
                 user_record = await pb_client.get_record_by_id("users", user_id)
@@ -207,7 +246,7 @@ async def publish_edition(
                     except Exception:
                         new_streak = 1
 
-                await pb_client.update_record(
+                updated_user = await pb_client.update_record(
                     "users",
                     user_id,
                     {
@@ -219,7 +258,40 @@ async def publish_edition(
                     }
                 )
             except Exception as e:
+                updated_user = None
                 print(f"Warning: Failed to update user game state: {e}")
+
+            # Record the treasury change in the user's ledger
+            if updated_user is not None:
+                try:
+                    await ledger_service.append(
+                        pb_client,
+                        user_id,
+                        request.stats.cash,
+                        new_treasury,
+                        KIND_EDITION,
+                        edition_description(request.stats.cash, published_edition.get("newspaper_name")),
+                        ref=published_edition.get("id", ""),
+                        occurred_at=published_edition.get("published_at") or now.isoformat(),
+                    )
+                except Exception as e:
+                    print(f"Warning: Failed to write ledger entry: {e}")
+
+            # Render the public page now so share links never need PocketBase
+            if user_record is not None:
+                try:
+                    edition_render_cache.put(
+                        published_edition.get("id", ""),
+                        render_public_edition(published_edition, user_record.get("username")),
+                    )
+                except Exception as e:
+                    print(f"Warning: Failed to render public edition: {e}")
+
+            # Add this edition to the user's materialized aggregates (audience impact, ...)
+            try:
+                await user_stats_service.apply_edition(pb_client, published_edition)
+            except Exception as e:
+                print(f"Warning: Failed to update user stats (rebuild with scripts/rebuild_user_stats.py): {e}")
         
         if not published_edition:
             raise HTTPException(
@@ -228,8 +300,8 @@ async def publish_edition(
             )
         
         # Parse JSON fields back for response
-        published_edition["grid_layout"] = json.loads(published_edition.get("grid_layout", "{}"))
-        published_edition["stats"] = json.loads(published_edition.get("stats", "{}"))
+        published_edition["grid_layout"] = decode_field(published_edition.get("grid_layout"), {})
+        published_edition["stats"] = decode_field(published_edition.get("stats"), {})
         
         return PublishedEditionResponse(
             id=published_edition.get("id", ""),
@@ -253,12 +325,17 @@ async def publish_edition(
 
 @router.get("", response_model=List[PublishedEditionResponse])
 async def get_user_publications(
-    current_user: dict = Depends(get_current_user)
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = Query(None),
 ):
     """
-    Get all published editions for the current user.
+    Get the current user's published editions, newest first.
     
-    Requires authentication.
+    Requires authentication. Without `limit`/`cursor` all editions are returned. With
+    them, at most `limit` editions per response; when there are more, the
+    X-Next-Cursor header holds the cursor for the next page (?cursor=...).
     """
     user_id = current_user.get("id")
     if not user_id:
@@ -270,32 +347,33 @@ async def get_user_publications(
     try:
         pb_client = await get_pb_client()
         
-        # Get all published editions for this user
-        editions = await pb_client.get_list(
-            "published_editions",
-            filter=f'user = "{user_id}"',
-            sort="-published_at",
-            per_page=100
-        )
+        user_filter = f'user = "{user_id}"'
+        if limit is None and cursor is None:
+            # Unpaged request: the whole list
+            editions = await pb_client.get_full_list(
+                "published_editions",
+                filter=user_filter,
+                sort="-published_at,-id",
+            )
+        else:
+            # One page of this user's editions (limit + 1 to detect a next page)
+            limit = limit or DEFAULT_LIMIT
+            editions = await pb_client.get_list(
+                "published_editions",
+                filter=combine_filters(user_filter, keyset_filter(cursor)),
+                sort="-published_at,-id",
+                per_page=limit + 1,
+                skip_total=True,
+            )
+            editions, next_cursor = page_records(editions, limit)
+            set_next_cursor(response, next_cursor)
         
         # Parse JSON fields and format dates
         result = []
         for edition in editions:
             # Parse JSON fields
-            grid_layout = edition.get("grid_layout", "{}")
-            stats = edition.get("stats", "{}")
-            
-            if isinstance(grid_layout, str):
-                try:
-                    grid_layout = json.loads(grid_layout)
-                except:
-                    grid_layout = {}
-            
-            if isinstance(stats, str):
-                try:
-                    stats = json.loads(stats)
-                except:
-                    stats = {}
+            grid_layout = decode_record_field(edition, "grid_layout", {})
+            stats = decode_record_field(edition, "stats", {})
             
             result.append(PublishedEditionResponse(
                 id=edition.get("id", ""),
@@ -347,70 +425,8 @@ async def get_leaderboard():
                     detail="Failed to authenticate with PocketBase admin credentials"
                 )
 
-        # Get all published editions, sorted by date descending
-        all_editions = await pb_client.get_list(
-            "published_editions",
-            per_page=500,
-            sort="-date,-published_at",
-        )
-
-        if not all_editions:
-            return []
-
-        # Find the latest date (most recent day with publications)
-        # Since editions are sorted by -date, the first edition has the latest date
-        latest_date = None
-        for edition in all_editions:
-            edition_date = edition.get("date")
-            if edition_date:
-                latest_date = edition_date
-                break  # Since sorted descending, first one is latest
-
-        if not latest_date:
-            return []
-
-        # Filter editions from the latest date
-        latest_day_editions = []
-        for edition in all_editions:
-            if edition.get("date") == latest_date:
-                # Parse stats
-                stats = edition.get("stats", "{}")
-                if isinstance(stats, str):
-                    try:
-                        stats = json.loads(stats)
-                    except Exception:
-                        stats = {}
-
-                cash = stats.get("cash", 0.0) or 0.0
-                readers = stats.get("readers", 0) or 0
-                credibility = stats.get("credibility", 0.0) or 0.0
-
-                # Get user email
-                user_id = edition.get("user", "")
-                user_email = "Unknown"
-                if user_id:
-                    try:
-                        user_record = await pb_client.get_record_by_id("users", user_id)
-                        if user_record:
-                            user_email = user_record.get("email", "Unknown")
-                    except Exception:
-                        pass  # If user not found, use "Unknown"
-
-                latest_day_editions.append({
-                    "edition_id": edition.get("id", ""),
-                    "newspaper_name": edition.get("newspaper_name", "Untitled"),
-                    "user_email": user_email,
-                    "profit": cash,
-                    "readers": readers,
-                    "credibility": credibility,
-                    "date": latest_date,
-                })
-
-        # Sort by profit (cash) descending
-        latest_day_editions.sort(key=lambda x: x["profit"], reverse=True)
-
-        # Get top 5
-        top_5 = latest_day_editions[:5]
+        # Top 5 of the latest day from the incrementally maintained leaderboard
+        top_5 = await leaderboard_service.top(pb_client, 5)
 
         # Format response with ranks
         result = []
@@ -455,103 +471,85 @@ async def get_leaderboard():
         )
 
 
-@router.get("/public/{edition_id}", response_model=PublicEditionResponse)
-async def get_public_edition(edition_id: str):
+def _leaderboard_entry(entry: Dict[str, Any]) -> LeaderboardEntry:
+    return LeaderboardEntry(
+        rank=entry["rank"],
+        edition_id=entry["edition_id"],
+        newspaper_name=entry["newspaper_name"],
+        user_email=entry["user_email"],
+        profit=entry["profit"],
+        readers=entry["readers"],
+        credibility=entry["credibility"],
+        date=format_date_dutch(entry["date"]),
+    )
+
+
+@router.get("/leaderboard/me", response_model=MyRankResponse)
+async def get_my_rank(
+    current_user: dict = Depends(get_current_user),
+    width: int = Query(2, ge=0, le=10),
+):
     """
-    Public read-only endpoint for viewing a published newspaper edition by id.
-    Uses PocketBase admin auth server-side; does NOT require user auth.
+    The current user's position on the latest day's leaderboard (their best edition),
+    with percentile and up to `width` neighbours above and below.
+    
+    Requires authentication.
     """
+    user_id = current_user.get("id")
+    if not user_id:
+        raise HTTPException(
+            status_code=401,
+            detail="User ID not found in authentication token"
+        )
     try:
         pb_client = await get_pb_client()
+        result = await leaderboard_service.user_rank(pb_client, user_id, width)
+        return MyRankResponse(
+            date=format_date_dutch(result["date"]) if result["date"] else None,
+            total=result["total"],
+            rank=result["rank"],
+            percentile=result["percentile"],
+            edition=_leaderboard_entry(result["edition"]) if result["edition"] else None,
+            neighbours=[_leaderboard_entry(e) for e in result["neighbours"]],
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to compute leaderboard rank: {str(e)}")
 
-        edition = await pb_client.get_record_by_id("published_editions", edition_id)
-        if not edition:
-            raise HTTPException(status_code=404, detail="Published edition not found")
-
-        # Parse JSON fields
-        grid_layout = edition.get("grid_layout", {})
-        stats = edition.get("stats", {})
 
-        if isinstance(grid_layout, str):
-            try:
-                grid_layout = json.loads(grid_layout)
-            except Exception:
-                grid_layout = {}
-        if isinstance(stats, str):
-            try:
-                stats = json.loads(stats)
-            except Exception:
-                stats = {}
-
-        placed_items = []
-        if isinstance(grid_layout, dict) and isinstance(grid_layout.get("placedItems"), list):
-            placed_items = grid_layout.get("placedItems", [])
-        elif isinstance(grid_layout, list):
-            placed_items = grid_layout
-
-        published_items: List[PublicPublishedItem] = []
-        for item in placed_items:
-            if not isinstance(item, dict):
-                continue
-
-            is_ad = bool(item.get("isAd"))
-            headline = (item.get("headline") or "").strip()
-            body = (item.get("body") or "").strip()
-            variant = item.get("variant")
-
-            # Fallbacks if headline/body were not stored (older editions)
-            if not headline:
-                headline = "UNTITLED"
-            if not body:
-                body = ""
-
-            # Extract row and position from grid_layout item
-            row = item.get("row")
-            position = item.get("position")
-            
-            if is_ad:
-                published_items.append(PublicPublishedItem(
-                    type="ad",
-                    headline=headline,
-                    body=body,
-                    variant=None,
-                    source=None,
-                    location=None,
-                    row=row,
-                    position=position,
-                ))
-            else:
-                published_items.append(PublicPublishedItem(
-                    type="article",
-                    headline=headline,
-                    body=body,
-                    variant=variant,
-                    source=None,
-                    location=None,
-                    row=row,
-                    position=position,
-                ))
-
-        # Get username from user record
-        username = None
-        user_id = edition.get("user", "")
-        if user_id:
-            try:
-                user_record = await pb_client.get_record_by_id("users", user_id)
-                if user_record:
-                    username = user_record.get("username", None)
-            except Exception:
-                pass  # If user not found or username not available, use None
-
-        return PublicEditionResponse(
-            id=edition.get("id", ""),
-            newspaper_name=edition.get("newspaper_name") or "Untitled Edition",
-            date=format_date_dutch(edition.get("date", "")),
-            published_at=format_datetime_dutch(edition.get("published_at", "")),
-            stats=stats if isinstance(stats, dict) else {},
-            published_items=published_items,
-            username=username,
-        )
+@router.get("/public/{edition_id}", response_model=PublicEditionResponse)
+async def get_public_edition(edition_id: str, request: Request):
+    """
+    Public read-only endpoint for viewing a published newspaper edition by id.
+    Does NOT require user auth. Published editions never change: the rendered edition is
+    served from the render cache (app/services/edition_render_cache.py) with an immutable
+    Cache-Control, and PocketBase (admin auth server-side) is only read the first time.
+    """
+    if not is_edition_id(edition_id):
+        raise HTTPException(status_code=404, detail="Published edition not found")
+    try:
+        body = edition_render_cache.get(edition_id)
+        if body is None:
+            pb_client = await get_pb_client()
+
+            edition = await pb_client.get_record_by_id("published_editions", edition_id)
+            if not edition:
+                raise HTTPException(status_code=404, detail="Published edition not found")
+
+            # Get username from user record
+            username = None
+            user_id = edition.get("user", "")
+            if user_id:
+                try:
+                    user_record = await pb_client.get_record_by_id("users", user_id)
+                    if user_record:
+                        username = user_record.get("username", None)
+                except Exception:
+                    pass  # If user not found or username not available, use None
+
+            body = edition_render_cache.put(edition_id, render_public_edition(edition, username))
+        return json_response(request, body, IMMUTABLE_CACHE_CONTROL)
     except HTTPException:
         raise
     except Exception as e:
@@ -565,9 +563,11 @@ async def get_audience_impact(
     current_user: dict = Depends(get_current_user)
 ):
     """
-    Calculate total audience impact from all published editions.
-    Aggregates audience scores from all articles in published editions,
-    using the variant that was actually published for each article.
+    Total audience impact of all the user's published editions: the faction scores of
+    the variant that was actually published for each placed article, summed.
+    
+    Served from the user's user_stats aggregate (a single record read); it is updated
+    on every publish and built from history on first use.
     
     Requires authentication.
     """
@@ -581,118 +581,80 @@ async def get_audience_impact(
                 detail="User ID not found in authentication token"
             )
         
-        # Initialize faction totals
-        faction_totals = {
-            "elite": 0,
-            "working_class": 0,
-            "patriots": 0,
-            "syndicate": 0,
-            "technocrats": 0,
-            "faithful": 0,
-            "resistance": 0,
-            "doomers": 0,
-        }
+        return await user_stats_service.audience_totals(pb_client, user_id)
         
-        # Get all published editions for this user
-        editions = await pb_client.get_list(
-            "published_editions",
-            filter=f'user="{user_id}"',
-            per_page=500,
-            sort="-published_at",
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to calculate audience impact: {str(e)}"
         )
+
+
+@router.post("/audience-impact/preview", response_model=AudiencePreviewResponse)
+async def preview_audience_impact(
+    request: AudiencePreviewRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Faction impact of a draft layout before publishing: the per-faction delta of the
+    placed variants and the totals the user would have afterwards.
+    
+    Uses the stored per-article score vectors and the user's cached totals, so it is
+    cheap enough to call on every drag. Requires authentication.
+    """
+    try:
+        user_id = current_user.get("id")
+        if not user_id:
+            raise HTTPException(
+                status_code=401,
+                detail="User ID not found in authentication token"
+            )
         
-        # Process each edition
-        for edition in editions:
-            # Parse grid_layout
-            grid_layout = edition.get("grid_layout", {})
-            if isinstance(grid_layout, str):
-                try:
-                    grid_layout = json.loads(grid_layout)
-                except:
-                    grid_layout = {}
-            
-            # Get placed items
-            placed_items = []
-            if isinstance(grid_layout, dict):
-                placed_items = grid_layout.get("placedItems", [])
-            elif isinstance(grid_layout, list):
-                placed_items = grid_layout
-            
-            # Process each placed item
-            for item in placed_items:
-                if not isinstance(item, dict):
-                    continue
-                
-                # Skip ads (they don't have audience scores)
-                if item.get("isAd"):
-                    continue
-                
-                # Get article ID and variant
-                article_id = item.get("articleId")
-                variant = item.get("variant")
-                
-                if not article_id or not variant:
-                    continue
-                
-                # Validate variant
-                if variant not in ["factual", "sensationalist", "propaganda"]:
-                    continue
-                
-                # Fetch the article to get its audience scores
-                try:
-                    article = await pb_client.get_record_by_id("articles", article_id)
-                    if not article:
-                        continue
-                    
-                    # Parse audience_scores
-                    audience_scores = article.get("audience_scores", {})
-                    if isinstance(audience_scores, str):
-                        try:
-                            audience_scores = json.loads(audience_scores)
-                        except:
-                            continue
-                    
-                    if not isinstance(audience_scores, dict):
-                        continue
-                    
-                    # Get scores for the published variant
-                    variant_scores = audience_scores.get(variant, {})
-                    if not isinstance(variant_scores, dict):
-                        continue
-                    
-                    # Add scores to totals
-                    for faction in faction_totals.keys():
-                        score = variant_scores.get(faction, 0)
-                        try:
-                            score = int(score)
-                            faction_totals[faction] += score
-                        except (ValueError, TypeError):
-                            pass
-                            
-                except Exception as e:
-                    # Skip articles that can't be fetched
-                    print(f"Warning: Could not fetch article {article_id}: {e}")
-                    continue
-        
-        return faction_totals
+        placed = placed_articles([item.model_dump() for item in request.placedItems])
+        current, delta = await user_stats_service.preview_audience(await get_pb_client(), user_id, placed)
+        return AudiencePreviewResponse(
+            delta=delta,
+            current=current,
+            totals={faction: current[faction] + delta[faction] for faction in current},
+        )
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to calculate audience impact: {str(e)}"
+            detail=f"Failed to preview audience impact: {str(e)}"
         )
 
 
+def _transaction_date(value: Optional[str]) -> str:
+    """"Today", "Yesterday" or the Dutch date of a transaction timestamp."""
+    if not value:
+        return "Unknown"
+    try:
+        from dateutil import parser as date_parser
+        when = date_parser.parse(value)
+        now = datetime.now(when.tzinfo) if when.tzinfo else datetime.now()
+        days_diff = (now.date() - when.date()).days
+        if days_diff == 0:
+            return "Today"
+        if days_diff == 1:
+            return "Yesterday"
+        return format_date_dutch(when.isoformat())
+    except Exception:
+        return format_date_dutch(value)
+
+
 @router.get("/transactions/recent", response_model=List[TransactionResponse])
 async def get_recent_transactions(
     current_user: dict = Depends(get_current_user),
-    limit: int = 10
+    limit: int = Query(10, ge=1, le=MAX_LIMIT),
 ):
     """
-    Get recent transactions derived from published editions.
-    Each published edition generates revenue based on its stats.cash.
+    Get the user's most recent treasury transactions (newest first) from the ledger:
+    edition revenue/costs and shop purchases (see app/services/ledger_service.py).
     Requires authentication.
     """
     try:
@@ -705,81 +667,18 @@ async def get_recent_transactions(
                 detail="User ID not found in authentication token"
             )
         
-        # Get user's published editions, sorted by date (oldest first to calculate changes correctly)
-        editions = await pb_client.get_list(
-            "published_editions",
-            filter=f'user="{user_id}"',
-            per_page=limit * 2,  # Get more to ensure we have enough after filtering
-            sort="published_at",  # Oldest first
-        )
-        
+        entries = await ledger_service.recent(pb_client, user_id, limit)
         transactions = []
-        previous_cash = None  # Use None to track if this is the first edition
-        
-        # Process from oldest to newest to calculate cash changes correctly
-        for edition in editions:
-            # Parse stats
-            stats = edition.get("stats", "{}")
-            if isinstance(stats, str):
-                try:
-                    stats = json.loads(stats)
-                except:
-                    stats = {}
-            
-            cash = stats.get("cash", 0.0) or 0.0
-            
-            # Format date first (we'll use it regardless)
-            published_at = edition.get("published_at", "")
-            if published_at:
-                try:
-                    from dateutil import parser as date_parser
-                    pub_date = date_parser.parse(published_at)
-                    # Format as "Today", "Yesterday", or date
-                    now = datetime.now(pub_date.tzinfo) if pub_date.tzinfo else datetime.now()
-                    days_diff = (now.date() - pub_date.date()).days
-                    
-                    if days_diff == 0:
-                        date_str = "Today"
-                    elif days_diff == 1:
-                        date_str = "Yesterday"
-                    else:
-                        date_str = format_date_dutch(pub_date.isoformat())
-                except:
-                    date_str = format_date_dutch(published_at) if published_at else "Unknown"
-            else:
-                date_str = "Unknown"
-            
-            # Only calculate change if we have a previous cash value
-            # Skip the first edition's cash as "income" - it's the starting amount
-            if previous_cash is not None:
-                cash_change = cash - previous_cash
-                
-                # Create transaction entry only if there's a meaningful change
-                newspaper_name = edition.get("newspaper_name", "Newspaper")
-                if cash_change > 0:
-                    transactions.append(TransactionResponse(
-                        date=date_str,
-                        description=f"Revenue from {newspaper_name}",
-                        amount=abs(cash_change),
-                        type="income"
-                    ))
-                elif cash_change < 0:
-                    transactions.append(TransactionResponse(
-                        date=date_str,
-                        description=f"Costs for {newspaper_name}",
-                        amount=abs(cash_change),
-                        type="expense"
-                    ))
-                # If cash_change is 0, skip (no transaction)
-            
-            # Update previous_cash for next iteration
-            previous_cash = cash
-        
-        # Reverse transactions to show newest first
-        transactions.reverse()
-        
-        # Limit to requested number
-        return transactions[:limit]
+        for entry in entries:
+            delta = float(entry.get("delta", 0.0) or 0.0)
+            transactions.append(TransactionResponse(
+                date=_transaction_date(entry.get("occurred_at") or entry.get("created")),
+                description=entry.get("description") or "",
+                amount=abs(delta),
+                type="income" if delta > 0 else "expense",
+                balance=entry.get("balance"),
+            ))
+        return transactions
         
     except HTTPException:
         raise
@@ -1,18 +1,28 @@
 """
 Submissions API endpoints for player newspaper layouts.
-Uses ScoringService to compute score/sales/outrage/faction_balance without publishing.
+Uses ScoringService to compute score/sales/outrage/faction_balance without publishing;
+/score-batch scores many candidate layouts in one vectorized pass (BatchScorer) and
+/optimize searches for the best-scoring layouts of a pool of articles and ads.
 """
 from fastapi import APIRouter, HTTPException
-from typing import Dict, Any, List
-from pydantic import BaseModel
+from typing import Dict, Any, List, Optional
+from pydantic import BaseModel, Field
 import os
-import json
 
 from app.services.scoring_service import ScoringService
+from app.services.batch_scoring import VARIANTS, batch_scorer
+from app.services.layout_optimizer import LAYOUT_OPTIMIZER_MAX_BUDGET_MS, layout_optimizer
+from app.services.user_stats_service import fetch_articles
 from lib.pocketbase_client import PocketBaseClient
+from lib.json_codec import decode_record_field
 
 router = APIRouter(prefix="/submissions", tags=["submissions"])
 
+# Candidate layouts accepted per /score-batch request
+SCORE_BATCH_MAX_LAYOUTS = int(os.getenv("SCORE_BATCH_MAX_LAYOUTS", "2000"))
+# Article fields synergy scoring reads
+_SCORING_FIELDS = "id,tags"
+
 # Lazy PocketBase client for fetching articles (admin auth)
 _pb_client: PocketBaseClient | None = None
 
@@ -56,6 +66,45 @@ class SubmitGridResponse(BaseModel):
     faction_balance: Dict[str, float]
 
 
+class ScoreBatchRequest(BaseModel):
+    layouts: List[List[GridPlacement]] = Field(..., min_length=1, max_length=SCORE_BATCH_MAX_LAYOUTS)
+
+
+class LayoutScore(BaseModel):
+    score: float
+    sales: int
+    outrage_meter: float
+    faction_balance: Dict[str, float]
+
+
+class ScoreBatchResponse(BaseModel):
+    results: List[LayoutScore]  # Same order as the request's layouts
+    best_index: Optional[int] = None  # Layout with the highest score (first on ties)
+
+
+class OptimizeLayoutRequest(BaseModel):
+    article_ids: List[str] = Field(..., min_length=1, max_length=64)
+    ad_ids: List[str] = Field(default_factory=list, max_length=16)  # All of them are placed
+    variants: List[str] = Field(default_factory=lambda: list(VARIANTS), min_length=1)  # Allowed variants
+    max_outrage: Optional[float] = Field(None, ge=0.0, le=1.0)
+    top_n: int = Field(5, ge=1, le=20)
+    time_budget_ms: int = Field(1000, ge=50, le=LAYOUT_OPTIMIZER_MAX_BUDGET_MS)
+    seed: Optional[int] = None
+
+
+class OptimizedLayout(LayoutScore):
+    grid: List[GridPlacement]  # 16 cells (4x4)
+    placement_points: float  # Score before synergy penalties
+
+
+class OptimizeLayoutResponse(BaseModel):
+    layouts: List[OptimizedLayout]  # Best first
+    evaluations: int
+    evaluations_per_second: int
+    elapsed_ms: int
+    workers: int
+
+
 def _normalize_grid(grid: list[GridPlacement]) -> List[Dict[str, Any]]:
     """Ensure grid is 16 cells for scoring (pad with empty cells if needed)."""
     raw = []
@@ -86,6 +135,29 @@ def _build_placements(grid: List[Dict[str, Any]]) -> tuple[Dict[str, Dict], Dict
     return article_placements, ad_placements
 
 
+async def _load_articles(article_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Fetch articles (id and decoded tags, in article_ids order) for synergy scoring in
+    batched id queries; unknown ids are skipped.
+    """
+    articles: List[Dict[str, Any]] = []
+    if not article_ids:
+        return articles
+    try:
+        pb = await get_pb_client()
+        by_id = await fetch_articles(pb, article_ids, fields=_SCORING_FIELDS)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load articles: {str(e)}")
+    for aid in dict.fromkeys(article_ids):
+        rec = by_id.get(aid)
+        if rec:
+            tags = decode_record_field(rec, "tags", {})
+            articles.append({**rec, "tags": tags if isinstance(tags, dict) else {}})
+    return articles
+
+
 @router.post("/submit", response_model=SubmitGridResponse)
 async def submit_grid(request: SubmitGridRequest):
     """Submit a player's newspaper grid layout and return scoring results (no publish)."""
@@ -94,25 +166,7 @@ async def submit_grid(request: SubmitGridRequest):
 
     # Fetch articles from PocketBase for synergy/tags
     article_ids = list({p["article_id"] for p in article_placements.values()})
-    articles: List[Dict[str, Any]] = []
-    if article_ids:
-        try:
-            pb = await get_pb_client()
-            for aid in article_ids:
-                rec = await pb.get_record_by_id("articles", aid)
-                if rec:
-                    tags = rec.get("tags")
-                    if isinstance(tags, str):
-                        try:
-                            tags = json.loads(tags) if tags else {}
-                        except Exception:
-                            tags = {}
-                    if not isinstance(tags, dict):
-                        tags = {}
-                    rec["tags"] = tags
-                    articles.append(rec)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to load articles: {str(e)}")
+    articles = await _load_articles(article_ids)
 
     scoring = ScoringService()
     result = scoring.calculate_scores(article_placements, ad_placements, articles, grid)
@@ -125,3 +179,80 @@ async def submit_grid(request: SubmitGridRequest):
         faction_balance=result["faction_balance"],
     )
 
+
+@router.post("/score-batch", response_model=ScoreBatchResponse)
+async def score_batch(request: ScoreBatchRequest):
+    """
+    Score many candidate layouts at once (same results as /submit per layout, no publish).
+    Articles are fetched once for the whole batch.
+    """
+    grids = [_normalize_grid(layout) for layout in request.layouts]
+    article_ids = list({
+        cell["articleId"]
+        for grid in grids
+        for cell in grid
+        if cell.get("articleId") and not (cell.get("isAd") and cell.get("adId"))
+    })
+    articles = await _load_articles(article_ids)
+
+    results = batch_scorer.score(grids, articles)
+    best_index = max(range(len(results)), key=lambda i: results[i]["final_score"]) if results else None
+    return ScoreBatchResponse(
+        results=[
+            LayoutScore(
+                score=r["final_score"],
+                sales=r["sales"],
+                outrage_meter=r["outrage_meter"],
+                faction_balance=r["faction_balance"],
+            )
+            for r in results
+        ],
+        best_index=best_index,
+    )
+
+
+@router.post("/optimize", response_model=OptimizeLayoutResponse)
+async def optimize_layout(request: OptimizeLayoutRequest):
+    """
+    Suggest the best front pages for a pool of articles and ads: the top_n distinct
+    layouts found within the time budget, with their scores (as /submit would return).
+    422 if no layout within max_outrage was found.
+    """
+    unknown = [v for v in request.variants if v not in VARIANTS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown variants: {', '.join(unknown)}")
+    articles = await _load_articles(list(dict.fromkeys(request.article_ids)))
+    if not articles:
+        raise HTTPException(status_code=404, detail="None of the articles were found")
+
+    result = await layout_optimizer.optimize(
+        articles,
+        list(dict.fromkeys(request.ad_ids)),
+        variants=request.variants,
+        max_outrage=request.max_outrage,
+        top_n=request.top_n,
+        budget_ms=request.time_budget_ms,
+        seed=request.seed,
+    )
+    if not result["layouts"]:
+        raise HTTPException(
+            status_code=422,
+            detail=f"No layout of these articles and variants stays within max_outrage {request.max_outrage}",
+        )
+    return OptimizeLayoutResponse(
+        layouts=[
+            OptimizedLayout(
+                grid=layout["grid"],
+                score=layout["final_score"],
+                sales=layout["sales"],
+                outrage_meter=layout["outrage_meter"],
+                faction_balance=layout["faction_balance"],
+                placement_points=layout["placement_points"],
+            )
+            for layout in result["layouts"]
+        ],
+        evaluations=result["evaluations"],
+        evaluations_per_second=result["evaluations_per_second"],
+        elapsed_ms=result["elapsed_ms"],
+        workers=result["workers"],
+    )
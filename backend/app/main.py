@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -40,7 +41,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],  # Explicit methods
     allow_headers=["*"],
-    expose_headers=["*"],
+    # "*" is not honoured for credentialed requests, so list the headers clients read
+    expose_headers=["*", "ETag", "X-Next-Cursor"],
 )
 
 # Include routers
@@ -69,8 +71,23 @@ app.include_router(achievements.router, prefix="/api")
 @app.on_event("startup")
 async def startup():
     print("✓ Using PocketBase as database backend")
+    # The API server is the only writer of the audience store files
+    from app.services.audience_store import audience_store
+    audience_store.open_for_write()
     from app.api import debug_pb
     debug_pb.start_rss_poll_scheduler()
+    from app.services.realtime_service import start_realtime_subscriber
+    await start_realtime_subscriber()
+    from app.api.published_editions import warm_leaderboard
+    asyncio.create_task(warm_leaderboard())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    from app.services.realtime_service import stop_realtime_subscriber
+    await stop_realtime_subscriber()
+    from app.services.layout_optimizer import layout_optimizer
+    layout_optimizer.shutdown()
 
 
 @app.exception_handler(Exception)
@@ -98,7 +115,34 @@ async def root():
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy"}
+    from lib.record_cache import record_cache
+    from lib.resilience import breaker_states
+    from lib.json_codec import memo_stats
+    from lib.token_cache import token_cache
+    from app.utils.responses import response_cache
+    from app.services.feed_service import feed_service
+    from app.services.leaderboard_service import leaderboard_service
+    from app.services.edition_render_cache import edition_render_cache
+    from app.services.layout_optimizer import layout_optimizer
+    from app.services.audience_store import audience_store
+    from app.services.realtime_service import get_subscriber
+    subscriber = get_subscriber()
+    breakers = breaker_states()
+    degraded = any(b["state"] != "closed" for b in breakers.values())
+    return {
+        "status": "degraded" if degraded else "healthy",
+        "breakers": breakers,
+        "json_codec": memo_stats(),
+        "feed": feed_service.status(),
+        "leaderboard": leaderboard_service.status(),
+        "edition_renders": edition_render_cache.status(),
+        "layout_optimizer": layout_optimizer.status(),
+        "audience_store": audience_store.status(),
+        "record_cache": record_cache.stats(),
+        "auth_cache": token_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "realtime": subscriber.status() if subscriber else {"connected": False, "enabled": False},
+    }
 
 
 # Publish endpoint models
@@ -0,0 +1,587 @@
+"""
+Achievement Engine - Event-driven, incremental achievement evaluation.
+
+Each achievement is a rule that declares the events it depends on and a predicate over
+small, incrementally maintained state. The state that needs history (cash records,
+daily streaks, layout and coverage counts, the latest edition) is folded in once per
+published edition by apply_edition() and stored with the user's aggregates in
+user_stats; game state (treasury, readers, credibility, upgrades) is the users record
+itself. An event therefore evaluates only the rules subscribed to it, each in O(1),
+instead of rescanning the user's whole edition history.
+
+Events:
+- edition_published: a new edition (also changes the game state)
+- game_state_changed: treasury / readers / credibility changed
+- upgrade_purchased: a shop purchase (also changes the game state)
+
+The state is a compact snapshot (stored in user_stats.snapshot): counters, streaks
+with their last dates, the tag and sentiment sets, and a fixed-size bitmap of the
+locations covered instead of the list of every location. It is versioned with the
+user_stats record (STATS_VERSION) and rebuilt from the edition history when the
+version changes. The same snapshot drives the progress bars of /achievements/all.
+"""
+import base64
+import hashlib
+import os
+import sys
+import time
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Add parent directory to path to import lib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lib.pocketbase_client import PocketBaseClient
+from lib.json_codec import decode_field, decode_record_field
+from app.services.realtime_service import add_listener
+
+
+EDITION_PUBLISHED = "edition_published"
+GAME_STATE_CHANGED = "game_state_changed"
+UPGRADE_PURCHASED = "upgrade_purchased"
+EVENTS = (EDITION_PUBLISHED, GAME_STATE_CHANGED, UPGRADE_PURCHASED)
+
+# Event names sent by the frontend (POST /achievements/check)
+EVENT_ALIASES = {
+    "publish": EDITION_PUBLISHED,
+    "shop_purchase": UPGRADE_PURCHASED,
+    "pack_open": UPGRADE_PURCHASED,
+}
+
+# Events that imply others: publishing and buying both change the game state
+_IMPLIED = {
+    EDITION_PUBLISHED: (GAME_STATE_CHANGED,),
+    UPGRADE_PURCHASED: (GAME_STATE_CHANGED,),
+}
+
+# Seconds the achievement definitions are cached (also dropped on realtime changes)
+DEFINITIONS_MAX_AGE = 300.0
+
+# Shop item costs for computing total spent
+SHOP_COSTS = {"interns": 500, "slander_license": 1000, "coffee_machine": 200}
+
+_VARIANTS = ("factual", "sensationalist", "propaganda")
+
+# Size of the covered-locations bitmap (512 bytes). Its popcount is the number of
+# distinct locations; a hash collision can only undercount (never unlock early), and
+# collisions are rare at the 100 locations the achievements ask for
+_LOCATION_BITS = 4096
+# Placements of one location for local_focus (per-location counts are only kept
+# until it is reached)
+_LOCAL_FOCUS = 20
+
+
+# ---------------------------------------------------------------------------
+# Incremental state (folded per published edition)
+# ---------------------------------------------------------------------------
+
+def _empty_streaks() -> Dict[str, Any]:
+    return {
+        "last": "",
+        "publish": 0, "publish_max": 0,
+        "profit": 0, "profit_max": 0,
+        "reader": 0, "reader_max": 0,
+        "cred": 0, "cred_max": 0,
+        "readers": 0,
+        "had_zero_cred": False,
+    }
+
+
+def empty_state() -> Dict[str, Any]:
+    return {
+        # Per-edition cash records
+        "cash": {
+            "max": 0.0,
+            "total": 0.0,
+            "with_ads": 0.0,
+            "negative": 0.0,
+            "non_negative": 0,
+            "break_even": False,
+            "perfect_day": False,
+        },
+        # Daily streaks: `base` holds the streaks up to the day before `day`, `best` the
+        # best edition (highest cash) of `day`, which can still change until the next day
+        "days": {"count": 0, "day": "", "best": None, "base": _empty_streaks()},
+        "layout": {"top": 0, "middle": 0, "bottom": 0, "perfect_grids": 0, "variants": {v: 0 for v in _VARIANTS}},
+        # locations: base64 bitmap of covered locations (see _LOCATION_BITS)
+        "coverage": {"locations": "", "location_counts": {}, "local_focus": False, "tags": [], "sentiments": []},
+        # Summary of the most recent edition (publish-event rules)
+        "last": None,
+    }
+
+
+def _fold_day(streaks: Dict[str, Any], day: str, best: Dict[str, Any]) -> Dict[str, Any]:
+    """Streaks after adding `day` (days are folded in ascending order)."""
+    s = dict(streaks)
+    consecutive = False
+    if s["last"]:
+        try:
+            consecutive = (date.fromisoformat(day) - date.fromisoformat(s["last"])).days == 1
+        except ValueError:
+            pass
+    s["publish"] = s["publish"] + 1 if consecutive else 1
+    s["publish_max"] = max(s["publish_max"], s["publish"])
+    s["profit"] = s["profit"] + 1 if best["cash"] > 0 else 0
+    s["profit_max"] = max(s["profit_max"], s["profit"])
+    s["reader"] = s["reader"] + 1 if best["readers"] > s["readers"] > 0 else 0
+    s["reader_max"] = max(s["reader_max"], s["reader"])
+    s["readers"] = best["readers"]
+    s["cred"] = s["cred"] + 1 if best["credibility"] >= 60 else 0
+    s["cred_max"] = max(s["cred_max"], s["cred"])
+    s["had_zero_cred"] = s["had_zero_cred"] or best["credibility"] <= 0
+    s["last"] = day
+    return s
+
+
+def current_streaks(state: Dict[str, Any]) -> Dict[str, Any]:
+    days = state["days"]
+    if not days["day"] or not days["best"]:
+        return days["base"]
+    return _fold_day(days["base"], days["day"], days["best"])
+
+
+def _location_bit(location: str) -> int:
+    digest = hashlib.blake2b(location.lower().encode(), digest_size=4).digest()
+    return int.from_bytes(digest, "big") % _LOCATION_BITS
+
+
+def _add_location(coverage: Dict[str, Any], location: str) -> None:
+    bitmap = bytearray(base64.b64decode(coverage["locations"])) if coverage["locations"] else bytearray(_LOCATION_BITS // 8)
+    bit = _location_bit(location)
+    bitmap[bit // 8] |= 1 << (bit % 8)
+    coverage["locations"] = base64.b64encode(bytes(bitmap)).decode()
+    if not coverage["local_focus"]:
+        counts = coverage["location_counts"]
+        counts[location] = counts.get(location, 0) + 1
+        if counts[location] >= _LOCAL_FOCUS:
+            coverage["local_focus"] = True
+            coverage["location_counts"] = {}
+
+
+def distinct_locations(state: Dict[str, Any]) -> int:
+    """Number of distinct locations covered (bits set in the bitmap)."""
+    encoded = state["coverage"]["locations"]
+    if not encoded:
+        return 0
+    return int.from_bytes(base64.b64decode(encoded), "big").bit_count()
+
+
+def _placed_items(grid_layout: Any) -> List[Dict[str, Any]]:
+    grid_layout = decode_field(grid_layout, {})
+    if isinstance(grid_layout, dict):
+        items = grid_layout.get("placedItems", [])
+    elif isinstance(grid_layout, list):
+        items = grid_layout
+    else:
+        items = []
+    return [item for item in items if isinstance(item, dict)]
+
+
+def _edition_summary(placed: List[Dict[str, Any]], stats: Dict[str, Any]) -> Dict[str, Any]:
+    articles = [p for p in placed if not p.get("isAd")]
+    variants = {p.get("variant") for p in articles if p.get("variant")}
+    rows: Dict[int, List[str]] = {}
+    titles: Dict[str, Set[str]] = {}
+    for p in articles:
+        rows.setdefault(int(p.get("row") or 1), []).append(p.get("variant", ""))
+        titles.setdefault(p.get("headline") or p.get("articleId") or "", set()).add(p.get("variant", ""))
+    return {
+        "placed": len(placed),
+        "articles": len(articles),
+        "ads": len(placed) - len(articles),
+        "variants": sorted(variants),
+        "same_variant_row": any(len(vs) >= 2 and len(set(vs)) == 1 for vs in rows.values()),
+        "contradiction": any("factual" in vs and "propaganda" in vs for vs in titles.values()),
+        "cash": float(stats.get("cash", 0) or 0),
+        "readers": int(stats.get("readers", 0) or 0),
+        "credibility": float(stats.get("credibility", 0) or 0),
+    }
+
+
+def apply_edition(state: Dict[str, Any], edition: Dict[str, Any], articles: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Fold a published edition into the state (in place). `articles` maps the placed
+    article ids to records with location_city, tags and sentiment.
+    """
+    stats = decode_record_field(edition, "stats", {})
+    if not isinstance(stats, dict):
+        stats = {}
+    placed = _placed_items(edition.get("grid_layout"))
+    last = _edition_summary(placed, stats)
+    state["last"] = last
+    cash, readers, credibility = last["cash"], last["readers"], last["credibility"]
+
+    c = state["cash"]
+    c["max"] = max(c["max"], cash)
+    c["total"] += cash
+    if last["ads"]:
+        c["with_ads"] += cash
+    if cash >= 0:
+        c["non_negative"] += 1
+    else:
+        c["negative"] += cash
+    c["break_even"] = c["break_even"] or (cash == 0 and last["placed"] >= 1)
+    c["perfect_day"] = c["perfect_day"] or (cash >= 5000 and readers >= 50000 and credibility >= 90)
+
+    day = str(edition.get("date") or edition.get("published_at") or "")[:10]
+    days = state["days"]
+    best = {"cash": cash, "readers": readers, "credibility": credibility}
+    if day and day == days["day"]:
+        if cash > days["best"]["cash"]:
+            days["best"] = best
+    elif day and day > days["day"]:
+        days["base"] = current_streaks(state)
+        days["day"] = day
+        days["best"] = best
+        days["count"] += 1
+
+    layout = state["layout"]
+    if len(placed) >= 6:
+        layout["perfect_grids"] += 1
+    coverage = state["coverage"]
+    tags = set(coverage["tags"])
+    sentiments = set(coverage["sentiments"])
+    for item in placed:
+        if item.get("isAd"):
+            continue
+        row = item.get("row") or 1
+        layout["top" if row == 1 else "middle" if row == 2 else "bottom"] += 1
+        variant = item.get("variant")
+        if variant in layout["variants"]:
+            layout["variants"][variant] += 1
+        article = articles.get(item.get("articleId") or "")
+        if not article:
+            continue
+        location = (article.get("location_city") or "").strip()
+        if location and location != "Unknown":
+            _add_location(coverage, location)
+        article_tags = decode_record_field(article, "tags", [])
+        sentiment = ""
+        if isinstance(article_tags, dict):
+            # Ingestion stores {"topic_tags": [...], "sentiment": "..."}
+            sentiment = article_tags.get("sentiment") or ""
+            article_tags = article_tags.get("topic_tags") or []
+        if isinstance(article_tags, list):
+            tags.update(str(t) for t in article_tags)
+        sentiment = article.get("sentiment") or sentiment
+        if sentiment:
+            sentiments.add(str(sentiment).lower())
+    coverage["tags"] = sorted(tags)
+    coverage["sentiments"] = sorted(sentiments)
+
+
+def stored_state(value: Any) -> Dict[str, Any]:
+    """State from a user_stats field, with defaults for missing parts."""
+    state = empty_state()
+    value = decode_field(value, {})
+    if isinstance(value, dict):
+        for key, default in state.items():
+            stored = value.get(key)
+            if isinstance(default, dict) and isinstance(stored, dict):
+                state[key] = dict(default, **stored)
+            elif stored is not None:
+                state[key] = stored
+    return state
+
+
+# ---------------------------------------------------------------------------
+# Rules
+# ---------------------------------------------------------------------------
+
+class RuleContext:
+    """Inputs of a rule evaluation: incremental state, aggregates and game state."""
+
+    __slots__ = ("state", "streaks", "editions", "factions", "game", "unlocked", "event_data")
+
+    def __init__(
+        self,
+        state: Dict[str, Any],
+        editions: int,
+        factions: Dict[str, int],
+        game: Dict[str, Any],
+        unlocked: Set[str],
+        event_data: Optional[Dict[str, Any]] = None,
+    ):
+        self.state = state
+        self.streaks = current_streaks(state)
+        self.editions = editions
+        self.factions = factions
+        self.game = game
+        self.unlocked = unlocked
+        self.event_data = event_data or {}
+
+    @property
+    def treasury(self) -> float:
+        return float(self.game.get("treasury", 0) or 0)
+
+    @property
+    def readers(self) -> int:
+        return int(self.game.get("readers", 0) or 0)
+
+    @property
+    def credibility(self) -> float:
+        return float(self.game.get("credibility", 0) or 0)
+
+    @property
+    def purchased(self) -> List[str]:
+        return self.game.get("purchased_upgrades") or []
+
+
+class Rule:
+    __slots__ = ("achievement_id", "events", "check")
+
+    def __init__(self, achievement_id: str, events: Tuple[str, ...], check: Callable[[RuleContext], bool]):
+        self.achievement_id = achievement_id
+        self.events = events
+        self.check = check
+
+
+RULES: Dict[str, Rule] = {}
+# Rules per event, in declaration order
+_BY_EVENT: Dict[str, List[Rule]] = {event: [] for event in EVENTS}
+# Rules that depend on other unlocks; evaluated last, on every event
+_META: List[Rule] = []
+
+
+def rule(achievement_id: str, *events: str, check: Callable[[RuleContext], bool]) -> None:
+    r = Rule(achievement_id, events, check)
+    RULES[achievement_id] = r
+    for event in events:
+        _BY_EVENT[event].append(r)
+
+
+# Achievements with a numeric target: achievement_id -> (target, current value)
+_PROGRESS: Dict[str, Tuple[float, Callable[[RuleContext], float]]] = {}
+
+
+def _threshold(achievement_ids: Iterable[Tuple[str, float]], event: str, value: Callable[[RuleContext], float]) -> None:
+    """Rules met once value(ctx) reaches each target; they also report progress."""
+    for achievement_id, target in achievement_ids:
+        rule(achievement_id, event, check=lambda ctx, t=target: value(ctx) >= t)
+        _PROGRESS[achievement_id] = (target, value)
+
+
+def progress(achievement_id: str, ctx: RuleContext) -> Optional[float]:
+    """Progress 0.0..1.0 towards a numeric achievement, None for yes/no achievements."""
+    if achievement_id not in _PROGRESS:
+        return None
+    target, value = _PROGRESS[achievement_id]
+    try:
+        return max(0.0, min(1.0, float(value(ctx)) / float(target)))
+    except Exception:
+        return None
+
+
+# Publishing milestones
+_threshold(
+    [("first_edition", 1), ("ten_editions", 10), ("fifty_editions", 50), ("hundred_editions", 100),
+     ("five_hundred_editions", 500), ("thousand_editions", 1000)],
+    EDITION_PUBLISHED, lambda ctx: ctx.editions,
+)
+
+# Game state thresholds
+_threshold(
+    [("first_dollar", 1), ("hundred_dollars", 100), ("thousand_dollars", 1000), ("ten_thousand", 10000),
+     ("hundred_thousand", 100000), ("millionaire", 1000000), ("treasury_tycoon", 5_000_000)],
+    GAME_STATE_CHANGED, lambda ctx: ctx.treasury,
+)
+_threshold(
+    [("first_readers", 1000), ("ten_thousand_readers", 10000), ("hundred_thousand_readers", 100000),
+     ("million_readers", 1000000), ("ten_million_readers", 10_000_000)],
+    GAME_STATE_CHANGED, lambda ctx: ctx.readers,
+)
+_threshold(
+    [("credible_source", 50), ("highly_credible", 80), ("perfect_credibility", 100)],
+    GAME_STATE_CHANGED, lambda ctx: ctx.credibility,
+)
+rule("tabloid_trash", GAME_STATE_CHANGED, check=lambda ctx: ctx.credibility <= 0)
+rule("credibility_comeback", GAME_STATE_CHANGED,
+     check=lambda ctx: ctx.streaks["had_zero_cred"] and ctx.credibility >= 50)
+
+# Shop
+_threshold([("first_purchase", 1), ("upgrade_collector", 10), ("shop_regular", 20)], UPGRADE_PURCHASED,
+           lambda ctx: len(ctx.purchased))
+rule("interns_buyer", UPGRADE_PURCHASED, check=lambda ctx: "interns" in ctx.purchased)
+rule("slander_license", UPGRADE_PURCHASED, check=lambda ctx: "slander_license" in ctx.purchased)
+rule("coffee_machine", UPGRADE_PURCHASED, check=lambda ctx: "coffee_machine" in ctx.purchased)
+rule("all_upgrades", UPGRADE_PURCHASED, check=lambda ctx: set(ctx.purchased) >= set(SHOP_COSTS))
+rule("expensive_taste", UPGRADE_PURCHASED, check=lambda ctx: "slander_license" in ctx.purchased)
+rule("pack_opener", UPGRADE_PURCHASED,
+     check=lambda ctx: int(ctx.event_data.get("packs_opened", 0) or 0) >= 1 or len(ctx.purchased) >= 1)
+rule("pack_collector", UPGRADE_PURCHASED,
+     check=lambda ctx: int(ctx.event_data.get("packs_opened", 0) or 0) >= 10 or len(ctx.purchased) >= 10)
+_threshold([("big_spender", 10000)], UPGRADE_PURCHASED, lambda ctx: sum(SHOP_COSTS.get(x, 0) for x in ctx.purchased))
+
+# Edition cash records
+rule("profitable_day", EDITION_PUBLISHED, check=lambda ctx: ctx.state["cash"]["max"] >= 1000)
+rule("massive_profit", EDITION_PUBLISHED, check=lambda ctx: ctx.state["cash"]["max"] >= 10000)
+rule("break_even", EDITION_PUBLISHED, check=lambda ctx: ctx.state["cash"]["break_even"])
+rule("ad_revenue", EDITION_PUBLISHED, check=lambda ctx: ctx.state["cash"]["with_ads"] >= 5000)
+rule("bonus_hunter", EDITION_PUBLISHED,
+     check=lambda ctx: ctx.state["cash"]["total"] >= 2000 and ctx.editions >= 5)
+rule("penalty_free", EDITION_PUBLISHED,
+     check=lambda ctx: ctx.state["cash"]["non_negative"] >= 10 and ctx.editions >= 10)
+rule("penalty_magnet", EDITION_PUBLISHED, check=lambda ctx: abs(ctx.state["cash"]["negative"]) >= 5000)
+rule("perfect_day", EDITION_PUBLISHED, check=lambda ctx: ctx.state["cash"]["perfect_day"])
+
+
+# Day over day readers (best edition of the last two publishing days)
+def _reader_change(ctx: RuleContext) -> int:
+    days = ctx.state["days"]
+    if days["count"] < 2 or not days["best"]:
+        return 0
+    return days["best"]["readers"] - days["base"]["readers"]
+
+
+rule("reader_spike", EDITION_PUBLISHED, check=lambda ctx: _reader_change(ctx) >= 50000)
+rule("reader_loss", EDITION_PUBLISHED, check=lambda ctx: -_reader_change(ctx) >= 20000)
+
+# Streaks
+_threshold(
+    [("daily_publisher", 3), ("week_warrior", 7), ("no_break", 14), ("month_marathon", 30),
+     ("streak_master", 50), ("hundred_day_streak", 100)],
+    EDITION_PUBLISHED, lambda ctx: ctx.streaks["publish_max"],
+)
+_threshold([("consistent_earner", 10)], EDITION_PUBLISHED, lambda ctx: ctx.streaks["profit_max"])
+_threshold([("reader_growth_streak", 5), ("steady_growth", 7)], EDITION_PUBLISHED,
+           lambda ctx: ctx.streaks["reader_max"])
+_threshold([("credibility_streak", 14)], EDITION_PUBLISHED, lambda ctx: ctx.streaks["cred_max"])
+rule("perfect_week", EDITION_PUBLISHED,
+     check=lambda ctx: ctx.streaks["publish_max"] >= 7 and ctx.streaks["profit_max"] >= 7)
+
+# Factions (audience totals maintained in user_stats)
+for _achievement_id, _faction in (
+    ("elite_favorite", "elite"), ("working_class_hero", "working_class"), ("patriot_ally", "patriots"),
+    ("syndicate_member", "syndicate"), ("technocrat_friend", "technocrats"), ("faithful_supporter", "faithful"),
+    ("resistance_agent", "resistance"), ("doomer_ally", "doomers"),
+):
+    rule(_achievement_id, EDITION_PUBLISHED, check=lambda ctx, f=_faction: ctx.factions.get(f, 0) >= 10)
+for _achievement_id, _faction in (("elite_enemy", "elite"), ("working_class_enemy", "working_class")):
+    rule(_achievement_id, EDITION_PUBLISHED, check=lambda ctx, f=_faction: ctx.factions.get(f, 0) <= -10)
+rule("faction_pariah", EDITION_PUBLISHED, check=lambda ctx: any(v <= -10 for v in ctx.factions.values()))
+rule("universal_hate", EDITION_PUBLISHED,
+     check=lambda ctx: len(ctx.factions) >= 8 and all(v < 0 for v in ctx.factions.values()))
+rule("universal_love", EDITION_PUBLISHED,
+     check=lambda ctx: len(ctx.factions) >= 8 and all(v > 0 for v in ctx.factions.values()))
+rule("faction_diversity", EDITION_PUBLISHED, check=lambda ctx: sum(v > 0 for v in ctx.factions.values()) >= 4)
+rule("faction_master", EDITION_PUBLISHED, check=lambda ctx: sum(v >= 10 for v in ctx.factions.values()) >= 4)
+rule("faction_extremist", EDITION_PUBLISHED,
+     check=lambda ctx: bool(ctx.factions) and max(ctx.factions.values()) >= 8 and min(ctx.factions.values()) <= -8)
+rule("neutral_ground", EDITION_PUBLISHED,
+     check=lambda ctx: all(-2 <= v <= 2 for v in ctx.factions.values()) and ctx.state["days"]["count"] >= 10)
+rule("balanced_factions", EDITION_PUBLISHED,
+     check=lambda ctx: bool(ctx.factions) and max(ctx.factions.values()) - min(ctx.factions.values()) <= 5
+     and ctx.state["days"]["count"] >= 5)
+# faction_swing needs historical tracking (never unlocked, as before)
+
+
+# Layout of the edition just published
+def _last(ctx: RuleContext) -> Dict[str, Any]:
+    return ctx.state.get("last") or {"placed": 0, "articles": 0, "ads": 0, "variants": [],
+                                     "same_variant_row": False, "contradiction": False,
+                                     "cash": 0.0, "readers": 0, "credibility": 0.0}
+
+
+rule("perfect_grid", EDITION_PUBLISHED, check=lambda ctx: _last(ctx)["placed"] >= 6)
+rule("single_article", EDITION_PUBLISHED,
+     check=lambda ctx: _last(ctx)["articles"] == 1 and _last(ctx)["placed"] == 1)
+rule("articles_only", EDITION_PUBLISHED,
+     check=lambda ctx: _last(ctx)["articles"] >= 1 and _last(ctx)["ads"] == 0)
+rule("ads_only", EDITION_PUBLISHED, check=lambda ctx: _last(ctx)["ads"] >= 1 and _last(ctx)["articles"] == 0)
+for _variant in _VARIANTS:
+    rule(f"all_{_variant}", EDITION_PUBLISHED, check=lambda ctx, v=_variant: _last(ctx)["variants"] == [v])
+rule("mixed_variants", EDITION_PUBLISHED, check=lambda ctx: set(_last(ctx)["variants"]) >= set(_VARIANTS))
+rule("same_variant_row", EDITION_PUBLISHED, check=lambda ctx: _last(ctx)["same_variant_row"])
+rule("balanced_metrics", EDITION_PUBLISHED,
+     check=lambda ctx: _last(ctx)["credibility"] >= 50 and _last(ctx)["readers"] >= 50000)
+rule("jackpot", EDITION_PUBLISHED,
+     check=lambda ctx: _last(ctx)["cash"] >= 10000 and _last(ctx)["readers"] >= 100000)
+rule("contradiction", EDITION_PUBLISHED, check=lambda ctx: _last(ctx)["contradiction"])
+
+# Layout and coverage over all editions
+for _achievement_id, _key in (("top_spot", "top"), ("middle_row", "middle"), ("bottom_row", "bottom")):
+    _threshold([(_achievement_id, 100)], EDITION_PUBLISHED, lambda ctx, k=_key: ctx.state["layout"][k])
+_threshold([("grid_artist", 50)], EDITION_PUBLISHED, lambda ctx: ctx.state["layout"]["perfect_grids"])
+rule("variant_master", EDITION_PUBLISHED,
+     check=lambda ctx: all(ctx.state["layout"]["variants"].get(v, 0) >= 100 for v in _VARIANTS))
+_threshold([("global_coverage", 50), ("location_master", 100)], EDITION_PUBLISHED,
+           lambda ctx: distinct_locations(ctx.state))
+rule("local_focus", EDITION_PUBLISHED, check=lambda ctx: ctx.state["coverage"]["local_focus"])
+_threshold([("tag_collector", 50)], EDITION_PUBLISHED, lambda ctx: len(ctx.state["coverage"]["tags"]))
+_threshold([("sentiment_analyst", 3)], EDITION_PUBLISHED, lambda ctx: len(ctx.state["coverage"]["sentiments"]))
+
+# Completionist & Master Editor (depend on other unlocks)
+for _achievement_id, _count in (("completionist", 49), ("master_editor", 98)):
+    _META.append(Rule(_achievement_id, EVENTS, lambda ctx, n=_count: len(ctx.unlocked) >= n))
+    RULES[_achievement_id] = _META[-1]
+
+
+def normalize_event(event_type: Optional[str]) -> Optional[str]:
+    """Engine event for a frontend event name; None means "evaluate every rule"."""
+    if not event_type:
+        return None
+    event = EVENT_ALIASES.get(event_type, event_type)
+    return event if event in EVENTS else None
+
+
+def rules_for(event: Optional[str]) -> List[Rule]:
+    """Rules affected by an event (including implied events), meta rules last."""
+    if event is None:
+        return [r for r in RULES.values() if r not in _META] + _META
+    events = (event,) + _IMPLIED.get(event, ())
+    seen: Set[str] = set()
+    rules: List[Rule] = []
+    for e in events:
+        for r in _BY_EVENT[e]:
+            if r.achievement_id not in seen:
+                seen.add(r.achievement_id)
+                rules.append(r)
+    return rules + _META
+
+
+def evaluate(event: Optional[str], ctx: RuleContext, defined: Set[str]) -> List[str]:
+    """
+    Ids of achievements newly met by the event. Only rules subscribed to the event run;
+    already unlocked and undefined achievements are skipped. ctx.unlocked is extended
+    so meta rules see the unlocks of this evaluation.
+    """
+    newly: List[str] = []
+    for r in rules_for(event):
+        if r.achievement_id in ctx.unlocked or r.achievement_id not in defined:
+            continue
+        try:
+            met = r.check(ctx)
+        except Exception as e:
+            print(f"[Achievements] Rule {r.achievement_id} failed: {e}")
+            continue
+        if met:
+            ctx.unlocked.add(r.achievement_id)
+            newly.append(r.achievement_id)
+    return newly
+
+
+class AchievementDefinitions:
+    """Cached achievements collection (definitions rarely change)."""
+
+    def __init__(self):
+        self._records: Optional[List[Dict[str, Any]]] = None
+        self._loaded_at = 0.0
+
+    def invalidate(self) -> None:
+        self._records = None
+
+    async def get(self, pb: PocketBaseClient) -> List[Dict[str, Any]]:
+        if self._records is None or time.monotonic() - self._loaded_at > DEFINITIONS_MAX_AGE:
+            self._records = await pb.get_full_list("achievements", raise_on_error=True)
+            self._loaded_at = time.monotonic()
+        return self._records
+
+
+achievement_definitions = AchievementDefinitions()
+
+
+def _on_achievement_change(action: str, record: Dict[str, Any]) -> None:
+    achievement_definitions.invalidate()
+
+
+add_listener("achievements", _on_achievement_change)
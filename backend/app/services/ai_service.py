@@ -2,11 +2,32 @@
 AI Service for interacting with Ollama to generate article variants and extract metadata.
 """
 import os
+import sys
 import ollama
+import httpx
 from typing import Dict, Any, List
 import json
 import re
 
+# Add parent directory to path to import lib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lib.resilience import get_breaker, call_sync
+
+
+# Ollama calls are slow; once it is unreachable, fail fast so ingestion falls back immediately
+_ollama_breaker = get_breaker("ollama", failure_threshold=3, reset_timeout=60.0)
+
+
+def _ollama_chat(**kwargs):
+    """ollama.chat through the breaker; connection failures are retried once with backoff."""
+    return call_sync(
+        _ollama_breaker,
+        lambda: ollama.chat(**kwargs),
+        retries=1,
+        retry_on=(ConnectionError, httpx.TransportError),
+    )
+
 
 class AIService:
     """Service for processing articles through Ollama LLM."""
@@ -62,7 +83,7 @@ Original text:
 Simplified text:"""
         
         try:
-            response = ollama.chat(
+            response = _ollama_chat(
                 model=model,
                 messages=[
                     {
@@ -161,7 +182,7 @@ Article Content: {content}
 Primary location:"""
         
         try:
-            response = ollama.chat(
+            response = _ollama_chat(
                 model=model,
                 messages=[
                     {
@@ -232,7 +253,7 @@ Article Content: {content}
 Primary country/region:"""
         
         try:
-            response = ollama.chat(
+            response = _ollama_chat(
                 model=model,
                 messages=[
                     {
@@ -432,7 +453,7 @@ Respond ONLY with valid JSON. The JSON object MUST have exactly these keys:
 }}"""
         
         try:
-            response = ollama.chat(
+            response = _ollama_chat(
                 model=model,
                 messages=[
                     {
@@ -873,7 +894,7 @@ Article Content: {content}
 Country Code:"""
         
         try:
-            response = ollama.chat(
+            response = _ollama_chat(
                 model=model,
                 messages=[
                     {
@@ -925,7 +946,9 @@ Country Code:"""
             model = AIService.DEFAULT_MODEL
         
         try:
-            models_response = ollama.list()
+            models_response = call_sync(
+                _ollama_breaker, ollama.list, retry_on=(ConnectionError, httpx.TransportError)
+            )
             # Handle different response formats
             if isinstance(models_response, dict):
                 models_list = models_response.get("models", [])
@@ -0,0 +1,278 @@
+"""
+Audience Store - Every article's faction scores as one contiguous int8 array.
+
+Articles carry audience_scores as a JSON string ({variant: {faction: -10..10}}), which
+used to be decoded per article wherever faction totals were needed. The store keeps
+them as an int8 array of shape [articles, 3 variants, 8 factions] plus an id -> row
+index, so the faction projection of a draft layout or a whole edition history is one
+gather-and-sum over (row, variant) pairs.
+
+The array is memory-mapped from AUDIENCE_STORE_DIR/scores.npy (rows in
+AUDIENCE_STORE_DIR/ids.txt, one article id per line, append-only) and survives
+restarts. Rows are added by the realtime listener (covers ingestion in any process);
+articles the store has not seen yet are added from records callers already fetched
+(see project()).
+
+The files have a single writer: the API server opens them at startup
+(open_for_write(), under an exclusive lock on AUDIENCE_STORE_DIR/lock). Every other
+process that imports this module (news_worker.py, ingestion scripts) - and a second
+server process while the lock is held - keeps its store in memory only, as does a
+server whose directory is not writable.
+"""
+import os
+import sys
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks
+    fcntl = None
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Add parent directory to path to import lib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lib.json_codec import decode_record_field
+from app.services.realtime_service import add_listener
+
+
+FACTIONS = ("elite", "working_class", "patriots", "syndicate", "technocrats", "faithful", "resistance", "doomers")
+VARIANTS = ("factual", "sensationalist", "propaganda")
+_VARIANT_INDEX = {variant: i for i, variant in enumerate(VARIANTS)}
+
+AUDIENCE_STORE_DIR = os.getenv(
+    "AUDIENCE_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "cache", "audience"),
+)
+# Rows allocated up front; the array doubles when full
+_INITIAL_CAPACITY = 1024
+
+
+def encode_scores(audience_scores: Any) -> np.ndarray:
+    """[variant, faction] int8 matrix of an audience_scores value (missing / invalid -> 0)."""
+    matrix = np.zeros((len(VARIANTS), len(FACTIONS)), dtype=np.int8)
+    if not isinstance(audience_scores, dict):
+        return matrix
+    for v, variant in enumerate(VARIANTS):
+        variant_scores = audience_scores.get(variant)
+        if not isinstance(variant_scores, dict):
+            continue
+        for f, faction in enumerate(FACTIONS):
+            try:
+                matrix[v, f] = max(-128, min(127, int(variant_scores.get(faction, 0))))
+            except (ValueError, TypeError):
+                pass
+    return matrix
+
+
+def faction_dict(vector: Iterable[int]) -> Dict[str, int]:
+    return {faction: int(value) for faction, value in zip(FACTIONS, vector)}
+
+
+class AudienceStore:
+    def __init__(self, directory: Optional[str] = AUDIENCE_STORE_DIR):
+        """In memory until open_for_write() (only in the process that owns `directory`)."""
+        self.directory = directory
+        self.row_of: Dict[str, int] = {}
+        self.ids: List[str] = []
+        self.scores = np.zeros((_INITIAL_CAPACITY, len(VARIANTS), len(FACTIONS)), dtype=np.int8)
+        self.persistent = False
+        self._lock_file = None
+
+    def _paths(self) -> Tuple[str, str]:
+        return os.path.join(self.directory, "scores.npy"), os.path.join(self.directory, "ids.txt")
+
+    def open_for_write(self) -> bool:
+        """
+        Back the store with the files in `directory`, as their only writer (call from
+        the API server's startup). Rows added in memory so far are carried over.
+        Returns False (and stays in memory) if another process holds the directory or
+        it can't be opened.
+        """
+        if self.persistent:
+            return True
+        if not self.directory or not self._lock():
+            return False
+        pending = [(article_id, self.scores[row].copy()) for row, article_id in enumerate(self.ids)]
+        self._open()
+        if not self.persistent:
+            self._unlock()
+            return False
+        if pending:
+            self._put_matrices(pending)
+        return True
+
+    def _lock(self) -> bool:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            lock_file = open(os.path.join(self.directory, "lock"), "a")
+        except OSError as e:
+            print(f"[AudienceStore] Could not open {self.directory}, keeping scores in memory: {e}")
+            return False
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                print(f"[AudienceStore] {self.directory} is in use by another process, keeping scores in memory")
+                return False
+        self._lock_file = lock_file
+        return True
+
+    def _unlock(self) -> None:
+        if self._lock_file is not None:
+            self._lock_file.close()  # releases the flock
+            self._lock_file = None
+
+    def _open(self) -> None:
+        scores_path, ids_path = self._paths()
+        try:
+            ids: List[str] = []
+            scores = None
+            if os.path.exists(scores_path):
+                scores = np.lib.format.open_memmap(scores_path, mode="r+")
+                if scores.dtype != np.int8 or scores.shape[1:] != (len(VARIANTS), len(FACTIONS)):
+                    print(f"[AudienceStore] {scores_path} has an unexpected layout, starting over")
+                    scores = None
+                elif os.path.exists(ids_path):
+                    with open(ids_path, "r", encoding="utf-8") as f:
+                        ids = [line.strip() for line in f if line.strip()]
+                    # Rows past the capacity cannot be trusted (interrupted growth)
+                    ids = ids[:scores.shape[0]]
+            if scores is None:
+                scores = np.lib.format.open_memmap(
+                    scores_path, mode="w+", dtype=np.int8, shape=(_INITIAL_CAPACITY, len(VARIANTS), len(FACTIONS))
+                )
+                ids = []
+                with open(ids_path, "w", encoding="utf-8"):
+                    pass
+        except (OSError, ValueError) as e:
+            print(f"[AudienceStore] Could not open {self.directory}, keeping scores in memory: {e}")
+            return
+        self.scores = scores
+        self.ids = ids
+        self.row_of = {article_id: row for row, article_id in enumerate(ids)}
+        self.persistent = True
+
+    def _grow(self) -> None:
+        capacity = self.scores.shape[0] * 2
+        if not self.persistent:
+            grown = np.zeros((capacity, len(VARIANTS), len(FACTIONS)), dtype=np.int8)
+            grown[:len(self.ids)] = self.scores[:len(self.ids)]
+            self.scores = grown
+            return
+        scores_path, _ = self._paths()
+        tmp_path = f"{scores_path}.{os.getpid()}.tmp"
+        grown = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.int8, shape=(capacity, len(VARIANTS), len(FACTIONS))
+        )
+        grown[:len(self.ids)] = self.scores[:len(self.ids)]
+        grown.flush()
+        del grown
+        os.replace(tmp_path, scores_path)
+        self.scores = np.lib.format.open_memmap(scores_path, mode="r+")
+
+    def put_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Store (or overwrite) the scores of article records; returns the number of new rows."""
+        return self._put_matrices(
+            (record.get("id"), encode_scores(decode_record_field(record, "audience_scores", {})))
+            for record in records
+        )
+
+    def _put_matrices(self, entries: Iterable[Tuple[Optional[str], np.ndarray]]) -> int:
+        new_ids: List[str] = []
+        changed = False
+        for article_id, matrix in entries:
+            if not article_id:
+                continue
+            row = self.row_of.get(article_id)
+            if row is None:
+                if len(self.ids) >= self.scores.shape[0]:
+                    self._grow()
+                row = len(self.ids)
+                self.ids.append(article_id)
+                self.row_of[article_id] = row
+                new_ids.append(article_id)
+            elif np.array_equal(self.scores[row], matrix):
+                continue
+            self.scores[row] = matrix
+            changed = True
+        if changed and self.persistent:
+            try:
+                # Scores first: an id is only listed once its row is on disk
+                self.scores.flush()
+                if new_ids:
+                    with open(self._paths()[1], "a", encoding="utf-8") as f:
+                        f.write("".join(f"{article_id}\n" for article_id in new_ids))
+            except OSError as e:
+                print(f"[AudienceStore] Could not persist scores: {e}")
+        return len(new_ids)
+
+    def put(self, record: Dict[str, Any]) -> None:
+        self.put_many([record])
+
+    def clear_row(self, article_id: str) -> None:
+        """Zero a deleted article's scores (its row is not reused)."""
+        row = self.row_of.get(article_id)
+        if row is not None:
+            self.scores[row] = 0
+            if self.persistent:
+                self.scores.flush()
+
+    def missing(self, article_ids: Iterable[str]) -> List[str]:
+        return [article_id for article_id in dict.fromkeys(article_ids) if article_id and article_id not in self.row_of]
+
+    def vector(self, article_id: str) -> Optional[np.ndarray]:
+        """[variant, faction] scores of one article, or None if it is not stored."""
+        row = self.row_of.get(article_id)
+        return None if row is None else self.scores[row]
+
+    def project(
+        self,
+        placed: Iterable[Tuple[str, str]],
+        articles: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> np.ndarray:
+        """
+        Summed faction scores (int64 [factions]) of (article_id, variant) placements.
+        With `articles` (fetched records), only those articles count and unseen ones are
+        stored first; otherwise every stored article counts. Unknown ids and variants are
+        skipped.
+        """
+        placed = list(placed)
+        if articles is not None:
+            placed = [(article_id, variant) for article_id, variant in placed if article_id in articles]
+            unseen = self.missing(article_id for article_id, _ in placed)
+            if unseen:
+                self.put_many(articles[article_id] for article_id in unseen)
+        rows, variants = [], []
+        for article_id, variant in placed:
+            row = self.row_of.get(article_id)
+            v = _VARIANT_INDEX.get(variant)
+            if row is not None and v is not None:
+                rows.append(row)
+                variants.append(v)
+        if not rows:
+            return np.zeros(len(FACTIONS), dtype=np.int64)
+        return self.scores[np.array(rows), np.array(variants)].sum(axis=0, dtype=np.int64)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "articles": len(self.ids),
+            "capacity": int(self.scores.shape[0]),
+            "persistent": self.persistent,
+        }
+
+
+# Process-wide store (in memory; the API server opens the files at startup)
+audience_store = AudienceStore()
+
+
+def _on_article_change(action: str, record: Dict[str, Any]) -> None:
+    if action == "delete":
+        audience_store.clear_row(record.get("id", ""))
+    elif "audience_scores" in record:
+        audience_store.put(record)
+
+
+add_listener("articles", _on_article_change)
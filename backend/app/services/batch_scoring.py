@@ -0,0 +1,186 @@
+"""
+Batch scoring - vectorized newspaper layout scoring on top of ScoringService.
+
+ScoringService.calculate_scores scores one 4x4 grid with Python loops and per-cell
+adjacency and tag checks. For "what-if" previews the frontend sends many candidate
+layouts at once; BatchScorer scores all of them with NumPy, using ScoringService's
+constants:
+
+- a 16x16 grid adjacency matrix (left/right/top/bottom neighbours),
+- a row multiplier per cell,
+- a tag-pair penalty matrix over interned tag ids (only tags that appear in
+  SYNERGY_PENALTIES are interned; other tags cannot contribute).
+
+Per request, the penalty matrix is folded into an article x article matrix
+(tag counts T: T P T^T), so the synergy of every layout is one gather over the
+adjacent cell pairs. Results are identical to calculate_scores for the same grid.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.scoring_service import ScoringService
+
+
+GRID_CELLS = 16
+GRID_COLUMNS = 4
+
+# Variant index per cell; any other variant scores like propaganda (as in
+# calculate_scores) but has no faction modifiers
+VARIANTS = ("factual", "sensationalist", "propaganda")
+_OTHER_VARIANT = len(VARIANTS)
+_VARIANT_INDEX = {variant: i for i, variant in enumerate(VARIANTS)}
+
+FACTIONS = ("elite", "populace", "gov")
+_DEFAULT_BALANCE = {"elite": 0.33, "populace": 0.33, "gov": 0.34}
+
+
+def _adjacency() -> np.ndarray:
+    adjacency = np.zeros((GRID_CELLS, GRID_CELLS), dtype=bool)
+    for cell in range(GRID_CELLS):
+        row, col = divmod(cell, GRID_COLUMNS)
+        if col > 0:
+            adjacency[cell, cell - 1] = True
+        if col < GRID_COLUMNS - 1:
+            adjacency[cell, cell + 1] = True
+        if row > 0:
+            adjacency[cell, cell - GRID_COLUMNS] = True
+        if row < GRID_CELLS // GRID_COLUMNS - 1:
+            adjacency[cell, cell + GRID_COLUMNS] = True
+    return adjacency
+
+
+ADJACENCY = _adjacency()
+# Ordered (cell, neighbour) pairs: like calculate_scores, each adjacent pair of
+# articles is checked from both sides
+_EDGES = np.argwhere(ADJACENCY)
+
+
+def _topic_tags(article: Dict[str, Any]) -> List[str]:
+    tags = article.get("tags")
+    if not isinstance(tags, dict):
+        return []
+    topic_tags = tags.get("topic_tags", [])
+    return topic_tags if isinstance(topic_tags, list) else []
+
+
+class BatchScorer:
+    """Precomputed scoring tables; score() evaluates many layouts per call."""
+
+    def __init__(self, scoring: Optional[ScoringService] = None):
+        scoring = scoring or ScoringService()
+        self.row_multipliers = np.array(
+            [scoring.LAYOUT_MULTIPLIERS.get(cell // GRID_COLUMNS, 1.0) for cell in range(GRID_CELLS)]
+        )
+        self.base_scores = np.array([
+            scoring.BASE_SCORE_FACTUAL,
+            scoring.BASE_SCORE_SENSATIONALIST,
+            scoring.BASE_SCORE_PROPAGANDA,
+            scoring.BASE_SCORE_PROPAGANDA,
+        ], dtype=float)
+        self.faction_modifiers = np.array([
+            [scoring.FACTION_MODIFIERS.get(variant, {}).get(faction, 0.0) for faction in FACTIONS]
+            for variant in VARIANTS + ("",)
+        ])
+        self.tag_ids: Dict[str, int] = {}
+        for pair in scoring.SYNERGY_PENALTIES:
+            for tag in pair:
+                self.tag_ids.setdefault(tag, len(self.tag_ids))
+        # Penalty for a tag of one article next to a tag of another (symmetric)
+        self.tag_penalties = np.zeros((len(self.tag_ids), len(self.tag_ids)))
+        for a, i in self.tag_ids.items():
+            for b, j in self.tag_ids.items():
+                penalty = scoring.SYNERGY_PENALTIES.get((a, b), scoring.SYNERGY_PENALTIES.get((b, a), 0))
+                self.tag_penalties[i, j] = penalty
+
+    def article_penalties(self, articles: Sequence[Dict[str, Any]]) -> Tuple[Dict[str, int], np.ndarray]:
+        """
+        Article index (id -> row) and the article x article synergy penalty matrix.
+        The extra last row/column (index len(articles)) stands for "no known article".
+        """
+        # Last record per id wins (as in calculate_scores' article lookup)
+        by_id = {article.get("id") or article.get("article_id"): article for article in articles}
+        by_id.pop(None, None)
+        index = {article_id: row for row, article_id in enumerate(by_id)}
+        tag_counts = np.zeros((len(index) + 1, len(self.tag_ids)))
+        for article_id, article in by_id.items():
+            for tag in _topic_tags(article):
+                tag_id = self.tag_ids.get(tag)
+                if tag_id is not None:
+                    tag_counts[index[article_id], tag_id] += 1
+        return index, tag_counts @ self.tag_penalties @ tag_counts.T
+
+    def encode(
+        self, layouts: Sequence[Sequence[Dict[str, Any]]], index: Dict[str, int]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Per layout and cell: article row (len(index) if none/unknown), variant index and
+        whether an article is placed (known or not, as counted for outrage).
+        """
+        missing = len(index)
+        count = len(layouts)
+        article_rows = np.full((count, GRID_CELLS), missing, dtype=np.intp)
+        variants = np.zeros((count, GRID_CELLS), dtype=np.intp)
+        placed = np.zeros((count, GRID_CELLS), dtype=bool)
+        for n, grid in enumerate(layouts):
+            for cell, item in enumerate(grid[:GRID_CELLS]):
+                if (item.get("isAd") and item.get("adId")) or not item.get("articleId"):
+                    continue
+                placed[n, cell] = True
+                article_rows[n, cell] = index.get(item["articleId"], missing)
+                variants[n, cell] = _VARIANT_INDEX.get(item.get("variant") or "factual", _OTHER_VARIANT)
+        return article_rows, variants, placed
+
+    def score(
+        self, layouts: Sequence[Sequence[Dict[str, Any]]], articles: Sequence[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """calculate_scores() results for every layout (16-cell grids of placement dicts)."""
+        if not layouts:
+            return []
+        index, pair_penalties = self.article_penalties(articles)
+        article_rows, variants, placed = self.encode(layouts, index)
+        known = article_rows < len(index)
+
+        cell_scores = np.where(known, self.base_scores[variants] * self.row_multipliers, 0.0)
+        cell_factions = cell_scores[:, :, None] * self.faction_modifiers[variants]
+        # Accumulate cell by cell (vectorized over layouts) so floating point sums match
+        # calculate_scores exactly
+        totals = np.zeros(len(layouts))
+        faction_points = np.zeros((len(layouts), len(FACTIONS)))
+        for cell in range(GRID_CELLS):
+            totals += cell_scores[:, cell]
+            faction_points += cell_factions[:, cell]
+        totals += pair_penalties[article_rows[:, _EDGES[:, 0]], article_rows[:, _EDGES[:, 1]]].sum(axis=1)
+
+        sales = np.maximum(100, np.trunc(totals * 2)).astype(np.int64)
+        sensational = (placed & (variants == _VARIANT_INDEX["sensationalist"])).sum(axis=1)
+        propaganda = (placed & (variants == _VARIANT_INDEX["propaganda"])).sum(axis=1)
+        placed_count = placed.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            outrage = np.where(
+                placed_count > 0,
+                np.minimum(1.0, (sensational * 0.3 + propaganda * 0.2) / placed_count),
+                0.0,
+            )
+        faction_totals = faction_points[:, 0] + faction_points[:, 1] + faction_points[:, 2]
+
+        results = []
+        for n in range(len(layouts)):
+            if faction_totals[n] > 0:
+                balance = {
+                    faction: round(float(faction_points[n, i] / faction_totals[n]), 3)
+                    for i, faction in enumerate(FACTIONS)
+                }
+            else:
+                balance = dict(_DEFAULT_BALANCE)
+            results.append({
+                "final_score": round(float(totals[n]), 2),
+                "sales": int(sales[n]),
+                "outrage_meter": round(float(outrage[n]), 2),
+                "faction_balance": balance,
+            })
+        return results
+
+
+# Tables are built once per process
+batch_scorer = BatchScorer()
@@ -0,0 +1,160 @@
+"""
+Edition Render Cache - Write-once rendered public editions, on disk and in memory.
+
+Public edition links (GET /published-editions/public/{id}) are shared outside the game
+and can be hit many times. A published edition never changes, so its public JSON is
+rendered once - at publish time, or on the first request for editions published
+before this cache existed - and then served as is: from memory (LRU of encoded bodies,
+with their gzip / brotli encodings), else from EDITION_RENDER_DIR, without touching
+PocketBase. The author's username is captured in the render, like a newspaper's
+masthead on the day it was printed.
+
+Renders are written atomically (temp file + rename) and never rewritten. An edition
+that is updated or deleted in PocketBase (admin action) is dropped via the realtime
+listener.
+"""
+import os
+import re
+import sys
+from typing import Any, Dict, List, Optional
+
+# Add parent directory to path to import lib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lib.records import PublishedEdition
+from lib.record_cache import _LRU
+from app.utils.date_format import format_datetime_dutch, format_date_dutch
+from app.utils.responses import EncodedBody
+from app.services.realtime_service import add_listener
+
+
+EDITION_RENDER_DIR = os.getenv(
+    "EDITION_RENDER_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "cache", "editions"),
+)
+# Rendered editions kept in memory
+EDITION_RENDER_MAX_ENTRIES = int(os.getenv("EDITION_RENDER_MAX_ENTRIES", "1000"))
+
+# Browsers and shared caches (Cloudflare) may keep a render for a year without revalidating
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# PocketBase record ids (also keeps request paths out of the file system)
+_EDITION_ID = re.compile(r"^[a-z0-9]{15}$")
+
+
+def is_edition_id(edition_id: str) -> bool:
+    return bool(_EDITION_ID.match(edition_id or ""))
+
+
+def render_public_edition(edition: Dict[str, Any], username: Optional[str]) -> Dict[str, Any]:
+    """The PublicEditionResponse payload of a published edition (see app/api/published_editions.py)."""
+    record = PublishedEdition(edition)
+    published_items: List[Dict[str, Any]] = []
+    for item in record.placed_items:
+        published_items.append({
+            "type": "ad" if item.is_ad else "article",
+            # Fallbacks if headline/body were not stored (older editions)
+            "headline": item.headline or "UNTITLED",
+            "body": item.body,
+            "variant": None if item.is_ad else item.variant,
+            "source": None,
+            "location": None,
+            "row": item.row,
+            "position": item.position,
+        })
+
+    return {
+        "id": record.id,
+        "newspaper_name": record.newspaper_name or "Untitled Edition",
+        "date": format_date_dutch(record.date),
+        "published_at": format_datetime_dutch(record.published_at),
+        "stats": record.stats,
+        "published_items": published_items,
+        "username": username,
+    }
+
+
+class EditionRenderCache:
+    def __init__(self, directory: str = EDITION_RENDER_DIR, max_entries: int = EDITION_RENDER_MAX_ENTRIES):
+        self.directory = directory
+        self._memory = _LRU(float("inf"), max_entries)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, edition_id: str) -> str:
+        return os.path.join(self.directory, f"{edition_id}.json")
+
+    def get(self, edition_id: str) -> Optional[EncodedBody]:
+        """The rendered edition, from memory or disk; None if it was never rendered."""
+        if not is_edition_id(edition_id):
+            return None
+        body = self._memory.get(edition_id)
+        if body is not None:
+            self.memory_hits += 1
+            return body
+        try:
+            with open(self._path(edition_id), "rb") as f:
+                body = EncodedBody(f.read())
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except OSError as e:
+            print(f"[EditionRenderCache] Could not read render of {edition_id}: {e}")
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self._memory.put(edition_id, body)
+        return body
+
+    def put(self, edition_id: str, payload: Dict[str, Any]) -> EncodedBody:
+        """Store a render (first write wins on disk); returns the encoded body."""
+        body = EncodedBody.from_data(payload)
+        if not is_edition_id(edition_id):
+            return body
+        self._memory.put(edition_id, body)
+        path = self._path(edition_id)
+        if os.path.exists(path):
+            return body
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(body.body)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # Still served from memory; the next process re-renders it
+            print(f"[EditionRenderCache] Could not write render of {edition_id}: {e}")
+        return body
+
+    def drop(self, edition_id: str) -> None:
+        if not is_edition_id(edition_id):
+            return
+        self._memory.pop(edition_id)
+        try:
+            os.remove(self._path(edition_id))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"[EditionRenderCache] Could not remove render of {edition_id}: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+
+# Process-wide render cache
+edition_render_cache = EditionRenderCache()
+
+
+def _on_edition_change(action: str, record: Dict[str, Any]) -> None:
+    # Editions are not edited by players; admin edits and deletes invalidate the render
+    if action in ("update", "delete"):
+        edition_render_cache.drop(record.get("id", ""))
+
+
+add_listener("published_editions", _on_edition_change)
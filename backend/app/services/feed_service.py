@@ -0,0 +1,233 @@
+"""
+Feed Service - Shared, pre-serialized snapshot of the public scoops feed.
+
+Every player sees the same feed: the articles published between yesterday 18:00 and
+today 18:00 (Europe/Amsterdam), or up to now once 18:00 has passed. Instead of
+downloading and filtering the newest articles on every request, the window filter is
+pushed into the PocketBase query and the encoded response body is kept in memory
+(with its gzip / brotli encodings, see app/utils/responses.py), as are recently
+requested pages.
+
+The snapshot is rebuilt on the next request when:
+- the window changes (18:00 boundary or a new day),
+- ingestion added articles in this process (invalidate_feed_snapshot),
+- an article changed in PocketBase (realtime listener, covers news_worker.py),
+- it is older than FEED_SNAPSHOT_MAX_AGE seconds (safety net when realtime is off).
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytz
+
+# Add parent directory to path to import lib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lib.pocketbase_client import PocketBaseClient
+from lib.records import Article
+from app.utils.date_format import format_datetime_dutch, format_date_dutch
+from app.utils.cursor import NEXT_CURSOR_HEADER, encode_cursor, page_after
+from app.utils.responses import EncodedBody
+from app.services.realtime_service import add_listener
+from app.services.audience_store import audience_store
+
+
+# Dutch timezone
+DUTCH_TZ = pytz.timezone("Europe/Amsterdam")
+
+# PocketBase datetime format used in filters (stored in UTC)
+_PB_DATETIME = "%Y-%m-%d %H:%M:%S.000Z"
+
+# Maximum snapshot age before it is rebuilt regardless of invalidation
+FEED_SNAPSHOT_MAX_AGE = float(os.getenv("FEED_SNAPSHOT_MAX_AGE", "300"))
+
+# Encoded pages kept per snapshot, by (cursor, limit)
+_MAX_PAGES = 32
+
+
+def feed_window(now: Optional[datetime] = None) -> Tuple[datetime, Optional[datetime]]:
+    """
+    Return (start, end) of the feed window in Dutch time.
+
+    Before 18:00 the window is [yesterday 18:00, today 18:00]; from 18:00 on the end is
+    open (None) so articles ingested this evening show up immediately.
+    """
+    now_dutch = now.astimezone(DUTCH_TZ) if now else datetime.now(DUTCH_TZ)
+    today_18 = now_dutch.replace(hour=18, minute=0, second=0, microsecond=0)
+    yesterday_18 = today_18 - timedelta(days=1)
+    if now_dutch >= today_18:
+        return yesterday_18, None
+    return yesterday_18, today_18
+
+
+def _pb_time(dt: datetime) -> str:
+    return dt.astimezone(pytz.UTC).strftime(_PB_DATETIME)
+
+
+def feed_filter(start: datetime, end: Optional[datetime]) -> str:
+    """
+    PocketBase filter for the window. Articles without published_at fall back to their
+    `date` being today or yesterday (Dutch calendar days), as before.
+    """
+    published = f'published_at >= "{_pb_time(start)}"'
+    if end is not None:
+        published += f' && published_at <= "{_pb_time(end)}"'
+    yesterday = start.date()
+    date_from = yesterday.strftime("%Y-%m-%d 00:00:00.000Z")
+    date_to = (yesterday + timedelta(days=2)).strftime("%Y-%m-%d 00:00:00.000Z")
+    undated = f'published_at = "" && date >= "{date_from}" && date < "{date_to}"'
+    return f"({published}) || ({undated})"
+
+
+def _scoop(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Map an article record to the ScoopResponse shape (see app/api/feed.py)."""
+    article = Article(item)
+    return {
+        "id": article.id,
+        "original_title": article.original_title,
+        "processed_variants": article.processed_variants,
+        "tags": article.tags,
+        "location_lat": article.location_lat,
+        "location_lon": article.location_lon,
+        "location_city": article.location_city,
+        "date": format_date_dutch(article.date),
+        "published_at": format_datetime_dutch(article.published_at),
+        "created": format_datetime_dutch(article.created),
+        "assistant_comment": article.assistant_comment,
+        "audience_scores": article.audience_scores or None,
+    }
+
+
+class FeedSnapshot:
+    """Encoded feed body for one window, plus the items and their keyset keys for paging."""
+
+    __slots__ = ("window", "scoops", "keys", "encoded", "total", "version", "built_at", "max_updated", "_pages")
+
+    def __init__(
+        self,
+        window: Tuple[str, str],
+        scoops: List[Dict[str, Any]],
+        keys: List[Tuple[str, str]],
+        version: int,
+        max_updated: str,
+    ):
+        self.window = window
+        self.scoops = scoops
+        # (published_at, id) per scoop, in feed order (descending)
+        self.keys = keys
+        self.total = len(scoops)
+        self.encoded = EncodedBody.from_data({"items": scoops, "total": self.total, "next_cursor": None})
+        self.version = version
+        self.built_at = time.monotonic()
+        self.max_updated = max_updated
+        self._pages: Dict[Tuple[Optional[str], int], EncodedBody] = {}
+
+    @property
+    def body(self) -> bytes:
+        return self.encoded.body
+
+    @property
+    def etag(self) -> str:
+        return self.encoded.etag
+
+    def page(self, cursor: Optional[str], limit: int) -> EncodedBody:
+        """Encoded body with the `limit` items after `cursor` (next cursor in its headers)."""
+        page = self._pages.get((cursor, limit))
+        if page is not None:
+            return page
+        start = page_after(self.keys, cursor)
+        end = start + limit
+        next_cursor = encode_cursor(*self.keys[end - 1]) if end < self.total else None
+        page = EncodedBody.from_data(
+            {"items": self.scoops[start:end], "total": self.total, "next_cursor": next_cursor},
+            headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None,
+        )
+        if len(self._pages) >= _MAX_PAGES:
+            self._pages.pop(next(iter(self._pages)))
+        self._pages[(cursor, limit)] = page
+        return page
+
+
+class FeedService:
+    """Builds and caches the shared feed snapshot."""
+
+    def __init__(self):
+        self._snapshot: Optional[FeedSnapshot] = None
+        self._lock = asyncio.Lock()
+        # Bumped on every invalidation; a build started before an invalidation is not reused
+        self._generation = 0
+        self._version = 0
+        self.builds = 0
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._snapshot = None
+
+    def _is_fresh(self, snapshot: Optional[FeedSnapshot], window_key: Tuple[str, str]) -> bool:
+        return (
+            snapshot is not None
+            and snapshot.window == window_key
+            and time.monotonic() - snapshot.built_at < FEED_SNAPSHOT_MAX_AGE
+        )
+
+    async def get_snapshot(self, pb: PocketBaseClient) -> FeedSnapshot:
+        """Return the current snapshot, building it at most once for concurrent callers."""
+        start, end = feed_window()
+        window_key = (start.isoformat(), end.isoformat() if end else "")
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot, window_key):
+            return snapshot
+        async with self._lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot, window_key):
+                return snapshot
+            generation = self._generation
+            items = await pb.get_full_list(
+                "articles",
+                filter=feed_filter(start, end),
+                sort="-published_at,-id",
+                raise_on_error=True,
+            )
+            self._version += 1
+            # Feed articles are the ones players place: keep their scores ready for previews
+            audience_store.put_many(items)
+            snapshot = FeedSnapshot(
+                window=window_key,
+                scoops=[_scoop(item) for item in items],
+                keys=[(item.get("published_at") or "", item.get("id") or "") for item in items],
+                version=self._version,
+                max_updated=max((item.get("updated", "") for item in items), default=""),
+            )
+            self.builds += 1
+            if generation == self._generation:
+                self._snapshot = snapshot
+            return snapshot
+
+    def status(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "cached": snapshot is not None,
+            "total": snapshot.total if snapshot else 0,
+            "version": snapshot.version if snapshot else 0,
+            "age_seconds": round(time.monotonic() - snapshot.built_at, 1) if snapshot else None,
+            "builds": self.builds,
+        }
+
+
+# Process-wide feed service
+feed_service = FeedService()
+
+
+def invalidate_feed_snapshot() -> None:
+    """Drop the cached feed (call after articles were added or changed)."""
+    feed_service.invalidate()
+
+
+def _on_article_change(action: str, record: Dict[str, Any]) -> None:
+    feed_service.invalidate()
+
+
+add_listener("articles", _on_article_change)
@@ -17,6 +17,7 @@ from lib.article_extractor import extract_full_text
 from app.services.rss_service import RSSService
 from app.services.ai_service import AIService
 from app.services.geo_service import GeoService
+from app.services.feed_service import invalidate_feed_snapshot
 
 
 class IngestionServicePB:
@@ -99,19 +100,11 @@ class IngestionServicePB:
     async def _get_existing_article_source_urls(self) -> set:
         """Fetch all articles' source_url from PocketBase (paginated) for incremental RSS check."""
         seen: set = set()
-        page = 1
-        per_page = 500
-        while True:
-            items = await self.pb.get_list("articles", page=page, per_page=per_page)
-            if not items:
-                break
-            for item in items:
-                url = (item.get("source_url") or "").strip()
-                if url:
-                    seen.add(url)
-            if len(items) < per_page:
-                break
-            page += 1
+        items = await self.pb.get_full_list("articles", fields="source_url")
+        for item in items:
+            url = (item.get("source_url") or "").strip()
+            if url:
+                seen.add(url)
         return seen
     
     def load_ads(self) -> List[dict]:
@@ -363,7 +356,9 @@ class IngestionServicePB:
                 # Re-check source_url before create: another ingestion run may have added it (race condition)
                 source_url = (raw_article.get("link") or "").strip()
                 if source_url:
-                    check = await self.pb.get_list("articles", per_page=1, filter=f'source_url = "{source_url}"')
+                    check = await self.pb.get_list(
+                        "articles", per_page=1, filter=f'source_url = "{source_url}"', fields="id", skip_total=True
+                    )
                     if check:
                         self._step(on_step, "  (skipped: already exists, concurrent run?)")
                         continue
@@ -387,11 +382,6 @@ class IngestionServicePB:
                     "user": system_user_id,  # Link to system user
                 })
                 
-                # Convert JSON fields to strings for PocketBase
-                article_data["processed_variants"] = json.dumps(article_data["processed_variants"])
-                article_data["tags"] = json.dumps(article_data["tags"])
-                article_data["audience_scores"] = json.dumps(article_data["audience_scores"])
-                
                 step_start = time.time()
                 article = await self.pb.create_record("articles", article_data)
                 step_timings["save_to_db"] = round(time.time() - step_start, 2)
@@ -437,6 +427,9 @@ class IngestionServicePB:
                 continue
         
         self._step(on_step, f"Klaar. {processed_count} artikelen verwerkt.")
+        if processed_count:
+            # New articles: the shared feed snapshot must be rebuilt
+            invalidate_feed_snapshot()
 
         # Load ads (for later use)
         ads = self.load_ads()
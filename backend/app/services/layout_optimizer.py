@@ -0,0 +1,419 @@
+"""
+Layout Optimizer - "suggest best front page" for a pool of articles and ads.
+
+Searches cell placements and variant choices with simulated annealing on the
+ScoringService model (final_score: variant base score x row multiplier, plus
+synergy penalties between adjacent articles). Every ad in the pool is placed;
+articles may be left out when the pool is larger than the free cells.
+
+Each annealing step proposes one move - swap two cells, change a variant, or swap
+a placed article for an unplaced one - and scores it by delta: only the changed
+cells and the grid edges touching them are re-evaluated (tables from BatchScorer),
+never the whole grid. An optional max_outrage is a hard limit on outrage_meter:
+moves that would exceed it are rejected, and layouts over it (e.g. a random start)
+are never reported - if no layout within the limit is found, there are no layouts.
+
+Searches run in a process pool (LAYOUT_OPTIMIZER_WORKERS, default: one per core),
+each with its own seed, until the time budget is spent. The best distinct layouts
+of all workers are merged and re-scored with BatchScorer, so reported breakdowns
+equal calculate_scores. LAYOUT_OPTIMIZER_WORKERS=0 searches in a thread instead.
+"""
+import asyncio
+import heapq
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.services.batch_scoring import ADJACENCY, GRID_CELLS, VARIANTS, batch_scorer
+
+
+LAYOUT_OPTIMIZER_WORKERS = int(os.getenv("LAYOUT_OPTIMIZER_WORKERS", str(os.cpu_count() or 1)))
+# Upper bound for a request's time budget (milliseconds)
+LAYOUT_OPTIMIZER_MAX_BUDGET_MS = int(os.getenv("LAYOUT_OPTIMIZER_MAX_BUDGET_MS", "5000"))
+
+# Annealing schedule: temperature (score points) decays geometrically over one run,
+# then the search restarts from the worker's best layout
+START_TEMPERATURE = 25.0
+END_TEMPERATURE = 0.05
+STEPS_PER_RUN = 20000
+# Check the clock every this many steps
+_CLOCK_INTERVAL = 256
+
+# Cell contents: article index >= 0, EMPTY, or an ad (AD_BASE - ad index)
+EMPTY = -1
+AD_BASE = -2
+
+_NEIGHBOURS = [[int(n) for n in ADJACENCY[cell].nonzero()[0]] for cell in range(GRID_CELLS)]
+_OUTRAGE_WEIGHTS = {"sensationalist": 0.3, "propaganda": 0.2}
+
+
+def _outrage(placed: int, weighted: float) -> float:
+    return min(1.0, weighted / placed) if placed else 0.0
+
+
+def _within_limit(max_outrage: Optional[float], placed: int, weighted: float) -> bool:
+    return max_outrage is None or _outrage(placed, weighted) <= max_outrage + 1e-9
+
+
+def _state_outrage_totals(state, outrage_weights: List[float]) -> Tuple[int, float]:
+    """(placed articles, summed outrage weight) of a state."""
+    placed, weighted = 0, 0.0
+    for item, variant in state:
+        if item >= 0:
+            placed += 1
+            weighted += outrage_weights[variant]
+    return placed, weighted
+
+
+class _Search:
+    """One annealing worker's state: cell contents, variants and running totals."""
+
+    def __init__(self, problem: Dict[str, Any], rng: random.Random):
+        self.rng = rng
+        self.pairs: List[List[float]] = problem["pairs"]
+        self.cell_points: List[List[float]] = problem["cell_points"]  # [variant][cell]
+        self.outrage_weights: List[float] = problem["outrage_weights"]  # per variant
+        self.variants: List[int] = problem["variants"]  # allowed variant indexes
+        self.max_outrage: Optional[float] = problem["max_outrage"]
+        self.article_count: int = problem["article_count"]
+        self.ad_count: int = problem["ad_count"]
+        self.none_row = self.article_count  # zero row of the pair matrix
+        self.evaluations = 0
+
+    # --- state -------------------------------------------------------------
+
+    def randomize(self) -> None:
+        """Random layout: ads first, then as many articles as fit, least outrageous variant."""
+        cells = list(range(GRID_CELLS))
+        self.rng.shuffle(cells)
+        self.items = [EMPTY] * GRID_CELLS
+        self.cell_variants = [0] * GRID_CELLS
+        for ad, cell in enumerate(cells[:self.ad_count]):
+            self.items[cell] = AD_BASE - ad
+        articles = list(range(self.article_count))
+        self.rng.shuffle(articles)
+        free = cells[self.ad_count:]
+        calm = min(self.variants, key=lambda v: self.outrage_weights[v])
+        for article, cell in zip(articles, free):
+            self.items[cell] = article
+            self.cell_variants[cell] = calm
+        self.unplaced = articles[len(free):]
+        self._recount()
+
+    def load(self, state: Tuple[Tuple[int, int], ...]) -> None:
+        self.items = [item for item, _ in state]
+        self.cell_variants = [variant for _, variant in state]
+        placed = {item for item in self.items if item >= 0}
+        self.unplaced = [a for a in range(self.article_count) if a not in placed]
+        self._recount()
+
+    def _recount(self) -> None:
+        self.score = 0.0
+        self.placed = 0
+        self.weighted_outrage = 0.0
+        for cell in range(GRID_CELLS):
+            if self.items[cell] >= 0:
+                variant = self.cell_variants[cell]
+                self.score += self.cell_points[variant][cell]
+                self.placed += 1
+                self.weighted_outrage += self.outrage_weights[variant]
+                # Each edge is seen from both of its cells
+                self.score += self._synergy(cell, self.items[cell], set()) / 2
+
+    def state(self) -> Tuple[Tuple[int, int], ...]:
+        return tuple(
+            (item, self.cell_variants[cell] if item >= 0 else 0) for cell, item in enumerate(self.items)
+        )
+
+    def _row(self, item: int) -> int:
+        return item if item >= 0 else self.none_row
+
+    def _synergy(self, cell: int, item: int, skip: set) -> float:
+        """Penalty of the edges between `cell` (holding `item`) and its neighbours, both directions."""
+        row = self.pairs[self._row(item)]
+        total = 0.0
+        for neighbour in _NEIGHBOURS[cell]:
+            if neighbour not in skip:
+                total += row[self._row(self.items[neighbour])]
+        return 2 * total
+
+    # --- moves ---------------------------------------------------------------
+
+    def _swap_delta(self, a: int, b: int) -> float:
+        items, variants, points = self.items, self.cell_variants, self.cell_points
+        item_a, item_b = items[a], items[b]
+        delta = 0.0
+        if item_a >= 0:
+            delta += points[variants[a]][b] - points[variants[a]][a]
+        if item_b >= 0:
+            delta += points[variants[b]][a] - points[variants[b]][b]
+        # Edges touching a or b (the a-b edge keeps its pair and is skipped)
+        before = self._synergy(a, item_a, {b}) + self._synergy(b, item_b, {a})
+        items[a], items[b] = item_b, item_a
+        after = self._synergy(a, item_b, {b}) + self._synergy(b, item_a, {a})
+        items[a], items[b] = item_a, item_b
+        return delta + after - before
+
+    def within_limit(self) -> bool:
+        return _within_limit(self.max_outrage, self.placed, self.weighted_outrage)
+
+    def _outrage_allowed(self, placed: int, weighted: float) -> bool:
+        if _within_limit(self.max_outrage, placed, weighted):
+            return True
+        # Never make an over-limit layout worse; starting layouts may exceed the limit
+        return _outrage(placed, weighted) <= _outrage(self.placed, self.weighted_outrage)
+
+    def step(self, temperature: float) -> bool:
+        """Propose and maybe accept one random move; True if accepted."""
+        rng = self.rng
+        self.evaluations += 1
+        move = rng.random()
+        if move < 0.5:
+            a, b = rng.randrange(GRID_CELLS), rng.randrange(GRID_CELLS)
+            if a == b or self.items[a] == self.items[b]:
+                return False
+            delta = self._swap_delta(a, b)
+            if not self._accept(delta, temperature):
+                return False
+            self.items[a], self.items[b] = self.items[b], self.items[a]
+            self.cell_variants[a], self.cell_variants[b] = self.cell_variants[b], self.cell_variants[a]
+        elif move < 0.8:
+            cell = rng.randrange(GRID_CELLS)
+            if self.items[cell] < 0 or len(self.variants) < 2:
+                return False
+            old, new = self.cell_variants[cell], rng.choice(self.variants)
+            if old == new:
+                return False
+            weighted = self.weighted_outrage - self.outrage_weights[old] + self.outrage_weights[new]
+            if not self._outrage_allowed(self.placed, weighted):
+                return False
+            delta = self.cell_points[new][cell] - self.cell_points[old][cell]
+            if not self._accept(delta, temperature):
+                return False
+            self.cell_variants[cell] = new
+            self.weighted_outrage = weighted
+        else:
+            # Bring in an unplaced article, on an article or empty cell
+            cell = rng.randrange(GRID_CELLS)
+            old = self.items[cell]
+            if not self.unplaced or old < EMPTY:
+                return False
+            slot = rng.randrange(len(self.unplaced))
+            new = self.unplaced[slot]
+            variant = self.cell_variants[cell] if old >= 0 else min(
+                self.variants, key=lambda v: self.outrage_weights[v]
+            )
+            placed, weighted = self.placed, self.weighted_outrage
+            if old == EMPTY:
+                placed += 1
+                weighted += self.outrage_weights[variant]
+                if not self._outrage_allowed(placed, weighted):
+                    return False
+            delta = self.cell_points[variant][cell] - (self.cell_points[variant][cell] if old >= 0 else 0.0)
+            delta += self._synergy(cell, new, set()) - self._synergy(cell, old, set())
+            if not self._accept(delta, temperature):
+                return False
+            self.items[cell] = new
+            self.cell_variants[cell] = variant
+            if old >= 0:
+                self.unplaced[slot] = old
+            else:
+                self.unplaced.pop(slot)
+            self.placed, self.weighted_outrage = placed, weighted
+        self.score += delta
+        return True
+
+    def _accept(self, delta: float, temperature: float) -> bool:
+        if delta >= 0:
+            return True
+        return self.rng.random() < math.exp(delta / temperature)
+
+
+def anneal(problem: Dict[str, Any], seed: int, budget_seconds: float, top_n: int) -> Tuple[List[Tuple[float, Any]], int]:
+    """
+    Worker entry point (runs in a pool process): anneal until the budget is spent.
+    Returns the top_n distinct (score, state) within max_outrage found and the number
+    of evaluated moves.
+    """
+    deadline = time.monotonic() + budget_seconds
+    search = _Search(problem, random.Random(seed))
+    search.randomize()
+    top: List[Tuple[float, Any]] = []  # min-heap of (score, state)
+    seen = set()
+    best: Optional[Tuple[float, Any]] = None
+    cooling = (END_TEMPERATURE / START_TEMPERATURE) ** (1.0 / STEPS_PER_RUN)
+
+    def record() -> None:
+        nonlocal best
+        if not search.within_limit():
+            return
+        if len(top) >= top_n and search.score <= top[0][0] + 1e-9:
+            return
+        state = search.state()
+        if state in seen:
+            return
+        seen.add(state)
+        entry = (search.score, state)
+        if len(top) < top_n:
+            heapq.heappush(top, entry)
+        else:
+            seen.discard(heapq.heappushpop(top, entry)[1])
+        if best is None or search.score > best[0]:
+            best = entry
+
+    record()
+    while time.monotonic() < deadline:
+        temperature = START_TEMPERATURE
+        for step in range(STEPS_PER_RUN):
+            if search.step(temperature):
+                record()
+            temperature *= cooling
+            if step % _CLOCK_INTERVAL == 0 and time.monotonic() >= deadline:
+                break
+        # Restart from the best layout so far, or from scratch now and then
+        if best is not None and search.rng.random() < 0.7:
+            search.load(best[1])
+        else:
+            search.randomize()
+    return sorted(top, reverse=True), search.evaluations
+
+
+class LayoutOptimizer:
+    def __init__(self, workers: int = LAYOUT_OPTIMIZER_WORKERS):
+        self.workers = max(0, workers)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.runs = 0
+        self.evaluations = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def problem(
+        self,
+        articles: Sequence[Dict[str, Any]],
+        ad_count: int,
+        variants: Sequence[str],
+        max_outrage: Optional[float],
+    ) -> Tuple[List[str], Dict[str, Any]]:
+        """Article ids (search index order) and the picklable scoring tables for workers."""
+        index, pair_penalties = batch_scorer.article_penalties(articles)
+        article_ids = list(index)
+        cell_points = [
+            [float(batch_scorer.base_scores[v] * batch_scorer.row_multipliers[cell]) for cell in range(GRID_CELLS)]
+            for v in range(len(VARIANTS))
+        ]
+        return article_ids, {
+            "pairs": pair_penalties.tolist(),
+            "cell_points": cell_points,
+            "outrage_weights": [_OUTRAGE_WEIGHTS.get(v, 0.0) for v in VARIANTS],
+            "variants": sorted({VARIANTS.index(v) for v in variants}),
+            "max_outrage": max_outrage,
+            "article_count": len(article_ids),
+            "ad_count": min(ad_count, GRID_CELLS),
+        }
+
+    async def optimize(
+        self,
+        articles: Sequence[Dict[str, Any]],
+        ad_ids: Sequence[str],
+        variants: Sequence[str] = VARIANTS,
+        max_outrage: Optional[float] = None,
+        top_n: int = 5,
+        budget_ms: int = 1000,
+        seed: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Best distinct layouts for the pool (grids of placement dicts with their
+        calculate_scores results) plus search statistics. Layouts are empty when none
+        within max_outrage was found.
+        """
+        article_ids, problem = self.problem(articles, len(ad_ids), variants, max_outrage)
+        budget = min(budget_ms, LAYOUT_OPTIMIZER_MAX_BUDGET_MS) / 1000.0
+        seed = random.randrange(2 ** 31) if seed is None else seed
+        started = time.monotonic()
+
+        workers = self.workers
+        loop = asyncio.get_running_loop()
+        try:
+            if workers:
+                runs = await asyncio.gather(*[
+                    loop.run_in_executor(self._get_pool(), anneal, problem, seed + w, budget, top_n)
+                    for w in range(workers)
+                ])
+            else:
+                runs = [await asyncio.to_thread(anneal, problem, seed, budget, top_n)]
+        except BrokenProcessPool as e:
+            # A worker died (e.g. OOM-killed); search in-process this time, new pool next time
+            print(f"[LayoutOptimizer] Process pool broken, searching in-process: {e}")
+            self._pool = None
+            workers = 0
+            runs = [await asyncio.to_thread(anneal, problem, seed, budget, top_n)]
+        elapsed = time.monotonic() - started
+
+        merged: Dict[Any, float] = {}
+        evaluations = 0
+        for top, count in runs:
+            evaluations += count
+            for score, state in top:
+                if _within_limit(max_outrage, *_state_outrage_totals(state, problem["outrage_weights"])):
+                    merged[state] = score
+        best_states = sorted(merged, key=merged.get, reverse=True)[:top_n]
+
+        grids = [self._grid(state, article_ids, ad_ids) for state in best_states]
+        scores = batch_scorer.score(grids, articles)
+        self.runs += 1
+        self.evaluations += evaluations
+        return {
+            "layouts": [
+                {"grid": grid, **score, "placement_points": self._placement_points(state)}
+                for grid, score, state in zip(grids, scores, best_states)
+            ],
+            "evaluations": evaluations,
+            "evaluations_per_second": round(evaluations / elapsed) if elapsed > 0 else 0,
+            "elapsed_ms": round(elapsed * 1000),
+            "workers": workers or 1,
+        }
+
+    @staticmethod
+    def _grid(state, article_ids: List[str], ad_ids: Sequence[str]) -> List[Dict[str, Any]]:
+        grid = []
+        for item, variant in state:
+            if item >= 0:
+                grid.append({"articleId": article_ids[item], "variant": VARIANTS[variant], "isAd": False, "adId": None})
+            elif item == EMPTY:
+                grid.append({"articleId": None, "variant": None, "isAd": False, "adId": None})
+            else:
+                grid.append({"articleId": None, "variant": None, "isAd": True, "adId": ad_ids[AD_BASE - item]})
+        return grid
+
+    @staticmethod
+    def _placement_points(state) -> float:
+        """Score before synergy penalties (variant base score x row multiplier)."""
+        total = 0.0
+        for cell, (item, variant) in enumerate(state):
+            if item >= 0:
+                total += batch_scorer.base_scores[variant] * batch_scorer.row_multipliers[cell]
+        return round(float(total), 2)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "pool_started": self._pool is not None,
+            "runs": self.runs,
+            "evaluations": self.evaluations,
+        }
+
+
+# Process-wide optimizer (the pool is started on first use)
+layout_optimizer = LayoutOptimizer()
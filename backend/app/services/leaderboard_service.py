@@ -0,0 +1,303 @@
+"""
+Leaderboard Service - Incrementally maintained per-day newspaper leaderboard.
+
+The public leaderboard shows the most profitable editions of the latest publishing day.
+Instead of scanning published_editions and looking up every author on each request, the
+service keeps, per date, a bounded min-heap with the top K editions by profit, and a
+sorted index of all the day's editions for "my rank" queries (bisect). It is
+built once from PocketBase (at startup or on first use) and updated in place when an
+edition is published, either through publish_edition in this process or through the
+realtime subscriber (other processes). Author display data for the top K is resolved
+with one batched users query and cached.
+
+Deletes cannot be applied to a heap, so they mark the service dirty and the next read
+rebuilds from PocketBase; LEADERBOARD_MAX_AGE bounds staleness when realtime is off.
+"""
+import asyncio
+import bisect
+import heapq
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Add parent directory to path to import lib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lib.pocketbase_client import PocketBaseClient
+from lib.json_codec import decode_record_field
+from app.services.realtime_service import add_listener
+
+
+# Editions kept per day (the endpoint shows the top 5)
+LEADERBOARD_TOP_K = int(os.getenv("LEADERBOARD_TOP_K", "10"))
+# Seconds after which the leaderboard is rebuilt from PocketBase regardless of events
+LEADERBOARD_MAX_AGE = float(os.getenv("LEADERBOARD_MAX_AGE", "900"))
+# Days kept in memory (older days are never shown)
+_MAX_DAYS = 7
+
+_EDITION_FIELDS = "id,user,date,stats,newspaper_name,published_at"
+
+# Heap item: (profit, published_at, edition_id). The smallest item is evicted first, so
+# on equal profit the most recently published edition ranks higher (as before).
+HeapItem = Tuple[float, str, str]
+
+
+def _date_key(value: Any) -> str:
+    """Normalize a PocketBase date ("2026-01-31 00:00:00.000Z") or ISO date to YYYY-MM-DD."""
+    return str(value or "")[:10]
+
+
+def _edition_entry(edition: Dict[str, Any]) -> Dict[str, Any]:
+    stats = decode_record_field(edition, "stats", {})
+    if not isinstance(stats, dict):
+        stats = {}
+    return {
+        "edition_id": edition.get("id", ""),
+        "user": edition.get("user", ""),
+        "newspaper_name": edition.get("newspaper_name") or "Untitled",
+        "profit": float(stats.get("cash", 0.0) or 0.0),
+        "readers": int(stats.get("readers", 0) or 0),
+        "credibility": float(stats.get("credibility", 0.0) or 0.0),
+        "date": _date_key(edition.get("date")),
+        "published_at": edition.get("published_at") or "",
+    }
+
+
+class DayBoard:
+    """
+    Top-K editions of one day, plus an order-statistic index over all of them.
+
+    `ranked` holds every edition's heap item in ascending order, so the rank of an item
+    is a binary search (bisect) and its neighbours are a slice around it.
+    """
+
+    __slots__ = ("heap", "entries", "all", "ranked", "by_user")
+
+    def __init__(self):
+        self.heap: List[HeapItem] = []
+        # Display data of the editions currently in the heap
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # Every edition of the day by id (makes add() idempotent)
+        self.all: Dict[str, Dict[str, Any]] = {}
+        # All items, ascending (rank 1 is the last element)
+        self.ranked: List[HeapItem] = []
+        # Best item per user
+        self.by_user: Dict[str, HeapItem] = {}
+
+    def add(self, entry: Dict[str, Any], k: int) -> bool:
+        """Offer an edition; returns True if it entered the top K."""
+        edition_id = entry["edition_id"]
+        if not edition_id or edition_id in self.all:
+            return False
+        self.all[edition_id] = entry
+        item: HeapItem = (entry["profit"], entry["published_at"], edition_id)
+        bisect.insort(self.ranked, item)
+        user = entry["user"]
+        if user and (user not in self.by_user or item > self.by_user[user]):
+            self.by_user[user] = item
+        if len(self.heap) < k:
+            heapq.heappush(self.heap, item)
+        elif item > self.heap[0]:
+            evicted = heapq.heapreplace(self.heap, item)
+            self.entries.pop(evicted[2], None)
+        else:
+            return False
+        self.entries[edition_id] = entry
+        return True
+
+    def top(self, n: int) -> List[Dict[str, Any]]:
+        return [self.entries[item[2]] for item in heapq.nlargest(n, self.heap)]
+
+    def rank_of(self, item: HeapItem) -> int:
+        """1-based rank (1 = most profitable) in O(log n)."""
+        return len(self.ranked) - bisect.bisect_left(self.ranked, item)
+
+    def around(self, rank: int, width: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """(rank, entry) for the editions within `width` places of `rank`, best first."""
+        n = len(self.ranked)
+        first = max(1, rank - width)
+        last = min(n, rank + width)
+        return [(r, self.all[self.ranked[n - r][2]]) for r in range(first, last + 1)]
+
+
+class LeaderboardService:
+    def __init__(self, k: int = LEADERBOARD_TOP_K):
+        self.k = k
+        self._days: Dict[str, DayBoard] = {}
+        self._user_emails: Dict[str, str] = {}
+        self._lock = asyncio.Lock()
+        self._built_at: Optional[float] = None
+        self._dirty = True
+        # Editions published while a rebuild is fetching, replayed onto the new state
+        self._pending: List[Tuple[Dict[str, Any], Optional[str]]] = []
+        self.rebuilds = 0
+
+    @property
+    def latest_date(self) -> Optional[str]:
+        return max(self._days) if self._days else None
+
+    def mark_dirty(self) -> None:
+        self._dirty = True
+
+    def _needs_rebuild(self) -> bool:
+        return (
+            self._dirty
+            or self._built_at is None
+            or time.monotonic() - self._built_at > LEADERBOARD_MAX_AGE
+        )
+
+    def _day(self, date: str) -> DayBoard:
+        board = self._days.get(date)
+        if board is None:
+            board = self._days[date] = DayBoard()
+            for old in sorted(self._days)[:-_MAX_DAYS]:
+                del self._days[old]
+        return board
+
+    async def rebuild(self, pb: PocketBaseClient) -> None:
+        """Load the latest publishing day from PocketBase and resolve its top authors."""
+        async with self._lock:
+            await self._rebuild_locked(pb)
+
+    async def ensure_fresh(self, pb: PocketBaseClient) -> None:
+        """Rebuild if dirty or too old; concurrent callers share one rebuild."""
+        if not self._needs_rebuild():
+            return
+        async with self._lock:
+            if self._needs_rebuild():
+                await self._rebuild_locked(pb)
+
+    async def _rebuild_locked(self, pb: PocketBaseClient) -> None:
+        latest = await pb.get_list(
+            "published_editions",
+            per_page=1,
+            sort="-date",
+            fields="date",
+            skip_total=True,
+            raise_on_error=True,
+        )
+        days: Dict[str, DayBoard] = {}
+        if latest and latest[0].get("date"):
+            raw_date = latest[0]["date"]
+            editions = await pb.get_full_list(
+                "published_editions",
+                filter=f'date = "{raw_date}"',
+                sort="-published_at",
+                fields=_EDITION_FIELDS,
+                raise_on_error=True,
+            )
+            board = DayBoard()
+            for edition in editions:
+                board.add(_edition_entry(edition), self.k)
+            days[_date_key(raw_date)] = board
+        self._days = days
+        # Refresh display data too (e.g. changed emails)
+        self._user_emails = {}
+        pending, self._pending = self._pending, []
+        for edition, user_email in pending:
+            self._apply(edition, user_email)
+        self._built_at = time.monotonic()
+        self._dirty = False
+        self.rebuilds += 1
+        await self._resolve_users(pb, self._top_user_ids())
+
+    def _top_user_ids(self) -> Set[str]:
+        date = self.latest_date
+        if not date:
+            return set()
+        return {entry["user"] for entry in self._days[date].entries.values() if entry["user"]}
+
+    async def _resolve_users(self, pb: PocketBaseClient, user_ids: Set[str]) -> None:
+        """Fetch emails for unknown users in one batched query."""
+        missing = [uid for uid in user_ids if uid not in self._user_emails]
+        if not missing:
+            return
+        id_filter = " || ".join(f'id = "{uid}"' for uid in missing)
+        try:
+            users = await pb.get_full_list("users", filter=id_filter, fields="id,email")
+        except Exception as e:
+            print(f"[Leaderboard] User lookup failed: {e}")
+            return
+        for user in users:
+            self._user_emails[user.get("id", "")] = user.get("email") or "Unknown"
+
+    def record_edition(self, edition: Dict[str, Any], user_email: Optional[str] = None) -> bool:
+        """Add a newly published edition (no I/O). Returns True if it entered its day's top K."""
+        if self._lock.locked():
+            self._pending.append((edition, user_email))
+        return self._apply(edition, user_email)
+
+    def _apply(self, edition: Dict[str, Any], user_email: Optional[str]) -> bool:
+        entry = _edition_entry(edition)
+        if not entry["date"]:
+            return False
+        if user_email and entry["user"]:
+            self._user_emails[entry["user"]] = user_email
+        return self._day(entry["date"]).add(entry, self.k)
+
+    async def top(self, pb: PocketBaseClient, n: int = 5) -> List[Dict[str, Any]]:
+        """Top n editions of the latest day, with user_email (rebuilds first if needed)."""
+        await self.ensure_fresh(pb)
+        date = self.latest_date
+        if not date:
+            return []
+        entries = self._days[date].top(n)
+        await self._resolve_users(pb, {e["user"] for e in entries if e["user"]})
+        return [
+            dict(entry, user_email=self._user_emails.get(entry["user"], "Unknown"))
+            for entry in entries
+        ]
+
+    async def user_rank(self, pb: PocketBaseClient, user_id: str, width: int = 2) -> Dict[str, Any]:
+        """
+        The user's best edition of the latest day: rank, percentile (share of the day's
+        other editions it beats) and up to `width` neighbours on each side.
+        """
+        await self.ensure_fresh(pb)
+        date = self.latest_date
+        board = self._days.get(date) if date else None
+        total = len(board.ranked) if board else 0
+        item = board.by_user.get(user_id) if board else None
+        if item is None:
+            return {"date": date, "total": total, "rank": None, "percentile": None, "edition": None, "neighbours": []}
+        rank = board.rank_of(item)
+        percentile = 100.0 if total <= 1 else round(100.0 * (total - rank) / (total - 1), 1)
+        window = board.around(rank, width)
+        await self._resolve_users(pb, {entry["user"] for _, entry in window if entry["user"]})
+
+        def with_email(r: int, entry: Dict[str, Any]) -> Dict[str, Any]:
+            return dict(entry, rank=r, user_email=self._user_emails.get(entry["user"], "Unknown"))
+
+        return {
+            "date": date,
+            "total": total,
+            "rank": rank,
+            "percentile": percentile,
+            "edition": with_email(rank, board.all[item[2]]),
+            "neighbours": [with_email(r, entry) for r, entry in window if r != rank],
+        }
+
+    def status(self) -> Dict[str, Any]:
+        date = self.latest_date
+        return {
+            "latest_date": date,
+            "editions_latest_day": len(self._days[date].all) if date else 0,
+            "rebuilds": self.rebuilds,
+            "age_seconds": round(time.monotonic() - self._built_at, 1) if self._built_at else None,
+        }
+
+
+# Process-wide leaderboard
+leaderboard_service = LeaderboardService()
+
+
+def _on_edition_change(action: str, record: Dict[str, Any]) -> None:
+    if action == "create":
+        leaderboard_service.record_edition(record)
+    else:
+        # Updates/deletes can move or remove heap entries: rebuild on next read
+        leaderboard_service.mark_dirty()
+
+
+add_listener("published_editions", _on_edition_change)
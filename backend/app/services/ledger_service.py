@@ -0,0 +1,84 @@
+"""
+Ledger Service - Append-only per-user treasury ledger.
+
+Recent transactions used to be derived by replaying a user's published editions oldest
+first and diffing consecutive stats.cash values: the query window started at the oldest
+edition (so it returned the wrong transactions once history outgrew it) and shop
+purchases never showed up. Every treasury change is now appended to the ledger
+collection when it happens - publish_edition (edition revenue or costs) and
+PUT /auth/game-state (shop purchases, other adjustments) - with the delta, the resulting
+balance and a description. Recent transactions are one `user = X` query sorted by
+-created (index on (user, created)) and bounded by the requested limit.
+
+The backend never updates or deletes entries. scripts/backfill_ledger.py seeds the
+ledger of players who published before it existed.
+"""
+import os
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+# Add parent directory to path to import lib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lib.pocketbase_client import PocketBaseClient
+
+
+COLLECTION = "ledger"
+
+KIND_EDITION = "edition"
+KIND_PURCHASE = "purchase"
+KIND_ADJUSTMENT = "adjustment"
+
+
+def edition_description(delta: float, newspaper_name: Optional[str]) -> str:
+    name = newspaper_name or "Newspaper"
+    return f"Revenue from {name}" if delta > 0 else f"Costs for {name}"
+
+
+def purchase_description(old_upgrades: Iterable[str], new_upgrades: Iterable[str]) -> Optional[str]:
+    """Description for newly purchased upgrades, or None if nothing was added."""
+    added = [u for u in dict.fromkeys(new_upgrades) if u not in set(old_upgrades)]
+    if not added:
+        return None
+    return "Purchased " + ", ".join(u.replace("_", " ").title() for u in added)
+
+
+class LedgerService:
+    async def append(
+        self,
+        pb: PocketBaseClient,
+        user_id: str,
+        delta: float,
+        balance: float,
+        kind: str,
+        description: str,
+        ref: str = "",
+        occurred_at: str = "",
+    ) -> Optional[Dict[str, Any]]:
+        """Append a treasury change (zero deltas are not recorded). Raises on failure."""
+        if not user_id or not delta:
+            return None
+        return await pb.create_record(COLLECTION, {
+            "user": user_id,
+            "delta": float(delta),
+            "balance": float(balance),
+            "kind": kind,
+            "description": description,
+            "ref": ref,
+            "occurred_at": occurred_at,
+        })
+
+    async def recent(self, pb: PocketBaseClient, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        """The user's `limit` most recent entries, newest first."""
+        return await pb.get_list(
+            COLLECTION,
+            filter=f'user = "{user_id}"',
+            sort="-created,-id",
+            per_page=limit,
+            skip_total=True,
+            raise_on_error=True,
+        )
+
+
+# Process-wide service
+ledger_service = LedgerService()
@@ -0,0 +1,372 @@
+"""
+Realtime Service - Subscribes to PocketBase record changes over SSE.
+
+PocketBase exposes a Server-Sent Events API at /api/realtime. This service keeps one
+background connection open, subscribes to the collections we keep local state for
+(articles, published_editions, user_achievements, achievements, users) and fans every change out to
+in-process listeners, so caches and aggregates can update incrementally instead of
+re-querying PocketBase.
+
+When the connection drops, the subscriber reconnects with exponential backoff and
+catches up by listing records whose `updated` timestamp is newer than the last event
+it saw for each collection (deletes that happen while disconnected cannot be replayed).
+Collections start from the time of the first connection (minus a small clock-skew
+margin), so changes are replayed even for collections that had no event before the
+stream dropped.
+"""
+import asyncio
+import inspect
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Callable
+
+import httpx
+
+# Add parent directory to path to import lib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lib.pocketbase_client import PocketBaseClient
+from lib.record_cache import record_cache
+
+
+# Collections we keep local state for
+REALTIME_COLLECTIONS = ["articles", "published_editions", "user_achievements", "achievements", "users"]
+
+# Reconnect backoff (seconds)
+_BACKOFF_INITIAL = 1.0
+_BACKOFF_MAX = 60.0
+
+# Catch-up starts this far before the first connection (clock skew with PocketBase)
+_CATCH_UP_SKEW = timedelta(seconds=5)
+
+# Listener signature: callback(action, record) where action is "create" | "update" | "delete".
+# Callbacks may be sync or async.
+Listener = Callable[[str, Dict[str, Any]], Any]
+
+
+class RealtimeSubscriber:
+    """Background SSE subscriber with reconnect, catch-up and listener fan-out."""
+
+    def __init__(
+        self,
+        pb_client: PocketBaseClient,
+        collections: Optional[List[str]] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.pb = pb_client
+        self.collections = list(collections or REALTIME_COLLECTIONS)
+        self._transport = transport
+        self._listeners: Dict[str, List[Listener]] = {c: [] for c in self.collections}
+        # Last seen `updated` timestamp per collection (resume point for catch-up)
+        self._last_seen: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.connected = False
+        self.client_id: Optional[str] = None
+        self.events_received = 0
+        self.reconnects = 0
+
+    def add_listener(self, collection: str, callback: Listener) -> None:
+        """Register callback(action, record) for changes in a collection."""
+        self._listeners.setdefault(collection, []).append(callback)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        self.connected = False
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "collections": self.collections,
+            "events_received": self.events_received,
+            "reconnects": self.reconnects,
+            "last_seen": dict(self._last_seen),
+        }
+
+    async def _run(self) -> None:
+        backoff = _BACKOFF_INITIAL
+        first = True
+        while not self._stopping:
+            try:
+                await self._listen(catch_up=not first)
+                # Server closed the stream cleanly: reconnect right away
+                backoff = _BACKOFF_INITIAL
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Realtime] Connection error: {e} (retry in {backoff:.0f}s)")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, _BACKOFF_MAX)
+            finally:
+                self.connected = False
+            first = False
+            self.reconnects += 1
+
+    async def _listen(self, catch_up: bool) -> None:
+        """Open the SSE stream, subscribe on PB_CONNECT and dispatch events until it closes."""
+        base_url = self.pb.base_url
+        # No read timeout: the stream is idle between events
+        timeout = httpx.Timeout(10.0, read=None)
+        async with httpx.AsyncClient(base_url=base_url, timeout=timeout, transport=self._transport) as client:
+            async with client.stream("GET", "/api/realtime", headers={"Accept": "text/event-stream"}) as response:
+                if response.status_code != 200:
+                    raise Exception(f"realtime stream returned {response.status_code}")
+                async for event_name, data in _iter_sse(response):
+                    if event_name == "PB_CONNECT":
+                        self.client_id = (data or {}).get("clientId")
+                        self._seed_last_seen()
+                        await self._subscribe(client)
+                        self.connected = True
+                        print(f"[Realtime] Connected, subscribed to {', '.join(self.collections)}")
+                        if catch_up:
+                            await self._catch_up()
+                        continue
+                    collection = event_name.split("/", 1)[0]
+                    if collection not in self._listeners or not isinstance(data, dict):
+                        continue
+                    await self._dispatch(collection, data.get("action", ""), data.get("record") or {})
+
+    def _seed_last_seen(self) -> None:
+        """Resume point for collections that have not had an event yet (first connection)."""
+        since = _pb_timestamp(datetime.now(timezone.utc) - _CATCH_UP_SKEW)
+        for collection in self.collections:
+            self._last_seen.setdefault(collection, since)
+
+    async def _subscribe(self, client: httpx.AsyncClient) -> None:
+        # The subscriber outlives admin tokens: refresh before each (re)subscribe
+        await self.pb._ensure_admin_token()
+        response = await self._post_subscriptions(client)
+        if response.status_code in (401, 403) and self.pb._admin_credentials:
+            stale_token = self.pb.admin_token
+            self.pb.admin_token = None
+            await self.pb._ensure_admin_token()
+            if self.pb.admin_token and self.pb.admin_token != stale_token:
+                response = await self._post_subscriptions(client)
+        if response.status_code not in (200, 204):
+            raise Exception(f"realtime subscribe failed: {response.status_code} - {response.text[:200]}")
+
+    async def _post_subscriptions(self, client: httpx.AsyncClient) -> httpx.Response:
+        headers = {}
+        if self.pb.admin_token:
+            headers["Authorization"] = f"Bearer {self.pb.admin_token}"
+        return await client.post(
+            "/api/realtime",
+            json={"clientId": self.client_id, "subscriptions": [f"{c}/*" for c in self.collections]},
+            headers=headers,
+        )
+
+    async def _catch_up(self) -> None:
+        """Replay creates/updates missed while disconnected (newer than the last seen `updated`)."""
+        # Deletes can't be replayed: drop cached article lists so they are re-read
+        record_cache.invalidate_queries("articles")
+        for collection in self.collections:
+            since = self._last_seen.get(collection)
+            if not since:
+                continue
+            try:
+                missed = await self.pb.get_full_list(
+                    collection,
+                    filter=f'updated > "{since}"',
+                    sort="updated",
+                )
+            except Exception as e:
+                print(f"[Realtime] Catch-up for {collection} failed: {e}")
+                continue
+            if missed:
+                print(f"[Realtime] Catching up {len(missed)} {collection} change(s) since {since}")
+            for record in missed:
+                action = "create" if record.get("created") == record.get("updated") else "update"
+                await self._dispatch(collection, action, record)
+
+    async def _dispatch(self, collection: str, action: str, record: Dict[str, Any]) -> None:
+        self.events_received += 1
+        updated = record.get("updated")
+        if updated and updated > self._last_seen.get(collection, ""):
+            self._last_seen[collection] = updated
+        for callback in list(self._listeners.get(collection, [])):
+            try:
+                result = callback(action, record)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"[Realtime] Listener for {collection} failed: {e}")
+
+
+def _pb_timestamp(dt: datetime) -> str:
+    """PocketBase datetime string ("2026-01-31 12:00:00.123Z", UTC) for filters."""
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] + "Z"
+
+
+async def _iter_sse(response: httpx.Response):
+    """Yield (event_name, data) pairs from a text/event-stream response."""
+    event_name = "message"
+    data_lines: List[str] = []
+    async for line in response.aiter_lines():
+        if line == "":
+            if data_lines:
+                raw = "\n".join(data_lines)
+                try:
+                    data = json.loads(raw)
+                except ValueError:
+                    data = raw
+                yield event_name, data
+            event_name = "message"
+            data_lines = []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "event":
+            event_name = value
+        elif field == "data":
+            data_lines.append(value)
+
+
+def _invalidate_cached_article(action: str, record: Dict[str, Any]) -> None:
+    """Keep the record cache in sync with article changes made outside this process."""
+    if action == "create":
+        record_cache.invalidate_queries("articles")
+    else:
+        record_cache.invalidate("articles", record.get("id"))
+
+
+class LocalSSEEmitter(httpx.AsyncBaseTransport):
+    """
+    Stand-in for the PocketBase realtime API, for exercising RealtimeSubscriber locally
+    without a PocketBase instance. Pass it as `transport` (and to the PocketBaseClient's
+    httpx client for catch-up lists), then call emit() to push record events.
+    """
+
+    def __init__(self, client_id: str = "local-client"):
+        self.client_id = client_id
+        self.subscriptions: List[str] = []
+        self.records: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+
+    def change(self, collection: str, action: str, record: Dict[str, Any]) -> None:
+        """Change a stored record without an event (as if made while the stream was down)."""
+        store = self.records.setdefault(collection, {})
+        if action == "delete":
+            store.pop(record.get("id"), None)
+        else:
+            store[record.get("id")] = record
+
+    def emit(self, collection: str, action: str, record: Dict[str, Any]) -> None:
+        """Store the record (for catch-up lists) and push it to the open stream."""
+        self.change(collection, action, record)
+        payload = json.dumps({"action": action, "record": record})
+        self._queue.put_nowait(f"event: {collection}/*\ndata: {payload}\n\n".encode())
+
+    def disconnect(self) -> None:
+        """Close the current stream (the subscriber will reconnect)."""
+        self._queue.put_nowait(None)
+
+    async def _stream(self):
+        yield f"event: PB_CONNECT\ndata: {json.dumps({'clientId': self.client_id})}\n\n".encode()
+        while True:
+            chunk = await self._queue.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path == "/api/realtime" and request.method == "GET":
+            return httpx.Response(
+                200,
+                headers={"Content-Type": "text/event-stream"},
+                stream=_AsyncByteStream(self._stream()),
+            )
+        if path == "/api/realtime" and request.method == "POST":
+            body = json.loads(request.content or b"{}")
+            self.subscriptions = body.get("subscriptions", [])
+            return httpx.Response(204)
+        if path.startswith("/api/collections/") and path.endswith("/records") and request.method == "GET":
+            collection = path.split("/")[3]
+            items = sorted(self.records.get(collection, {}).values(), key=lambda r: r.get("updated", ""))
+            since = _filter_since(request.url.params.get("filter", ""))
+            if since:
+                items = [r for r in items if r.get("updated", "") > since]
+            return httpx.Response(200, json={"items": items})
+        return httpx.Response(404, json={"message": "not found"})
+
+
+class _AsyncByteStream(httpx.AsyncByteStream):
+    def __init__(self, generator):
+        self._generator = generator
+
+    async def __aiter__(self):
+        async for chunk in self._generator:
+            yield chunk
+
+
+def _filter_since(filter_expr: str) -> Optional[str]:
+    """Extract the timestamp from an `updated > "..."` filter (LocalSSEEmitter catch-up)."""
+    if filter_expr.startswith("updated >"):
+        return filter_expr.split('"')[1] if '"' in filter_expr else None
+    return None
+
+
+# Process-wide subscriber (started from main.py startup unless REALTIME_ENABLED=false)
+_subscriber: Optional[RealtimeSubscriber] = None
+
+# Listeners registered at import time, before the subscriber exists
+_registered_listeners: List[tuple] = [("articles", _invalidate_cached_article)]
+
+
+def get_subscriber() -> Optional[RealtimeSubscriber]:
+    return _subscriber
+
+
+def add_listener(collection: str, callback: Listener) -> None:
+    """Register a listener on the process-wide subscriber (kept until it starts)."""
+    _registered_listeners.append((collection, callback))
+    if _subscriber is not None:
+        _subscriber.add_listener(collection, callback)
+
+
+async def start_realtime_subscriber() -> Optional[RealtimeSubscriber]:
+    """Authenticate as admin and start the background subscriber."""
+    global _subscriber
+    if os.getenv("REALTIME_ENABLED", "true").lower() == "false":
+        print("[Realtime] Subscriber disabled (REALTIME_ENABLED=false)")
+        return None
+    if _subscriber is not None:
+        return _subscriber
+    admin_email = os.getenv("POCKETBASE_ADMIN_EMAIL", "")
+    admin_password = os.getenv("POCKETBASE_ADMIN_PASSWORD", "")
+    if not admin_email or not admin_password:
+        print("[Realtime] Subscriber not started: POCKETBASE_ADMIN_EMAIL/PASSWORD not set")
+        return None
+    pb = PocketBaseClient(base_url=os.getenv("POCKETBASE_URL", "http://127.0.0.1:8090"))
+    if not await pb.authenticate_admin(admin_email, admin_password):
+        print("[Realtime] Subscriber not started: admin authentication failed")
+        return None
+    _subscriber = RealtimeSubscriber(pb)
+    for collection, callback in _registered_listeners:
+        _subscriber.add_listener(collection, callback)
+    _subscriber.start()
+    return _subscriber
+
+
+async def stop_realtime_subscriber() -> None:
+    global _subscriber
+    if _subscriber is not None:
+        await _subscriber.stop()
+        _subscriber = None
@@ -0,0 +1,308 @@
+"""
+User Stats Service - Per-user materialized aggregates in the user_stats collection.
+
+Endpoints that summarize a player's whole history (audience impact, influence map, ...)
+used to re-read every published edition and fetch every placed article on each request,
+so their cost grew with play history. Instead, one user_stats record per user holds the
+totals: publish_edition applies the delta of the new edition (one batched article query)
+and the endpoints do a single record read.
+
+Influence counts each published article once per country, overall and in per-day
+buckets (the last INFLUENCE_DAYS_KEPT days) for windowed queries such as "last 7 days".
+The stats snapshot of the achievement engine (streaks, row / variant counts, location
+bitmap, tag set, ...) is folded in here as well (see app/services/achievement_engine.py).
+
+Records are rebuilt from the edition history when missing or written by an older
+STATS_VERSION (first request after an upgrade), and by scripts/rebuild_user_stats.py
+(backfill / repair). Updates are a read-modify-write, serialized per user within this
+process; last_edition makes applying the same edition twice a no-op.
+
+Faction totals are also kept in memory per user (AUDIENCE_CACHE_TTL seconds, refreshed
+on every save), so the draft layout preview costs no PocketBase round trip.
+"""
+import asyncio
+import os
+import sys
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Add parent directory to path to import lib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lib.pocketbase_client import PocketBaseClient
+from lib.json_codec import decode_record_field
+from lib.record_cache import _LRU
+from lib.records import placed_items
+from app.services import achievement_engine
+from app.services.audience_store import FACTIONS, VARIANTS, audience_store, faction_dict
+
+
+COLLECTION = "user_stats"
+
+# Bump when an aggregate is added or its meaning changes: older records are rebuilt
+STATS_VERSION = 4
+
+# Days of per-day influence buckets kept on the record
+INFLUENCE_DAYS_KEPT = int(os.getenv("INFLUENCE_DAYS_KEPT", "90"))
+# Publishing days whose article ids are remembered so an article placed in several
+# editions counts once (articles stay in the feed for at most two calendar days)
+_SEEN_DAYS = 2
+
+_ARTICLE_FIELDS = "id,audience_scores,country_code,location_city,tags,sentiment"
+
+# Seconds a user's faction totals are served from memory (records rebuilt by
+# scripts/rebuild_user_stats.py show up after at most this long)
+AUDIENCE_CACHE_TTL = float(os.getenv("AUDIENCE_CACHE_TTL", "300"))
+AUDIENCE_CACHE_MAX_USERS = 10000
+
+# Article ids per batched `id = ... || id = ...` query (keeps the URL short)
+_ID_BATCH = 50
+
+
+def empty_audience() -> Dict[str, int]:
+    return {faction: 0 for faction in FACTIONS}
+
+
+def placed_articles(grid_layout: Any) -> List[Tuple[str, str]]:
+    """(article_id, variant) for every article (not ad) placed in an edition."""
+    return [
+        (item.article_id, item.variant)
+        for item in placed_items(grid_layout)
+        if not item.is_ad and item.article_id and item.variant in VARIANTS
+    ]
+
+
+async def fetch_articles(
+    pb: PocketBaseClient, article_ids: Iterable[str], fields: str = _ARTICLE_FIELDS
+) -> Dict[str, Dict[str, Any]]:
+    """Fetch articles by id in batched queries; missing (deleted) articles are left out."""
+    unique = list(dict.fromkeys(a for a in article_ids if a))
+    articles: Dict[str, Dict[str, Any]] = {}
+    for i in range(0, len(unique), _ID_BATCH):
+        chunk = unique[i:i + _ID_BATCH]
+        id_filter = " || ".join(f'id = "{article_id}"' for article_id in chunk)
+        records = await pb.get_list(
+            "articles",
+            filter=id_filter,
+            fields=fields,
+            per_page=len(chunk),
+            skip_total=True,
+            raise_on_error=True,
+        )
+        for record in records:
+            articles[record.get("id", "")] = record
+    return articles
+
+
+def add_audience(totals: Dict[str, int], placed: List[Tuple[str, str]], articles: Dict[str, Dict[str, Any]]) -> None:
+    """Add the faction scores of the published variants to totals (in place)."""
+    projected = audience_store.project(placed, articles)
+    for faction, value in zip(FACTIONS, projected):
+        totals[faction] += int(value)
+
+
+def stored_audience(record: Dict[str, Any]) -> Dict[str, int]:
+    """Faction totals of a user_stats record (all factions present)."""
+    totals = empty_audience()
+    stored = decode_record_field(record, "audience", {})
+    if isinstance(stored, dict):
+        for faction in FACTIONS:
+            try:
+                totals[faction] = int(stored.get(faction, 0) or 0)
+            except (ValueError, TypeError):
+                pass
+    return totals
+
+
+def _date_key(value: Any) -> str:
+    """YYYY-MM-DD of a PocketBase date ("2026-01-31 00:00:00.000Z") or ISO date."""
+    return str(value or "")[:10]
+
+
+def empty_influence() -> Dict[str, Any]:
+    # countries: {code: count}, days: {YYYY-MM-DD: {code: count}}, seen: {YYYY-MM-DD: [article ids]}
+    return {"countries": {}, "days": {}, "seen": {}}
+
+
+def add_influence(
+    influence: Dict[str, Any], day: str, placed: List[Tuple[str, str]], articles: Dict[str, Dict[str, Any]]
+) -> None:
+    """Count the edition's not yet counted articles per country (in place)."""
+    seen = influence["seen"]
+    counted = {article_id for ids in seen.values() for article_id in ids}
+    seen_today = seen.setdefault(day, [])
+    for article_id, _ in placed:
+        if article_id in counted:
+            continue
+        counted.add(article_id)
+        seen_today.append(article_id)
+        country_code = (articles.get(article_id) or {}).get("country_code") or "XX"
+        if country_code == "XX":
+            continue
+        countries = influence["countries"]
+        countries[country_code] = countries.get(country_code, 0) + 1
+        bucket = influence["days"].setdefault(day, {})
+        bucket[country_code] = bucket.get(country_code, 0) + 1
+    for old in sorted(seen)[:-_SEEN_DAYS]:
+        del seen[old]
+    for old in sorted(influence["days"])[:-INFLUENCE_DAYS_KEPT]:
+        del influence["days"][old]
+
+
+def stored_influence(record: Dict[str, Any]) -> Dict[str, Any]:
+    stored = decode_record_field(record, "influence", {})
+    influence = empty_influence()
+    if isinstance(stored, dict):
+        for key in influence:
+            if isinstance(stored.get(key), dict):
+                influence[key] = stored[key]
+    return influence
+
+
+def influence_counts(influence: Dict[str, Any], days: Optional[int] = None) -> Dict[str, int]:
+    """Article counts per country, overall or for the last `days` days (today included)."""
+    if days is None:
+        return dict(influence["countries"])
+    since = (date.today() - timedelta(days=days - 1)).isoformat()
+    counts: Dict[str, int] = {}
+    for day, bucket in influence["days"].items():
+        if day >= since:
+            for country_code, count in bucket.items():
+                counts[country_code] = counts.get(country_code, 0) + count
+    return counts
+
+
+def _add_edition(
+    aggregates: Dict[str, Any], edition: Dict[str, Any], articles: Dict[str, Dict[str, Any]]
+) -> None:
+    placed = placed_articles(edition.get("grid_layout"))
+    add_audience(aggregates["audience"], placed, articles)
+    add_influence(aggregates["influence"], _date_key(edition.get("date") or edition.get("published_at")), placed, articles)
+    achievement_engine.apply_edition(aggregates["snapshot"], edition, articles)
+
+
+class UserStatsService:
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._audience = _LRU(AUDIENCE_CACHE_TTL, AUDIENCE_CACHE_MAX_USERS)
+
+    def _lock(self, user_id: str) -> asyncio.Lock:
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = self._locks[user_id] = asyncio.Lock()
+        return lock
+
+    async def _find(self, pb: PocketBaseClient, user_id: str) -> Optional[Dict[str, Any]]:
+        records = await pb.get_list(
+            COLLECTION,
+            filter=f'user = "{user_id}"',
+            per_page=1,
+            skip_total=True,
+            raise_on_error=True,
+        )
+        return records[0] if records else None
+
+    async def _save(
+        self, pb: PocketBaseClient, user_id: str, record: Optional[Dict[str, Any]], data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        if record:
+            saved = await pb.update_record(COLLECTION, record["id"], data)
+            if saved is None:
+                raise Exception(f"Failed to update {COLLECTION} for user {user_id}")
+        else:
+            saved = await pb.create_record(COLLECTION, dict(data, user=user_id))
+        self._audience.put(user_id, stored_audience(saved))
+        return saved
+
+    @staticmethod
+    def _is_current(record: Optional[Dict[str, Any]]) -> bool:
+        return record is not None and int(record.get("version", 0) or 0) == STATS_VERSION
+
+    async def get(self, pb: PocketBaseClient, user_id: str) -> Dict[str, Any]:
+        """The user's stats record, built from history if missing or outdated."""
+        record = await self._find(pb, user_id)
+        if self._is_current(record):
+            self._audience.put(user_id, stored_audience(record))
+            return record
+        return await self.rebuild(pb, user_id)
+
+    async def rebuild(self, pb: PocketBaseClient, user_id: str) -> Dict[str, Any]:
+        """Recompute the user's aggregates from their full edition history."""
+        async with self._lock(user_id):
+            editions = await pb.get_full_list(
+                "published_editions",
+                filter=f'user = "{user_id}"',
+                sort="published_at,id",
+                fields="id,date,grid_layout,stats,published_at",
+                raise_on_error=True,
+            )
+            articles = await fetch_articles(
+                pb, (a for e in editions for a, _ in placed_articles(e.get("grid_layout")))
+            )
+            aggregates = {
+                "audience": empty_audience(),
+                "influence": empty_influence(),
+                "snapshot": achievement_engine.empty_state(),
+            }
+            for edition in editions:
+                _add_edition(aggregates, edition, articles)
+            data = {
+                **aggregates,
+                "editions": len(editions),
+                "last_edition": editions[-1].get("id", "") if editions else "",
+                "version": STATS_VERSION,
+            }
+            return await self._save(pb, user_id, await self._find(pb, user_id), data)
+
+    async def apply_edition(self, pb: PocketBaseClient, edition: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Add a newly published edition to its author's aggregates."""
+        user_id = edition.get("user")
+        edition_id = edition.get("id")
+        if not user_id or not edition_id:
+            return None
+        async with self._lock(user_id):
+            record = await self._find(pb, user_id)
+            if self._is_current(record):
+                if record.get("last_edition") == edition_id:
+                    return record
+                placed = placed_articles(edition.get("grid_layout"))
+                articles = await fetch_articles(pb, (a for a, _ in placed))
+                aggregates = {
+                    "audience": stored_audience(record),
+                    "influence": stored_influence(record),
+                    "snapshot": achievement_engine.stored_state(record.get("snapshot")),
+                }
+                _add_edition(aggregates, edition, articles)
+                data = {
+                    **aggregates,
+                    "editions": int(record.get("editions", 0) or 0) + 1,
+                    "last_edition": edition_id,
+                    "version": STATS_VERSION,
+                }
+                return await self._save(pb, user_id, record, data)
+        # No (current) aggregate yet: the rebuild includes this edition
+        return await self.rebuild(pb, user_id)
+
+    async def audience_totals(self, pb: PocketBaseClient, user_id: str) -> Dict[str, int]:
+        totals = self._audience.get(user_id)
+        if totals is None:
+            totals = stored_audience(await self.get(pb, user_id))
+        return dict(totals)
+
+    async def preview_audience(
+        self, pb: PocketBaseClient, user_id: str, placed: List[Tuple[str, str]]
+    ) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """(current totals, delta) if an edition with these placements were published."""
+        missing = audience_store.missing(article_id for article_id, _ in placed)
+        if missing:
+            # Usually none: feed articles are stored when the feed is built
+            audience_store.put_many((await fetch_articles(pb, missing, fields="id,audience_scores")).values())
+        delta = faction_dict(audience_store.project(placed))
+        return await self.audience_totals(pb, user_id), delta
+
+    async def influence(self, pb: PocketBaseClient, user_id: str, days: Optional[int] = None) -> Dict[str, int]:
+        return influence_counts(stored_influence(await self.get(pb, user_id)), days)
+
+
+# Process-wide service
+user_stats_service = UserStatsService()
@@ -0,0 +1,96 @@
+"""
+Opaque keyset cursors for paginated list endpoints.
+
+A cursor encodes the sort key of the last item of a page, normally (published_at, id).
+The next page is everything strictly after that key in the endpoint's order, so pages
+stay consistent while new records are inserted and cost the same no matter how deep
+the client pages (no OFFSET scans). Clients treat cursors as opaque strings: they get
+one in the X-Next-Cursor header (and `next_cursor` where the body is an object) and
+pass it back as ?cursor=...
+"""
+import base64
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Page size bounds shared by paginated endpoints
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def encode_cursor(*key: Any) -> str:
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, parts: int = 2) -> Tuple[str, ...]:
+    """Decode a cursor into its key parts; 400 if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(key, list) or len(key) != parts or not all(isinstance(k, str) for k in key):
+            raise ValueError("unexpected cursor shape")
+        return tuple(key)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def keyset_filter(cursor: Optional[str], field: str = "published_at") -> Optional[str]:
+    """
+    PocketBase filter for the records after `cursor` in "-field,-id" order
+    (newest first, id as tie-breaker).
+    """
+    if not cursor:
+        return None
+    value, record_id = decode_cursor(cursor)
+    return f"({field} < {_quote(value)} || ({field} = {_quote(value)} && id < {_quote(record_id)}))"
+
+
+def combine_filters(*filters: Optional[str]) -> Optional[str]:
+    parts = [f"({f})" for f in filters if f]
+    return " && ".join(parts) if parts else None
+
+
+def page_records(
+    records: List[Dict[str, Any]], limit: int, field: str = "published_at"
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Split a `limit + 1` fetch into the page and the cursor for the next one
+    (None when this is the last page).
+    """
+    if len(records) <= limit:
+        return records, None
+    page = records[:limit]
+    last = page[-1]
+    return page, encode_cursor(str(last.get(field) or ""), str(last.get("id") or ""))
+
+
+def page_after(keys: Sequence[Tuple[str, str]], cursor: Optional[str]) -> int:
+    """
+    Index of the first item after `cursor` in a list sorted by key descending
+    (in-memory counterpart of keyset_filter; binary search).
+    """
+    if not cursor:
+        return 0
+    key = decode_cursor(cursor)
+    lo, hi = 0, len(keys)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if keys[mid] >= key:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
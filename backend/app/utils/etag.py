@@ -0,0 +1,72 @@
+"""
+ETag / If-None-Match helpers for read endpoints.
+
+ETags are strong validators derived from what a response is built from: the encoded
+body when it is cached (feed snapshot), or the (id, updated) pairs of the underlying
+PocketBase records plus any other inputs. When the client's If-None-Match matches,
+the endpoint answers 304 Not Modified without building or serializing the payload.
+Validators of compressed representations ("<etag>-gzip") match their identity ETag.
+"""
+import hashlib
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+
+# Clients may reuse a cached copy but must revalidate it first
+DEFAULT_CACHE_CONTROL = "private, no-cache"
+
+_ENCODING_SUFFIXES = ('-gzip"', '-br"')
+
+
+def compute_etag(*parts: Any) -> str:
+    """Strong ETag from version parts (ids, updated timestamps, counters, ...)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(repr(part).encode())
+        digest.update(b"\x1f")
+    return f'"{digest.hexdigest()}"'
+
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag for an already-encoded response body."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def record_versions(records: Iterable[Dict[str, Any]]) -> Tuple[Tuple[Any, Any], ...]:
+    """(id, updated) per record: changes whenever a record is added, removed or edited."""
+    return tuple((r.get("id"), r.get("updated")) for r in records if isinstance(r, dict))
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match contains etag (or *)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # If-None-Match uses weak comparison (RFC 9110 13.1.2)
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        # Compressed representations carry an encoding suffix (see app/utils/responses.py)
+        for suffix in _ENCODING_SUFFIXES:
+            if candidate.endswith(suffix):
+                candidate = candidate[:-len(suffix)] + '"'
+                break
+        if candidate == etag:
+            return True
+    return False
+
+
+def set_etag(response: Response, etag: str, cache_control: Optional[str] = DEFAULT_CACHE_CONTROL) -> None:
+    response.headers["ETag"] = etag
+    if cache_control:
+        response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(etag: str, cache_control: Optional[str] = DEFAULT_CACHE_CONTROL) -> Response:
+    response = Response(status_code=304)
+    set_etag(response, etag, cache_control)
+    return response
@@ -0,0 +1,165 @@
+"""
+Pre-serialized, compressed JSON responses for large read endpoints.
+
+Feed, articles and achievements bodies are big (every scoop carries three variant
+texts) and identical for as long as their inputs are. An EncodedBody holds the JSON
+bytes of one response (encoded once with lib/json_codec) and lazily caches their
+gzip / brotli encodings, so a repeated request costs neither model validation,
+serialization nor compression. Endpoints without a long-lived snapshot keep their
+bodies in response_cache, keyed by the same version parts that make up their ETag.
+
+Content negotiation follows Accept-Encoding (brotli preferred when the optional
+`brotli` package is installed). Each encoding is a separate representation and gets
+its own ETag suffix ("<etag>-gzip"); etag_matches() accepts any of them.
+"""
+import gzip
+import os
+from typing import Dict, Hashable, Optional
+
+from fastapi import Request, Response
+
+from lib.json_codec import dumps_bytes
+from lib.record_cache import _LRU
+from app.utils.etag import DEFAULT_CACHE_CONTROL, body_etag, etag_matches, not_modified, set_etag
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+
+# Bodies smaller than this are sent uncompressed (not worth the CPU / header overhead)
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Encoded bodies kept by response_cache, and for how long
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+
+# Preferred first
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class EncodedBody:
+    """JSON response bytes plus their compressed encodings (computed on first use)."""
+
+    __slots__ = ("body", "etag", "headers", "_encoded")
+
+    def __init__(self, body: bytes, etag: Optional[str] = None, headers: Optional[Dict[str, str]] = None):
+        self.body = body
+        self.etag = etag or body_etag(body)
+        # Extra response headers (e.g. X-Next-Cursor)
+        self.headers = dict(headers or {})
+        self._encoded: Dict[str, bytes] = {}
+
+    @classmethod
+    def from_data(cls, data, etag: Optional[str] = None, headers: Optional[Dict[str, str]] = None) -> "EncodedBody":
+        return cls(dumps_bytes(data), etag, headers)
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        if not encoding or len(self.body) < MIN_COMPRESS_SIZE:
+            return self.body
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = _compress(self.body, encoding)
+        return data
+
+
+def negotiate_encoding(request: Request) -> Optional[str]:
+    """Best supported encoding the client accepts (q > 0), or None for identity."""
+    header = request.headers.get("accept-encoding", "")
+    if not header:
+        return None
+    accepted: Dict[str, float] = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in SUPPORTED_ENCODINGS:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0:
+            return encoding
+    return None
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """ETag of one representation: "<etag>-<encoding>" for compressed bodies."""
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+def json_response(
+    request: Request,
+    body: EncodedBody,
+    cache_control: Optional[str] = DEFAULT_CACHE_CONTROL,
+    status_code: int = 200,
+) -> Response:
+    """Response for an encoded body: 304 on a matching ETag, else the negotiated encoding."""
+    encoding = negotiate_encoding(request) if len(body.body) >= MIN_COMPRESS_SIZE else None
+    etag = encoded_etag(body.etag, encoding)
+    if etag_matches(request, body.etag):
+        return not_modified(etag, cache_control)
+    response = Response(content=body.encoded(encoding), status_code=status_code, media_type="application/json")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Vary"] = "Accept-Encoding"
+    for name, value in body.headers.items():
+        response.headers[name] = value
+    set_etag(response, etag, cache_control)
+    return response
+
+
+class ResponseCache:
+    """Bounded LRU of key -> EncodedBody, for bodies rebuilt from versioned inputs."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl: float = RESPONSE_CACHE_TTL):
+        self.enabled = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() != "false"
+        self._lru = _LRU(ttl, max_entries)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[EncodedBody]:
+        if not self.enabled:
+            return None
+        body = self._lru.get(key)
+        if body is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return body
+
+    def put(self, key: Hashable, body: EncodedBody) -> EncodedBody:
+        if self.enabled:
+            self._lru.put(key, body)
+        return body
+
+    def clear(self) -> None:
+        self._lru.clear()
+
+    def stats(self) -> Dict[str, object]:
+        """Hit/miss counters, hit ratio and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._lru),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "encodings": list(SUPPORTED_ENCODINGS),
+        }
+
+
+# Process-wide cache of encoded response bodies
+response_cache = ResponseCache()
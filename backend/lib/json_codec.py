@@ -0,0 +1,119 @@
+"""
+Central JSON codec for PocketBase payloads and JSON fields.
+
+Uses orjson when it is installed (several times faster than the stdlib for both
+directions) and falls back to the json module otherwise.
+
+PocketBase JSON fields (processed_variants, tags, audience_scores, grid_layout, stats,
+purchased_upgrades) used to be written as JSON *strings*, so older records hold a string
+(sometimes a double-encoded one) instead of a native value. decode_field() accepts all
+three shapes. decode_record_field() additionally memoizes the decoded value per
+(record id, updated, field): a record's `updated` timestamp changes on every write, so
+a cached entry can never be stale, and hot endpoints decode each record once instead of
+on every request.
+
+Memoized values are shared between callers and must be treated as read-only.
+"""
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+
+# Decoded JSON field values kept in memory (one entry per record field)
+MAX_MEMO_ENTRIES = 20000
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON from str or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(value: Any) -> str:
+    """Serialize to a compact JSON string."""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def dumps_bytes(value: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes (for response bodies)."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def decode_field(value: Any, default: Any = None) -> Any:
+    """
+    Decode a PocketBase JSON field value: native values are returned as-is, JSON strings
+    (including double-encoded ones) are parsed. Returns `default` for empty or invalid values.
+    """
+    if value is None or value == "":
+        return default
+    # At most two rounds: legacy rows were json.dumps'ed twice before being stored
+    for _ in range(2):
+        if not isinstance(value, (str, bytes)):
+            return value
+        try:
+            value = loads(value)
+        except ValueError:
+            return default
+    return default if isinstance(value, (str, bytes)) else value
+
+
+_memo: "OrderedDict[Tuple[Hashable, ...], Any]" = OrderedDict()
+_memo_hits = 0
+_memo_misses = 0
+
+
+def decode_record_field(record: Dict[str, Any], field: str, default: Any = None) -> Any:
+    """
+    decode_field() for record[field], memoized per (id, updated, field).
+
+    Native values need no parsing and are returned directly; records without id/updated
+    (e.g. projected lists) are decoded without memoization.
+    """
+    global _memo_hits, _memo_misses
+    value = record.get(field)
+    if not isinstance(value, (str, bytes)):
+        return default if value is None else value
+    record_id = record.get("id")
+    updated = record.get("updated")
+    if not record_id or not updated:
+        return decode_field(value, default)
+    key = (record_id, updated, field)
+    if key in _memo:
+        _memo_hits += 1
+        _memo.move_to_end(key)
+        decoded = _memo[key]
+        return default if decoded is None else decoded
+    _memo_misses += 1
+    decoded = decode_field(value, None)
+    _memo[key] = decoded
+    if len(_memo) > MAX_MEMO_ENTRIES:
+        _memo.popitem(last=False)
+    return default if decoded is None else decoded
+
+
+def memo_stats() -> Dict[str, Any]:
+    total = _memo_hits + _memo_misses
+    return {
+        "backend": "orjson" if orjson is not None else "json",
+        "entries": len(_memo),
+        "hits": _memo_hits,
+        "misses": _memo_misses,
+        "hit_ratio": round(_memo_hits / total, 4) if total else 0.0,
+    }
+
+
+def clear_memo() -> None:
+    global _memo_hits, _memo_misses
+    _memo.clear()
+    _memo_hits = 0
+    _memo_misses = 0
@@ -2,17 +2,131 @@
 PocketBase Python client for backend services
 """
 
+import asyncio
+import base64
 import httpx
 import json
-from typing import Dict, Any, List, Optional
+import os
+import time
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Hashable
 from datetime import datetime, date
 
+from lib.record_cache import record_cache
+from lib.resilience import get_breaker, call_async
+from lib import json_codec
+
+
+# Fail fast instead of stacking requests when PocketBase is down or very slow
+_pb_breaker = get_breaker("pocketbase", failure_threshold=5, reset_timeout=15.0)
+# Read timeout per request; the connect timeout is kept short on purpose
+_PB_TIMEOUT = httpx.Timeout(float(os.getenv("POCKETBASE_TIMEOUT", "10")), connect=3.0)
+# Retries for idempotent reads (transport errors and 502/503/504)
+_PB_READ_RETRIES = 2
+
+
+# Refresh the admin token this many seconds before it expires
+_TOKEN_REFRESH_MARGIN = 60
+
+# In-flight work shared across all PocketBaseClient instances (every router has its own client)
+_inflight_auth: Dict[Hashable, "asyncio.Future"] = {}
+_inflight_gets: Dict[Hashable, "asyncio.Future"] = {}
+
+
+async def _singleflight(inflight: Dict[Hashable, "asyncio.Future"], key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run factory() once per key while it is in flight; concurrent callers with the same
+    key await the same result. Shielded so one caller's cancellation doesn't cancel the rest.
+    """
+    future = inflight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(factory())
+        inflight[key] = future
+
+        def _done(f: "asyncio.Future") -> None:
+            if inflight.get(key) is f:
+                del inflight[key]
+
+        future.add_done_callback(_done)
+    return await asyncio.shield(future)
+
+
+async def coalesced_get(
+    client: httpx.AsyncClient,
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    retries: int = _PB_READ_RETRIES,
+) -> httpx.Response:
+    """
+    GET through a shared in-flight table: identical concurrent reads (same base URL, path,
+    params and Authorization header) become one upstream request. Each waiter gets the
+    same Response object; call .json() per caller so parsed data is not shared.
+    The breaker and retries wrap the shared request, so a failure counts once however
+    many callers were waiting on it.
+    """
+    key = (
+        str(client.base_url),
+        url,
+        tuple(sorted((k, str(v)) for k, v in (params or {}).items())),
+        (headers or {}).get("Authorization", ""),
+    )
+    return await _singleflight(
+        _inflight_gets,
+        key,
+        lambda: call_async(_pb_breaker, lambda: client.get(url, params=params, headers=headers), retries=retries),
+    )
+
+
+def _token_expires_at(token: Optional[str]) -> float:
+    """Return the JWT `exp` claim (epoch seconds), or 0 if it can't be read."""
+    if not token:
+        return 0
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload)).get("exp", 0) or 0)
+    except Exception:
+        return 0
+
 
 class PocketBaseClient:
     def __init__(self, base_url: str = "http://127.0.0.1:8090"):
         self.base_url = base_url.rstrip("/")
-        self.client = httpx.AsyncClient(base_url=base_url, timeout=30.0)
+        self.client = httpx.AsyncClient(base_url=base_url, timeout=_PB_TIMEOUT)
         self.admin_token: Optional[str] = None
+        # Remembered by authenticate_admin so expired tokens can be refreshed
+        self._admin_credentials: Optional[tuple] = None
+
+    async def _ensure_admin_token(self) -> None:
+        """Refresh the admin token when it is missing or about to expire (single-flight)."""
+        if not self._admin_credentials:
+            return
+        if self.admin_token:
+            expires_at = _token_expires_at(self.admin_token)
+            if not expires_at or expires_at - time.time() > _TOKEN_REFRESH_MARGIN:
+                return
+        email, password = self._admin_credentials
+        await self.authenticate_admin(email, password)
+
+    def _admin_headers(self) -> Dict[str, str]:
+        if self.admin_token:
+            return {"Authorization": f"Bearer {self.admin_token}"}
+        return {}
+
+    async def _get(self, url: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        """
+        Admin-authenticated, coalesced GET with retry and circuit breaker; refreshes the
+        token once on 401. Raises CircuitOpenError while PocketBase is marked unavailable.
+        """
+        await self._ensure_admin_token()
+        response = await coalesced_get(self.client, url, params=params, headers=self._admin_headers())
+        if response.status_code == 401 and self._admin_credentials:
+            stale_token = self.admin_token
+            self.admin_token = None
+            await self._ensure_admin_token()
+            if self.admin_token and self.admin_token != stale_token:
+                response = await coalesced_get(self.client, url, params=params, headers=self._admin_headers())
+        return response
 
     async def _get_user_by_email(self, email: str, password: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Fetch a user record by email (for get-or-create when create fails with unique)."""
@@ -61,53 +175,74 @@ class PocketBaseClient:
             return None
 
     async def authenticate_admin(self, email: str, password: str) -> bool:
-        """Authenticate as admin/superuser"""
+        """
+        Authenticate as admin/superuser. Concurrent calls for the same PocketBase and
+        account (from any client instance) share one in-flight auth request.
+        """
+        self._admin_credentials = (email, password)
+        token = await _singleflight(
+            _inflight_auth,
+            (self.base_url, email),
+            lambda: self._request_admin_token(email, password),
+        )
+        if token:
+            self.admin_token = token
+            return True
+        return False
+
+    async def _request_admin_token(self, email: str, password: str) -> Optional[str]:
         try:
             # PocketBase 0.36.1 uses _superusers collection for admin auth
-            response = await self.client.post(
-                "/api/collections/_superusers/auth-with-password",
-                json={"identity": email, "password": password},
+            response = await call_async(
+                _pb_breaker,
+                lambda: self.client.post(
+                    "/api/collections/_superusers/auth-with-password",
+                    json={"identity": email, "password": password},
+                ),
             )
             if response.status_code == 200:
                 data = response.json()
-                self.admin_token = data.get("token")
-                if self.admin_token:
-                    auth_header = f"Bearer {self.admin_token}"
+                token = data.get("token")
+                if token:
                     # Don't set global headers - set per request instead
-                    # self.client.headers.update({"Authorization": auth_header})
-                    print(f"DEBUG: Admin authenticated successfully. Token length: {len(self.admin_token)}")
-                    print(f"DEBUG: Authorization header will be set per request: {auth_header[:50]}...")
-                    return True
+                    print(f"DEBUG: Admin authenticated successfully. Token length: {len(token)}")
+                    return token
                 else:
                     print("ERROR: No token in authentication response")
-                    return False
+                    return None
             else:
                 print(f"Admin authentication failed: {response.status_code} - {response.text}")
-            return False
+            return None
         except Exception as e:
             print(f"Admin authentication failed: {e}")
-            return False
+            return None
 
     async def create_record(
         self, collection: str, data: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
         """Create a new record in a collection"""
         try:
+            await self._ensure_admin_token()
             # Ensure Authorization header is set
-            headers = {}
+            headers = {"Content-Type": "application/json"}
             if self.admin_token:
                 headers["Authorization"] = f"Bearer {self.admin_token}"
             else:
                 print(f"WARNING: No admin token available for creating record in {collection}")
             
             # Use collection API (admin API may not exist in 0.36.1)
-            response = await self.client.post(
-                f"/api/collections/{collection}/records",
-                json=data,
-                headers=headers,
+            # Writes are not retried (not idempotent), but still go through the breaker
+            response = await call_async(
+                _pb_breaker,
+                lambda: self.client.post(
+                    f"/api/collections/{collection}/records",
+                    content=json_codec.dumps_bytes(data),
+                    headers=headers,
+                ),
             )
             if response.status_code == 200:
-                return response.json()
+                record_cache.invalidate_queries(collection)
+                return json_codec.loads(response.content)
             else:
                 error_text = response.text
                 # User already exists (email unique) - fetch and return existing record
@@ -141,37 +276,48 @@ class PocketBaseClient:
         per_page: int = 50,
         filter: Optional[str] = None,
         sort: Optional[str] = None,
+        fields: Optional[str] = None,
+        skip_total: bool = False,
+        raise_on_error: bool = False,
     ) -> List[Dict[str, Any]]:
-        """Get a list of records from a collection"""
+        """
+        Get a list of records from a collection.
+
+        fields: comma-separated projection (e.g. "id,source_url") so PocketBase only
+            returns what the caller needs instead of full records.
+        skip_total: skip PocketBase's COUNT query (totalItems/totalPages become -1).
+        raise_on_error: raise instead of returning [] when PocketBase fails, for callers
+            that must not mistake an outage for an empty result (e.g. cached snapshots).
+        """
         try:
             params = {"page": page, "perPage": per_page}
             if filter:
                 params["filter"] = filter
             if sort:
                 params["sort"] = sort
+            if fields:
+                params["fields"] = fields
+            if skip_total:
+                params["skipTotal"] = 1
+
+            # Immutable collections (articles, ads, achievements) are served from memory
+            cache_key = tuple(sorted(params.items()))
+            cached_items = record_cache.get_query(collection, cache_key)
+            if cached_items is not None:
+                return cached_items
 
             # Use collection API with explicit Authorization header
             endpoint = f"/api/collections/{collection}/records"
             
-            # Ensure Authorization header is explicitly set for each request
-            headers = {}
-            if self.admin_token:
-                headers["Authorization"] = f"Bearer {self.admin_token}"
-                # Debug: verify token is set
-                if collection == "published_editions" or collection == "daily_editions":
-                    print(f"DEBUG: Sending request to {collection} with Authorization header (token length: {len(self.admin_token)})")
-            else:
+            # Authorization header is set per request (identical concurrent reads are coalesced)
+            response = await self._get(endpoint, params=params)
+            headers = self._admin_headers()
+            if not self.admin_token:
                 print(f"WARNING: No admin token available for {collection}")
             
-            response = await self.client.get(
-                endpoint,
-                params=params,
-                headers=headers,
-            )
-            
             # Debug: check response
             if collection == "daily_editions" and response.status_code == 200:
-                data = response.json()
+                data = json_codec.loads(response.content)
                 items = data.get("items", [])
                 if items:
                     print(f"DEBUG: Response headers: {dict(response.headers)}")
@@ -192,7 +338,7 @@ class PocketBaseClient:
                     print(f"ERROR: No admin token available!")
             
             if response.status_code == 200:
-                data = response.json()
+                data = json_codec.loads(response.content)
                 items = data.get("items", [])
                 
                 # Debug: check what we're getting back
@@ -203,7 +349,8 @@ class PocketBaseClient:
                 
                 # If we only get metadata, the collection might have view restrictions
                 # Check if we need to expand fields or use a different approach
-                if items and len(items[0].keys()) <= 3:
+                # (not applicable to projected lists, which are small on purpose)
+                if items and not fields and len(items[0].keys()) <= 3:
                     print(f"WARNING: Only got metadata fields. Fetching full records individually...")
                     # Fetch full records by ID for all items
                     full_items = []
@@ -220,6 +367,11 @@ class PocketBaseClient:
                             full_items.append(item)
                     return full_items
                 
+                if record_cache.is_cached(collection):
+                    record_cache.put_query(collection, cache_key, items)
+                    if not fields:
+                        for item in items:
+                            record_cache.put_record(collection, item)
                 return items
             else:
                 error_text = response.text
@@ -227,34 +379,70 @@ class PocketBaseClient:
                 # Raise exception for 403 errors so caller can handle them
                 if response.status_code == 403:
                     raise Exception(f"PocketBase authentication failed (403): {error_text}")
+                if raise_on_error:
+                    raise Exception(f"Failed to list {collection}: {response.status_code} - {error_text[:200]}")
             return []
         except Exception as e:
             # Re-raise if it's already our custom exception
-            if "403" in str(e) or "authentication" in str(e).lower():
+            if raise_on_error or "403" in str(e) or "authentication" in str(e).lower():
                 raise
             print(f"Error getting list: {e}")
             return []
 
+    async def get_full_list(
+        self,
+        collection: str,
+        batch: int = 500,
+        filter: Optional[str] = None,
+        sort: Optional[str] = None,
+        fields: Optional[str] = None,
+        skip_total: bool = True,
+        raise_on_error: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch every record matching filter by walking pages of `batch` records.
+        Stops at the first short page, so skip_total is safe (and the default).
+        """
+        result: List[Dict[str, Any]] = []
+        page = 1
+        while True:
+            items = await self.get_list(
+                collection,
+                page=page,
+                per_page=batch,
+                filter=filter,
+                sort=sort,
+                fields=fields,
+                skip_total=skip_total,
+                raise_on_error=raise_on_error,
+            )
+            if not items:
+                break
+            result.extend(items)
+            if len(items) < batch:
+                break
+            page += 1
+        return result
+
     async def get_record_by_id(
         self, collection: str, record_id: str
     ) -> Optional[Dict[str, Any]]:
         """Get a single record by ID with all fields"""
+        cached = record_cache.get_record(collection, record_id)
+        if cached is not None:
+            return cached
         try:
             # Use collection API (should work with proper permissions)
             endpoint = f"/api/collections/{collection}/records/{record_id}"
             
-            # Ensure Authorization header is set
-            headers = {}
-            if self.admin_token:
-                headers["Authorization"] = f"Bearer {self.admin_token}"
-            
-            response = await self.client.get(endpoint, headers=headers)
+            response = await self._get(endpoint)
             
             if response.status_code == 200:
-                data = response.json()
+                data = json_codec.loads(response.content)
                 # Debug
                 if collection == "daily_editions":
                     print(f"DEBUG get_record_by_id: Keys: {list(data.keys())}, Has date: {'date' in data}")
+                record_cache.put_record(collection, data)
                 return data
             else:
                 print(f"get_record_by_id failed: {response.status_code} - {response.text}")
@@ -268,16 +456,21 @@ class PocketBaseClient:
     ) -> Optional[Dict[str, Any]]:
         """Update a record (uses admin token if set)."""
         try:
-            headers = {}
+            await self._ensure_admin_token()
+            headers = {"Content-Type": "application/json"}
             if self.admin_token:
                 headers["Authorization"] = f"Bearer {self.admin_token}"
-            response = await self.client.patch(
-                f"/api/collections/{collection}/records/{record_id}",
-                json=data,
-                headers=headers,
+            response = await call_async(
+                _pb_breaker,
+                lambda: self.client.patch(
+                    f"/api/collections/{collection}/records/{record_id}",
+                    content=json_codec.dumps_bytes(data),
+                    headers=headers,
+                ),
             )
+            record_cache.invalidate(collection, record_id)
             if response.status_code == 200:
-                return response.json()
+                return json_codec.loads(response.content)
             return None
         except Exception as e:
             print(f"Error updating record: {e}")
@@ -286,13 +479,18 @@ class PocketBaseClient:
     async def delete_record(self, collection: str, record_id: str) -> bool:
         """Delete a record"""
         try:
+            await self._ensure_admin_token()
             headers = {}
             if self.admin_token:
                 headers["Authorization"] = f"Bearer {self.admin_token}"
-            response = await self.client.delete(
-                f"/api/collections/{collection}/records/{record_id}",
-                headers=headers,
+            response = await call_async(
+                _pb_breaker,
+                lambda: self.client.delete(
+                    f"/api/collections/{collection}/records/{record_id}",
+                    headers=headers,
+                ),
             )
+            record_cache.invalidate(collection, record_id)
             return response.status_code == 204
         except Exception as e:
             print(f"Error deleting record: {e}")
@@ -370,13 +568,8 @@ def serialize_for_pb(data: Dict[str, Any]) -> Dict[str, Any]:
     for key, value in data.items():
         if isinstance(value, (date, datetime)):
             result[key] = value.isoformat()
-        elif isinstance(value, dict):
-            # PocketBase expects JSON fields as strings
-            result[key] = json.dumps(value)
-        elif isinstance(value, list):
-            # Lists should also be JSON strings
-            result[key] = json.dumps(value)
         else:
+            # dicts/lists are sent as-is: PocketBase stores them as native JSON field values
             result[key] = value
     return result
 
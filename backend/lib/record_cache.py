@@ -0,0 +1,163 @@
+"""
+Process-wide read-through cache for PocketBase records.
+
+Articles, ads and achievement definitions are effectively immutable once written,
+so PocketBaseClient serves them from memory instead of re-fetching them on every
+request. Each collection has its own TTL and a size-bounded LRU. Writes made
+through PocketBaseClient (create/update/delete) invalidate the affected entries.
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, Hashable
+
+
+# collection -> (record_ttl_seconds, max_records, query_ttl_seconds)
+# Article records never change after ingestion, but the set of articles grows
+# (possibly from another process, e.g. news_worker.py), so article list queries
+# are not cached. Ads and achievement definitions only change via admin scripts.
+DEFAULT_POLICIES: Dict[str, Tuple[float, int, float]] = {
+    "articles": (3600.0, 5000, 0.0),
+    "ads": (600.0, 500, 600.0),
+    "achievements": (600.0, 500, 600.0),
+}
+
+# Cached list queries per collection (list results are small but frequent)
+MAX_QUERIES_PER_COLLECTION = 64
+
+
+class _LRU:
+    """Ordered dict with TTL per entry and a maximum size (oldest evicted first)."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RecordCache:
+    """
+    Per-collection record and list-query cache with hit-ratio metrics.
+
+    Records are stored by id; list queries by their request parameters. Values are
+    returned as shallow copies so callers can annotate records (e.g. parsed tags)
+    without mutating the cached entry.
+    """
+
+    def __init__(self, policies: Optional[Dict[str, Tuple[float, int, float]]] = None):
+        self.enabled = os.getenv("RECORD_CACHE_ENABLED", "true").lower() != "false"
+        self.policies = dict(policies or DEFAULT_POLICIES)
+        self._records: Dict[str, _LRU] = {}
+        self._queries: Dict[str, _LRU] = {}
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        for collection, (ttl, max_entries, query_ttl) in self.policies.items():
+            self._records[collection] = _LRU(ttl, max_entries)
+            self._queries[collection] = _LRU(query_ttl, MAX_QUERIES_PER_COLLECTION)
+            self._hits[collection] = 0
+            self._misses[collection] = 0
+
+    def is_cached(self, collection: str) -> bool:
+        return self.enabled and collection in self.policies
+
+    def _count(self, collection: str, hit: bool) -> None:
+        if hit:
+            self._hits[collection] += 1
+        else:
+            self._misses[collection] += 1
+
+    def get_record(self, collection: str, record_id: str) -> Optional[Dict[str, Any]]:
+        """Return a cached record or None (counts as hit/miss)."""
+        if not self.is_cached(collection):
+            return None
+        record = self._records[collection].get(record_id)
+        self._count(collection, record is not None)
+        return dict(record) if record is not None else None
+
+    def put_record(self, collection: str, record: Dict[str, Any]) -> None:
+        if not self.is_cached(collection) or not isinstance(record, dict):
+            return
+        record_id = record.get("id")
+        if record_id:
+            self._records[collection].put(record_id, dict(record))
+
+    def get_query(self, collection: str, key: Hashable) -> Optional[List[Dict[str, Any]]]:
+        """Return a cached list result or None (counts as hit/miss)."""
+        if not self.is_cached(collection) or self._queries[collection].ttl <= 0:
+            return None
+        items = self._queries[collection].get(key)
+        self._count(collection, items is not None)
+        return [dict(item) for item in items] if items is not None else None
+
+    def put_query(self, collection: str, key: Hashable, items: List[Dict[str, Any]]) -> None:
+        if not self.is_cached(collection) or self._queries[collection].ttl <= 0:
+            return
+        self._queries[collection].put(key, [dict(item) for item in items])
+
+    def invalidate(self, collection: str, record_id: Optional[str] = None) -> None:
+        """
+        Drop cached state after a write. A record id drops that record; list queries
+        of the collection are always dropped since membership or order may change.
+        """
+        if collection not in self.policies:
+            return
+        if record_id:
+            self._records[collection].pop(record_id)
+        else:
+            self._records[collection].clear()
+        self._queries[collection].clear()
+
+    def invalidate_queries(self, collection: str) -> None:
+        """Drop cached list queries only (after a create: existing records are unchanged)."""
+        if collection in self.policies:
+            self._queries[collection].clear()
+
+    def clear(self) -> None:
+        for collection in self.policies:
+            self.invalidate(collection)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, hit ratio and current size per collection."""
+        result: Dict[str, Any] = {"enabled": self.enabled, "collections": {}}
+        for collection in self.policies:
+            hits = self._hits[collection]
+            misses = self._misses[collection]
+            total = hits + misses
+            result["collections"][collection] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / total, 4) if total else 0.0,
+                "records": len(self._records[collection]),
+                "queries": len(self._queries[collection]),
+            }
+        return result
+
+
+# Shared by every PocketBaseClient instance in the process
+record_cache = RecordCache()
@@ -0,0 +1,147 @@
+"""
+Typed views of PocketBase records for hot paths.
+
+Records arrive from PocketBase as plain dicts whose JSON fields may be native values
+or (legacy) JSON strings, and whose timestamps are strings. Code that loops over many
+records used to repeat the .get() chains, JSON sniffing and isinstance checks - and
+in sort keys, date parsing - per access. Article, PublishedEdition and PlacedItem are
+built once per record at the boundary: JSON fields decoded (via decode_record_field,
+so memoized per record version), missing values normalized, and timestamps parsed
+to epoch seconds. Attributes are __slots__, so instances are smaller than the dicts
+they are built from and attribute access is a fixed offset.
+
+They are read-only views: writes still go through PocketBaseClient with plain dicts,
+and decoded JSON values are shared with the json_codec memo (do not mutate them).
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from lib.json_codec import decode_field, decode_record_field
+
+
+def parse_timestamp(value: Any) -> float:
+    """
+    Epoch seconds of a PocketBase datetime ("2026-01-31 12:00:00.000Z"), ISO 8601 string
+    or datetime; 0.0 if empty or unparsable. Naive values are taken as UTC (PocketBase
+    stores UTC).
+    """
+    if not value:
+        return 0.0
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            # Python 3.11 fromisoformat accepts "Z" and a space separator (C fast path)
+            dt = datetime.fromisoformat(str(value))
+        except ValueError:
+            try:
+                from dateutil import parser as date_parser
+                dt = date_parser.parse(str(value))
+            except (ValueError, OverflowError):
+                return 0.0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _dict_field(record: Dict[str, Any], field: str) -> Dict[str, Any]:
+    value = decode_record_field(record, field, {})
+    return value if isinstance(value, dict) else {}
+
+
+class Article:
+    """An articles record with decoded JSON fields and parsed timestamps."""
+
+    __slots__ = (
+        "id",
+        "original_title",
+        "source_url",
+        "daily_edition_id",
+        "processed_variants",
+        "tags",
+        "audience_scores",
+        "location_lat",
+        "location_lon",
+        "location_city",
+        "country_code",
+        "assistant_comment",
+        "date",
+        "published_at",
+        "created",
+        "updated",
+        "published_ts",
+        "sort_ts",
+    )
+
+    def __init__(self, record: Dict[str, Any]):
+        self.id: str = record.get("id") or ""
+        self.original_title: str = record.get("original_title") or ""
+        self.source_url: str = (record.get("source_url") or "").strip()
+        self.daily_edition_id: str = record.get("daily_edition_id") or ""
+        self.processed_variants = _dict_field(record, "processed_variants")
+        self.tags = _dict_field(record, "tags")
+        self.audience_scores = _dict_field(record, "audience_scores")
+        self.location_lat: Optional[float] = record.get("location_lat")
+        self.location_lon: Optional[float] = record.get("location_lon")
+        self.location_city: Optional[str] = record.get("location_city")
+        self.country_code: Optional[str] = record.get("country_code")
+        self.assistant_comment: Optional[str] = record.get("assistant_comment")
+        self.date: str = record.get("date") or ""
+        self.published_at: Optional[str] = record.get("published_at") or None
+        self.created: Optional[str] = record.get("created") or None
+        self.updated: str = record.get("updated") or ""
+        self.published_ts = parse_timestamp(self.published_at)
+        # Recency used for ordering: published_at, else created
+        self.sort_ts = self.published_ts or parse_timestamp(self.created)
+
+    @property
+    def topic_tags(self) -> List[str]:
+        topic_tags = self.tags.get("topic_tags", [])
+        return topic_tags if isinstance(topic_tags, list) else []
+
+
+class PlacedItem:
+    """One cell of a published grid layout (article or ad)."""
+
+    __slots__ = ("article_id", "variant", "is_ad", "ad_id", "headline", "body", "row", "position")
+
+    def __init__(self, item: Dict[str, Any]):
+        self.article_id: Optional[str] = item.get("articleId") or None
+        self.variant: Optional[str] = item.get("variant") or None
+        self.is_ad = bool(item.get("isAd"))
+        self.ad_id: Optional[str] = item.get("adId") or None
+        self.headline: str = (item.get("headline") or "").strip()
+        self.body: str = (item.get("body") or "").strip()
+        self.row: Optional[int] = item.get("row")
+        self.position: Optional[int] = item.get("position")
+
+
+def placed_items(grid_layout: Any) -> Tuple[PlacedItem, ...]:
+    """Placed items of a grid_layout value ({"placedItems": [...]}, a bare list, or JSON of either)."""
+    grid_layout = decode_field(grid_layout, {})
+    if isinstance(grid_layout, dict):
+        items = grid_layout.get("placedItems", [])
+    elif isinstance(grid_layout, list):
+        items = grid_layout
+    else:
+        items = []
+    if not isinstance(items, list):
+        return ()
+    return tuple(PlacedItem(item) for item in items if isinstance(item, dict))
+
+
+class PublishedEdition:
+    """A published_editions record with its placed items, stats and parsed timestamps."""
+
+    __slots__ = ("id", "user", "date", "newspaper_name", "placed_items", "stats", "published_at", "published_ts", "updated")
+
+    def __init__(self, record: Dict[str, Any]):
+        self.id: str = record.get("id") or ""
+        self.user: str = record.get("user") or ""
+        self.date: str = record.get("date") or ""
+        self.newspaper_name: Optional[str] = record.get("newspaper_name") or None
+        self.placed_items = placed_items(decode_record_field(record, "grid_layout", {}))
+        self.stats = _dict_field(record, "stats")
+        self.published_at: str = record.get("published_at") or ""
+        self.published_ts = parse_timestamp(self.published_at)
+        self.updated: str = record.get("updated") or ""
@@ -0,0 +1,188 @@
+"""
+Resilience helpers for calls to external dependencies (PocketBase, Ollama).
+
+- CircuitBreaker: after `failure_threshold` consecutive failures the breaker opens and
+  calls fail fast with CircuitOpenError for `reset_timeout` seconds; then one trial call
+  is let through (half-open) and its outcome closes or re-opens the breaker.
+- call_async / call_sync: run a call through a breaker, optionally retried with jittered
+  exponential backoff (idempotent calls only). A call counts once against the breaker,
+  however many attempts it took.
+
+Breakers are process-wide and registered by name so /health can report their state.
+"""
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple, Type
+
+import httpx
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} unavailable (circuit open, retry in {retry_in:.0f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.total_failures = 0
+        self.total_rejected = 0
+        self._trial_in_flight = False
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError when the call must not go through."""
+        if self.state == self.CLOSED:
+            return
+        elapsed = time.monotonic() - self.opened_at
+        if self.state == self.OPEN and elapsed >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+        self.total_rejected += 1
+        raise CircuitOpenError(self.name, max(0.0, self.reset_timeout - elapsed))
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def release(self) -> None:
+        """End a call whose outcome says nothing about the dependency's health."""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.total_failures += 1
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                print(f"[Resilience] Circuit '{self.name}' opened after {self.consecutive_failures} failure(s)")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        retry_in = 0.0
+        if self.state == self.OPEN:
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "total_failures": self.total_failures,
+            "total_rejected": self.total_rejected,
+            "retry_in_seconds": round(retry_in, 1),
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> CircuitBreaker:
+    """Get or create the process-wide breaker for a dependency."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(name, failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+        _breakers[name] = breaker
+    return breaker
+
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    return {name: breaker.snapshot() for name, breaker in _breakers.items()}
+
+
+# Transport-level failures worth retrying / counting against a breaker
+RETRYABLE_EXCEPTIONS: Tuple[Type[BaseException], ...] = (httpx.TransportError,)
+# Upstream statuses that indicate the dependency (not the request) is unhealthy
+RETRYABLE_STATUSES = (502, 503, 504)
+
+
+def _backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(max_delay, base * 2^attempt))."""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def _is_failed_response(result: Any) -> bool:
+    return isinstance(result, httpx.Response) and result.status_code in RETRYABLE_STATUSES
+
+
+async def call_async(
+    breaker: CircuitBreaker,
+    func: Callable[[], Awaitable[Any]],
+    retries: int = 0,
+    base_delay: float = 0.2,
+    max_delay: float = 2.0,
+) -> Any:
+    """
+    Call func() through the breaker. With retries > 0 (idempotent calls only), transport
+    errors and 502/503/504 responses are retried with jittered exponential backoff.
+    A final 5xx response is returned (and counted as a failure) rather than raised.
+    Other exceptions are raised without affecting the breaker.
+    """
+    breaker.before_call()
+    attempt = 0
+    try:
+        while True:
+            try:
+                result = await func()
+            except RETRYABLE_EXCEPTIONS:
+                if attempt >= retries or breaker.state == breaker.OPEN:
+                    breaker.record_failure()
+                    raise
+            else:
+                if not _is_failed_response(result):
+                    breaker.record_success()
+                    return result
+                if attempt >= retries or breaker.state == breaker.OPEN:
+                    breaker.record_failure()
+                    return result
+            await asyncio.sleep(_backoff_delay(attempt, base_delay, max_delay))
+            attempt += 1
+    finally:
+        # Non-health exceptions and cancellation: free a half-open trial slot
+        breaker.release()
+
+
+def call_sync(
+    breaker: CircuitBreaker,
+    func: Callable[[], Any],
+    retries: int = 0,
+    retry_on: Tuple[Type[BaseException], ...] = (ConnectionError,),
+    base_delay: float = 0.5,
+    max_delay: float = 5.0,
+) -> Any:
+    """
+    Blocking counterpart of call_async (e.g. the ollama client). Exceptions outside
+    retry_on (e.g. bad model output) are raised without affecting the breaker.
+    """
+    breaker.before_call()
+    attempt = 0
+    try:
+        while True:
+            try:
+                result = func()
+            except retry_on:
+                if attempt >= retries or breaker.state == breaker.OPEN:
+                    breaker.record_failure()
+                    raise
+            else:
+                breaker.record_success()
+                return result
+            time.sleep(_backoff_delay(attempt, base_delay, max_delay))
+            attempt += 1
+    finally:
+        breaker.release()
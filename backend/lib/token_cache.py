@@ -0,0 +1,158 @@
+"""
+Process-wide cache of verified PocketBase auth tokens.
+
+Every authenticated endpoint resolves the bearer token to a user identity. PocketBase
+signs auth tokens with a per-user secret (the record's tokenKey), so the signature can
+only be checked by PocketBase itself: the first request with a token verifies it there
+(auth-refresh, which also returns the user record), and the identity is cached under a
+hash of the token until the token's `exp` (capped at AUTH_CACHE_TTL so server-side
+revocation, e.g. a password change, is picked up). Later requests only decode the
+claims and do a dictionary lookup.
+
+Entries are dropped on logout (invalidate_token) and when the user's username or email
+changes (invalidate_user / identity_changed).
+"""
+import base64
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+
+# Tokens kept (least recently used evicted first)
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+# Max seconds a verified token is trusted without asking PocketBase again
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "300"))
+
+
+def decode_claims(token: str) -> Dict[str, Any]:
+    """
+    Decode and check the JWT claims (no signature check): a user id must be present,
+    the token must not be expired and, if typed, must be an auth token.
+    Raises ValueError otherwise.
+    """
+    parts = token.split(".")
+    if len(parts) != 3:
+        raise ValueError("Invalid JWT format")
+    payload = parts[1]
+    payload += "=" * (-len(payload) % 4)
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+    except Exception:
+        raise ValueError("Invalid JWT payload")
+    if not isinstance(claims, dict):
+        raise ValueError("Invalid JWT payload")
+    if not (claims.get("id") or claims.get("userId")):
+        raise ValueError("User ID not found in token")
+    if claims.get("type") not in (None, "auth"):
+        raise ValueError("Not an auth token")
+    try:
+        exp = float(claims.get("exp") or 0)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid exp claim")
+    if exp and exp <= time.time():
+        raise ValueError("Token expired")
+    return claims
+
+
+def _key(token: str) -> str:
+    # Tokens are credentials: keep only a digest in memory
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenCache:
+    """LRU of token digest -> verified identity, each entry expiring with its token."""
+
+    def __init__(self, max_entries: int = AUTH_CACHE_MAX_ENTRIES, max_ttl: float = AUTH_CACHE_TTL):
+        self.enabled = os.getenv("AUTH_CACHE_ENABLED", "true").lower() != "false"
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        # digest -> (expires_at epoch seconds, identity)
+        self._data: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._by_user: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """The cached identity of a verified token, or None."""
+        if not self.enabled:
+            return None
+        key = _key(token)
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return dict(entry[1])
+
+    def put(self, token: str, identity: Dict[str, Any], exp: float = 0) -> None:
+        """Cache a verified identity until min(exp, now + max_ttl)."""
+        if not self.enabled or not identity.get("id"):
+            return
+        expires_at = time.time() + self.max_ttl
+        if exp:
+            expires_at = min(expires_at, exp)
+        key = _key(token)
+        self._drop(key)
+        self._data[key] = (expires_at, dict(identity))
+        self._by_user.setdefault(identity["id"], set()).add(key)
+        while len(self._data) > self.max_entries:
+            self._drop(next(iter(self._data)))
+
+    def _drop(self, key: str) -> None:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return
+        keys = self._by_user.get(entry[1]["id"])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[entry[1]["id"]]
+
+    def invalidate_token(self, token: str) -> None:
+        self._drop(_key(token))
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop every cached token of a user."""
+        for key in list(self._by_user.get(user_id, ())):
+            self._drop(key)
+
+    def identity_changed(self, record: Dict[str, Any]) -> bool:
+        """
+        Drop the user's tokens if the record's username or email differs from the
+        cached identity. Returns True if entries were dropped.
+        """
+        keys = self._by_user.get(record.get("id", ""))
+        if not keys:
+            return False
+        identity = self._data[next(iter(keys))][1]
+        for field in ("email", "username"):
+            if field in record and record.get(field) != identity.get(field):
+                self.invalidate_user(identity["id"])
+                return True
+        return False
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._by_user.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, hit ratio and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._data),
+            "users": len(self._by_user),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Process-wide token cache
+token_cache = TokenCache()
@@ -0,0 +1,58 @@
+/// <reference path="../pb_data/types.d.ts" />
+// Older backend versions wrote JSON fields as JSON *strings* (sometimes double-encoded),
+// so every read had to json.loads them again. Rewrite those values as native JSON.
+// Records that already hold native values are left untouched.
+migrate((app) => {
+  const targets = {
+    "articles": ["processed_variants", "tags", "audience_scores"],
+    "published_editions": ["grid_layout", "stats"],
+    "users": ["purchased_upgrades"],
+  }
+  const batchSize = 500
+
+  for (const name of Object.keys(targets)) {
+    let collection
+    try {
+      collection = app.findCollectionByNameOrId(name)
+    } catch (_) {
+      continue
+    }
+    if (!collection) continue
+
+    const fields = targets[name].filter((field) => {
+      const f = collection.fields.getByName(field)
+      return f && f.type() === "json"
+    })
+    if (!fields.length) continue
+
+    let offset = 0
+    while (true) {
+      const records = app.findRecordsByFilter(collection, "", "created", batchSize, offset)
+      if (!records.length) break
+      for (const record of records) {
+        let changed = false
+        for (const field of fields) {
+          const raw = record.getString(field)
+          if (!raw || raw[0] !== "\"") continue
+          let value = raw
+          try {
+            // At most two rounds: values were json.dumps'ed up to twice before being stored
+            for (let i = 0; i < 2 && typeof value === "string"; i++) {
+              value = JSON.parse(value)
+            }
+          } catch (_) {
+            continue
+          }
+          if (typeof value === "string") continue
+          record.set(field, value)
+          changed = true
+        }
+        if (changed) app.saveNoValidate(record)
+      }
+      if (records.length < batchSize) break
+      offset += batchSize
+    }
+  }
+}, (app) => {
+  // Nothing to revert: the backend decodes both native and string-encoded values
+})
@@ -0,0 +1,42 @@
+/// <reference path="../pb_data/types.d.ts" />
+migrate((app) => {
+  const collection = app.findCollectionByNameOrId("pbc_user_stats")
+
+  // add field
+  collection.fields.addAt(4, new Field({
+    "hidden": false,
+    "id": "json_user_stats_influence",
+    "maxSize": 0,
+    "name": "influence",
+    "presentable": false,
+    "required": false,
+    "system": false,
+    "type": "json"
+  }))
+
+  // add field
+  collection.fields.addAt(5, new Field({
+    "hidden": false,
+    "id": "number_user_stats_version",
+    "max": null,
+    "min": 0,
+    "name": "version",
+    "onlyInt": true,
+    "presentable": false,
+    "required": false,
+    "system": false,
+    "type": "number"
+  }))
+
+  return app.save(collection)
+}, (app) => {
+  const collection = app.findCollectionByNameOrId("pbc_user_stats")
+
+  // remove field
+  collection.fields.removeById("json_user_stats_influence")
+
+  // remove field
+  collection.fields.removeById("number_user_stats_version")
+
+  return app.save(collection)
+})
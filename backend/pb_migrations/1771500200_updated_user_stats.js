@@ -0,0 +1,25 @@
+/// <reference path="../pb_data/types.d.ts" />
+migrate((app) => {
+  const collection = app.findCollectionByNameOrId("pbc_user_stats")
+
+  // add field
+  collection.fields.addAt(6, new Field({
+    "hidden": false,
+    "id": "json_user_stats_achievements",
+    "maxSize": 0,
+    "name": "achievements",
+    "presentable": false,
+    "required": false,
+    "system": false,
+    "type": "json"
+  }))
+
+  return app.save(collection)
+}, (app) => {
+  const collection = app.findCollectionByNameOrId("pbc_user_stats")
+
+  // remove field
+  collection.fields.removeById("json_user_stats_achievements")
+
+  return app.save(collection)
+})
@@ -0,0 +1,36 @@
+/// <reference path="../pb_data/types.d.ts" />
+// The achievement state becomes the versioned per-user stats snapshot (user_stats.version
+// is bumped by the backend, so existing values are rebuilt from history on first use).
+migrate((app) => {
+  const collection = app.findCollectionByNameOrId("pbc_user_stats")
+
+  // update field
+  collection.fields.addAt(6, new Field({
+    "hidden": false,
+    "id": "json_user_stats_achievements",
+    "maxSize": 0,
+    "name": "snapshot",
+    "presentable": false,
+    "required": false,
+    "system": false,
+    "type": "json"
+  }))
+
+  return app.save(collection)
+}, (app) => {
+  const collection = app.findCollectionByNameOrId("pbc_user_stats")
+
+  // update field
+  collection.fields.addAt(6, new Field({
+    "hidden": false,
+    "id": "json_user_stats_achievements",
+    "maxSize": 0,
+    "name": "achievements",
+    "presentable": false,
+    "required": false,
+    "system": false,
+    "type": "json"
+  }))
+
+  return app.save(collection)
+})
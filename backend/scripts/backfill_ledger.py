@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Seed the ledger of players who published before it existed.
+
+Appends one entry per published edition (revenue or costs, oldest first) for users
+that have no ledger entries yet, so it is safe to run more than once. Shop purchases
+made before the ledger existed were never recorded anywhere and cannot be replayed, so
+backfilled balances are the running sum of edition revenue.
+
+Usage:
+  python scripts/backfill_ledger.py            # every user with published editions
+  python scripts/backfill_ledger.py USER_ID... # only these users
+"""
+import os
+import sys
+import asyncio
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from lib.pocketbase_client import PocketBaseClient
+from lib.json_codec import decode_record_field
+from app.services.ledger_service import COLLECTION, KIND_EDITION, edition_description, ledger_service
+
+
+async def backfill_user(pb: PocketBaseClient, user_id: str) -> int:
+    existing = await pb.get_list(
+        COLLECTION, filter=f'user = "{user_id}"', per_page=1, fields="id", skip_total=True, raise_on_error=True
+    )
+    if existing:
+        return 0
+    editions = await pb.get_full_list(
+        "published_editions",
+        filter=f'user = "{user_id}"',
+        sort="published_at,id",
+        fields="id,newspaper_name,stats,published_at",
+        raise_on_error=True,
+    )
+    balance = 0.0
+    written = 0
+    for edition in editions:
+        stats = decode_record_field(edition, "stats", {})
+        if not isinstance(stats, dict):
+            stats = {}
+        cash = float(stats.get("cash", 0.0) or 0.0)
+        balance += cash
+        entry = await ledger_service.append(
+            pb,
+            user_id,
+            cash,
+            balance,
+            KIND_EDITION,
+            edition_description(cash, edition.get("newspaper_name")),
+            ref=edition.get("id", ""),
+            occurred_at=edition.get("published_at", ""),
+        )
+        if entry:
+            written += 1
+    return written
+
+
+async def main():
+    pb = PocketBaseClient(base_url=os.getenv("POCKETBASE_URL", "http://127.0.0.1:8090"))
+    email = os.getenv("POCKETBASE_ADMIN_EMAIL")
+    password = os.getenv("POCKETBASE_ADMIN_PASSWORD")
+    if not email or not password:
+        print("ERROR: Set POCKETBASE_ADMIN_EMAIL and POCKETBASE_ADMIN_PASSWORD in .env")
+        sys.exit(1)
+    ok = await pb.authenticate_admin(email, password)
+    if not ok:
+        print("ERROR: Failed to authenticate with PocketBase")
+        sys.exit(1)
+
+    user_ids = sys.argv[1:]
+    if not user_ids:
+        editions = await pb.get_full_list("published_editions", fields="user", raise_on_error=True)
+        user_ids = sorted({e.get("user") for e in editions if e.get("user")})
+    print(f"Backfilling ledger for {len(user_ids)} user(s)...")
+
+    failed = 0
+    for user_id in user_ids:
+        try:
+            written = await backfill_user(pb, user_id)
+            print(f"  {user_id}: {written} entries" if written else f"  {user_id}: skipped (has entries or no revenue)")
+        except Exception as e:
+            failed += 1
+            print(f"  {user_id}: FAILED ({e})")
+    await pb.close()
+    print(f"Done. {len(user_ids) - failed} processed, {failed} failed.")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
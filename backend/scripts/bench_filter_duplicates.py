@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of articles_pb.filter_duplicate_articles against the previous
+implementation (dateutil parsing inside the sort keys of every group sort and of the
+final sort).
+
+Synthetic articles: ~20% share a source_url with an older version, a few have no URL
+or no published_at. "decode + filter" includes building the Article records (where the
+timestamps are parsed); /articles endpoints build them anyway for the response.
+
+Usage:
+  python scripts/bench_filter_duplicates.py             # 500, 5000 and 50000 articles
+  python scripts/bench_filter_duplicates.py 1000 20000  # custom sizes
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from lib.records import Article
+from app.api.articles_pb import filter_duplicate_articles
+
+_PB_DATETIME = "%Y-%m-%d %H:%M:%S.000Z"
+
+
+def legacy_filter_duplicate_articles(articles: List[dict]) -> List[dict]:
+    """The implementation before precomputed sort keys (kept here for comparison)."""
+    if not articles or len(articles) == 0:
+        return articles
+
+    def sort_key(art):
+        pub_at = art.get("published_at")
+        if pub_at:
+            try:
+                if isinstance(pub_at, str):
+                    from dateutil import parser as date_parser
+                    return date_parser.parse(pub_at).timestamp()
+                return pub_at.timestamp() if hasattr(pub_at, 'timestamp') else 0
+            except Exception:
+                pass
+        created = art.get("created")
+        if created:
+            try:
+                if isinstance(created, str):
+                    from dateutil import parser as date_parser
+                    return date_parser.parse(created).timestamp()
+                return created.timestamp() if hasattr(created, 'timestamp') else 0
+            except Exception:
+                pass
+        return art.get("id", "")
+
+    by_url: dict = {}
+    for article in articles:
+        url = (article.get("source_url") or "").strip()
+        if not url:
+            by_url[f"__no_url_{article.get('id', '')}"] = [article]
+            continue
+        if url not in by_url:
+            by_url[url] = []
+        by_url[url].append(article)
+
+    unique_articles = []
+    for _url, group in by_url.items():
+        sorted_group = sorted(group, key=sort_key, reverse=True)
+        unique_articles.append(sorted_group[0])
+    unique_articles.sort(key=sort_key, reverse=True)
+    return unique_articles
+
+
+def make_articles(count: int, seed: int = 42) -> List[dict]:
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    urls = max(1, int(count * 0.8))
+    articles = []
+    for i in range(count):
+        created = start + timedelta(seconds=rng.randrange(86400 * 30))
+        published = created - timedelta(minutes=rng.randrange(600))
+        url_id = i if i < urls else rng.randrange(urls)
+        articles.append({
+            "id": f"{i:015d}",
+            "updated": created.strftime(_PB_DATETIME),
+            "original_title": f"Article {i}",
+            # Every legacy sort key falls back to created when published_at is empty, so
+            # no article lacks both (the legacy sort would compare str ids with floats)
+            "source_url": "" if rng.random() < 0.02 else f"https://example.com/news/{url_id}",
+            "published_at": "" if rng.random() < 0.05 else published.strftime(_PB_DATETIME),
+            "created": created.strftime(_PB_DATETIME),
+        })
+    rng.shuffle(articles)
+    return articles
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [500, 5000, 50000]
+    print(f"{'articles':>9} {'legacy ms':>10} {'decode+filter ms':>17} {'filter ms':>10} {'speed-up':>9}")
+    for size in sizes:
+        records = make_articles(size)
+        repeat = 5 if size <= 5000 else 2
+
+        legacy = legacy_filter_duplicate_articles(records)
+        current = filter_duplicate_articles([Article(r) for r in records])
+        if [a["id"] for a in legacy] != [a.id for a in current]:
+            print(f"  WARNING: results differ at {size} articles")
+
+        legacy_s = best_of(lambda: legacy_filter_duplicate_articles(records), repeat)
+        decoded_s = best_of(lambda: filter_duplicate_articles([Article(r) for r in records]), repeat)
+        prebuilt = [Article(r) for r in records]
+        filter_s = best_of(lambda: filter_duplicate_articles(prebuilt), repeat)
+        print(
+            f"{size:>9} {legacy_s * 1000:>10.1f} {decoded_s * 1000:>17.1f} {filter_s * 1000:>10.2f}"
+            f" {legacy_s / decoded_s:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Rebuild the user_stats aggregates from the published edition history.
+
+Usage:
+  python scripts/rebuild_user_stats.py            # every user with published editions
+  python scripts/rebuild_user_stats.py USER_ID... # only these users
+"""
+import os
+import sys
+import asyncio
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from lib.pocketbase_client import PocketBaseClient
+from app.services.user_stats_service import user_stats_service
+
+
+async def main():
+    pb = PocketBaseClient(base_url=os.getenv("POCKETBASE_URL", "http://127.0.0.1:8090"))
+    email = os.getenv("POCKETBASE_ADMIN_EMAIL")
+    password = os.getenv("POCKETBASE_ADMIN_PASSWORD")
+    if not email or not password:
+        print("ERROR: Set POCKETBASE_ADMIN_EMAIL and POCKETBASE_ADMIN_PASSWORD in .env")
+        sys.exit(1)
+    ok = await pb.authenticate_admin(email, password)
+    if not ok:
+        print("ERROR: Failed to authenticate with PocketBase")
+        sys.exit(1)
+
+    user_ids = sys.argv[1:]
+    if not user_ids:
+        editions = await pb.get_full_list("published_editions", fields="user", raise_on_error=True)
+        user_ids = sorted({e.get("user") for e in editions if e.get("user")})
+    print(f"Rebuilding user_stats for {len(user_ids)} user(s)...")
+
+    failed = 0
+    for user_id in user_ids:
+        try:
+            record = await user_stats_service.rebuild(pb, user_id)
+            print(f"  {user_id}: {record.get('editions', 0)} editions")
+        except Exception as e:
+            failed += 1
+            print(f"  {user_id}: FAILED ({e})")
+    await pb.close()
+    print(f"Done. {len(user_ids) - failed} rebuilt, {failed} failed.")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Check that BatchScorer (/score-batch, /optimize) scores exactly like
+ScoringService.calculate_scores (/submit).
+
+Random grids go through the same request path as the endpoints (_normalize_grid,
+_build_placements) and cover short grids, empty cells, ads with and without adId,
+unknown article ids, missing variants and unknown variants. Every result field must
+be equal, not just close.
+
+Usage:
+  python test_batch_scoring.py             # 3000 grids, seed 0
+  python test_batch_scoring.py 20000 7     # grids, seed
+"""
+import random
+import sys
+
+from app.api.submissions import GridPlacement, _build_placements, _normalize_grid
+from app.services.batch_scoring import batch_scorer
+from app.services.scoring_service import ScoringService
+
+SYNERGY_TAGS = sorted({tag for pair in ScoringService.SYNERGY_PENALTIES for tag in pair})
+OTHER_TAGS = ["SPORTS", "ECONOMY"]
+VARIANT_CHOICES = ["factual", "sensationalist", "propaganda", None, "satire"]
+
+
+def make_articles(rng: random.Random, count: int = 20):
+    articles = []
+    for i in range(count):
+        if i % 10 == 9:
+            tags = {}  # no topic tags
+        else:
+            tags = {"topic_tags": rng.sample(SYNERGY_TAGS + OTHER_TAGS, rng.randint(1, 3))}
+        articles.append({"id": f"a{i}", "tags": tags})
+    return articles
+
+
+def make_cell(rng: random.Random, article_ids):
+    kind = rng.random()
+    if kind < 0.15:
+        return GridPlacement(articleId=None, variant=None, isAd=False)
+    if kind < 0.25:
+        return GridPlacement(articleId=None, variant=None, isAd=True, adId=f"ad{rng.randrange(3)}")
+    if kind < 0.3:
+        # isAd without adId counts as an article cell when it has an article
+        return GridPlacement(articleId=rng.choice(article_ids), variant="factual", isAd=True)
+    article_id = rng.choice(article_ids) if rng.random() < 0.9 else "unknown"
+    return GridPlacement(articleId=article_id, variant=rng.choice(VARIANT_CHOICES), isAd=False)
+
+
+def main(count: int = 3000, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    articles = make_articles(rng)
+    article_ids = [a["id"] for a in articles]
+    grids = [
+        _normalize_grid([make_cell(rng, article_ids) for _ in range(rng.choice([6, 12, 16]))])
+        for _ in range(count)
+    ]
+
+    batch = batch_scorer.score(grids, articles)
+    scoring = ScoringService()
+    mismatches = 0
+    for n, (grid, batch_result) in enumerate(zip(grids, batch)):
+        article_placements, ad_placements = _build_placements(grid)
+        expected = scoring.calculate_scores(article_placements, ad_placements, articles, grid)
+        for field, value in batch_result.items():
+            if expected[field] != value:
+                mismatches += 1
+                if mismatches <= 5:
+                    print(f"❌ grid {n} {field}: batch {value!r} != calculate_scores {expected[field]!r}")
+                break
+    assert mismatches == 0, f"{mismatches} of {count} grids score differently"
+    print(f"✅ {count} grids: BatchScorer matches calculate_scores")
+
+
+def test_batch_scoring_matches_calculate_scores():
+    main()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    try:
+        main(*args)
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Check the layout optimizer's incremental scoring and its max_outrage hard limit.
+
+- _Search keeps a running score updated by move deltas; after many random moves it
+  must still equal a full recount (and BatchScorer's final_score for the same grid),
+  and a layout within max_outrage must never leave it.
+- optimize() must only report layouts within max_outrage, and none when no layout
+  can meet it.
+
+Usage:
+  python test_layout_optimizer.py
+"""
+import asyncio
+import random
+import sys
+
+from app.services.batch_scoring import batch_scorer
+from app.services.layout_optimizer import LayoutOptimizer, _outrage, _Search
+
+TAGS = ["WAR", "PEACE_GROUP", "CLIMATE", "OIL", "HEALTH", "TOBACCO", "SPORTS"]
+AD_IDS = ["ad1", "ad2"]
+MAX_OUTRAGE = 0.15
+
+
+def make_articles(count: int = 20, seed: int = 3):
+    rng = random.Random(seed)
+    return [{"id": f"a{i}", "tags": {"topic_tags": rng.sample(TAGS, 2)}} for i in range(count)]
+
+
+def check_incremental_scoring(articles, steps: int = 20000, seed: int = 11) -> None:
+    optimizer = LayoutOptimizer(workers=0)
+    article_ids, problem = optimizer.problem(
+        articles, len(AD_IDS), ["factual", "sensationalist", "propaganda"], MAX_OUTRAGE
+    )
+    search = _Search(problem, random.Random(seed))
+    search.randomize()
+    temperature = 25.0
+    for step in range(1, steps + 1):
+        was_within = search.within_limit()
+        search.step(temperature)
+        temperature = max(0.05, temperature * 0.9995)
+        if was_within:
+            assert search.within_limit(), f"step {step} left max_outrage"
+        if step % 500 == 0:
+            running = (search.score, search.placed, search.weighted_outrage)
+            search._recount()
+            assert abs(running[0] - search.score) < 1e-6, f"score drifted by {running[0] - search.score} at step {step}"
+            assert running[1] == search.placed, f"placed count drifted at step {step}"
+            assert abs(running[2] - search.weighted_outrage) < 1e-9, f"outrage weight drifted at step {step}"
+            placed = {item for item in search.items if item >= 0}
+            assert placed.isdisjoint(search.unplaced)
+            assert len(placed) + len(search.unplaced) == len(article_ids)
+
+    grid = optimizer._grid(search.state(), article_ids, AD_IDS)
+    rescored = batch_scorer.score([grid], articles)[0]
+    assert abs(rescored["final_score"] - search.score) < 0.01, (rescored["final_score"], search.score)
+    if search.within_limit():
+        assert rescored["outrage_meter"] <= MAX_OUTRAGE + 1e-9
+    print(f"✅ {steps} moves: running score equals a full recount ({search.score:.2f}, outrage "
+          f"{_outrage(search.placed, search.weighted_outrage):.2f})")
+
+
+async def check_max_outrage(articles) -> None:
+    optimizer = LayoutOptimizer(workers=0)
+    result = await optimizer.optimize(
+        articles, AD_IDS, max_outrage=MAX_OUTRAGE, top_n=5, budget_ms=300, seed=5
+    )
+    outrages = [layout["outrage_meter"] for layout in result["layouts"]]
+    assert outrages, "no layouts within max_outrage"
+    assert all(outrage <= MAX_OUTRAGE for outrage in outrages), outrages
+    print(f"✅ optimize(max_outrage={MAX_OUTRAGE}): {len(outrages)} layouts, outrage {outrages}")
+
+    # Only sensationalist variants: every non-empty layout is at 0.3
+    result = await optimizer.optimize(
+        articles, AD_IDS, variants=["sensationalist"], max_outrage=0.1, budget_ms=100, seed=5
+    )
+    assert result["layouts"] == [], [layout["outrage_meter"] for layout in result["layouts"]]
+    print("✅ optimize(sensationalist only, max_outrage=0.1): no layouts")
+
+
+def main() -> None:
+    articles = make_articles()
+    check_incremental_scoring(articles)
+    asyncio.run(check_max_outrage(articles))
+
+
+def test_layout_optimizer():
+    main()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
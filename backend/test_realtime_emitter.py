@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Exercise RealtimeSubscriber against LocalSSEEmitter (no PocketBase needed).
+
+Checks listener fan-out for live events, and that after a dropped stream the
+subscriber reconnects and replays changes made while it was disconnected - including
+for a collection that had no event before the drop.
+
+Usage:
+  python test_realtime_emitter.py
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from lib.pocketbase_client import PocketBaseClient
+from app.services.realtime_service import LocalSSEEmitter, RealtimeSubscriber, _pb_timestamp
+
+BASE_URL = "http://pocketbase.local"
+
+
+def _now(offset_seconds: float = 0) -> str:
+    return _pb_timestamp(datetime.now(timezone.utc) + timedelta(seconds=offset_seconds))
+
+
+async def _wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("timed out waiting for the subscriber")
+        await asyncio.sleep(0.01)
+
+
+async def main() -> None:
+    emitter = LocalSSEEmitter()
+    pb = PocketBaseClient(base_url=BASE_URL)
+    # Catch-up lists go through the PocketBase client: serve them from the emitter too
+    pb.client = httpx.AsyncClient(base_url=BASE_URL, transport=emitter)
+    subscriber = RealtimeSubscriber(pb, collections=["articles", "users"], transport=emitter)
+
+    events = []
+    subscriber.add_listener("articles", lambda action, record: events.append(("articles", action, record["id"])))
+
+    async def on_user(action, record):  # async listeners are awaited
+        events.append(("users", action, record["id"]))
+
+    subscriber.add_listener("users", on_user)
+
+    subscriber.start()
+    try:
+        await _wait_for(lambda: subscriber.connected)
+        assert emitter.subscriptions == ["articles/*", "users/*"], emitter.subscriptions
+        print("✅ Connected and subscribed")
+
+        # Live event: fanned out to the articles listener
+        created = _now()
+        emitter.emit("articles", "create", {"id": "a1", "original_title": "Launch", "created": created, "updated": created})
+        await _wait_for(lambda: ("articles", "create", "a1") in events)
+        print("✅ Live event dispatched")
+
+        # Drop the stream and change records before the subscriber gets to reconnect
+        reconnects = subscriber.reconnects
+        emitter.disconnect()
+        emitter.change("articles", "update", {"id": "a1", "original_title": "Launch (updated)", "created": created, "updated": _now(1)})
+        # users had no event before the drop: replayed from the first connection time
+        emitter.change("users", "update", {"id": "u1", "username": "ada", "created": _now(-3600), "updated": _now(1)})
+        # Changed before the subscriber first connected: not replayed
+        emitter.change("users", "update", {"id": "u-old", "username": "old", "created": _now(-7200), "updated": _now(-3600)})
+
+        await _wait_for(lambda: ("users", "update", "u1") in events and ("articles", "update", "a1") in events)
+        assert subscriber.reconnects > reconnects, "subscriber did not reconnect"
+        assert subscriber.connected
+        assert ("users", "update", "u-old") not in events, "replayed a change from before the first connection"
+        print("✅ Reconnected and replayed changes made while disconnected")
+
+        # Live events keep flowing after the reconnect
+        emitter.emit("users", "delete", {"id": "u1", "updated": _now(2)})
+        await _wait_for(lambda: ("users", "delete", "u1") in events)
+        print("✅ Live events after reconnect dispatched")
+        print(f"\nStatus: {subscriber.status()}")
+    finally:
+        await subscriber.stop()
+        await pb.client.aclose()
+
+
+def test_realtime_emitter():
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -91,6 +91,25 @@ async function proxyRequest(
       body,
     });
 
+    const corsHeaders = {
+      "Access-Control-Allow-Origin": "*",
+      "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
+      "Access-Control-Allow-Headers": "Content-Type, Authorization, If-None-Match",
+    };
+    // Pass conditional-request validators through so polling can get 304s
+    const cacheHeaders: Record<string, string> = {};
+    for (const name of ["etag", "cache-control"]) {
+      const value = response.headers.get(name);
+      if (value) cacheHeaders[name] = value;
+    }
+
+    if (response.status === 304) {
+      return new NextResponse(null, {
+        status: 304,
+        headers: { ...corsHeaders, ...cacheHeaders },
+      });
+    }
+
     // Get response body
     const responseText = await response.text();
     let responseData: any;
@@ -103,11 +122,7 @@ async function proxyRequest(
     // Return response with same status and headers
     return NextResponse.json(responseData, {
       status: response.status,
-      headers: {
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
-        "Access-Control-Allow-Headers": "Content-Type, Authorization",
-      },
+      headers: { ...corsHeaders, ...cacheHeaders },
     });
   } catch (error: any) {
     console.error("Proxy error:", error);
@@ -121,6 +121,19 @@ export function AuthProvider({ children }: { children: ReactNode }) {
   };
 
   const logout = async () => {
+    const token = pb.authStore.token;
+    if (token) {
+      // Best effort: drop the token from the backend's auth cache
+      try {
+        const { getActualApiUrl } = await import("@/lib/api");
+        await fetch(getActualApiUrl("/api/auth/logout"), {
+          method: "POST",
+          headers: { Authorization: `Bearer ${token}` },
+        });
+      } catch {
+        // Logging out locally must not depend on the backend
+      }
+    }
     pb.authStore.clear();
     setUser(null);
     setIsGuest(false);